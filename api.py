@@ -0,0 +1,374 @@
+"""Serves the APN read helpers as a JSON API, without Streamlit.
+
+Usage: python api.py [--bind 127.0.0.1] [--listen-port 8080] [--host ... --database ...]
+
+Every request authenticates with HTTP Basic (an APN username and
+password) and sees the data as that user would in the app. All
+endpoints are GET:
+
+    /v1/me                              the signed-in user
+    /v1/users/<id>                      a profile, with the viewer's connection status
+    /v1/profiles?ids=1,2,3              several profiles at once
+    /v1/connection-statuses?ids=1,2,3   the viewer's status with each user
+    /v1/connections[?after=]            accepted connections, one page
+    /v1/connections/pending[?after=]    requests waiting for the viewer
+    /v1/connections/count
+    /v1/opportunities[?after=&limit=]   open opportunities, newest first
+    /v1/opportunities/<id>              one opportunity (with Last-Modified)
+    /v1/search?q=...[&page=]            ranked user search
+"""
+import argparse
+import base64
+import gzip
+import hashlib
+import json
+import re
+from email.utils import formatdate, parsedate_to_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import mysql.connector
+
+from cache import TTLCache
+from db import ConnectionPool, PoolExhausted, add_connection_args
+from passwords import HasherBusy, PasswordHasher
+from queries import (connection_count, list_connections, list_open_opportunities, list_pending_requests,
+                     load_connection_statuses, load_profile, load_profiles, load_user, load_user_by_username)
+from search import NameIndex, search_users
+
+# -----------------------------------------------------------------
+# HTTP API
+# -----------------------------------------------------------------
+# A request costs one pooled connection and the queries of the helpers
+# it calls, instead of a full rerun of the Streamlit script. Responses
+# carry a weak ETag of their JSON body, and a request whose
+# If-None-Match still matches gets an empty 304. Single opportunities
+# also carry Last-Modified from Opportunities.updated_at (migration
+# 0006), which moves on every change to the row. Nothing else does:
+# a profile is spread over Users, Skills, Projects, Experience and
+# Connections, none of which records when it changed, and a listing
+# also changes when a row leaves it (a closed opportunity) or when the
+# viewer's application status moves, which the newest updated_at of
+# the listed rows would not show. Those revalidate by ETag alone.
+# Bodies of GZIP_MIN_BYTES or more are gzipped for clients that accept
+# it (a gzip or * coding with a non-zero q in Accept-Encoding).
+#
+# Answers depend on who is asking (connection statuses, application
+# statuses), so they are marked private: browsers and app clients may
+# keep them and revalidate, shared proxies may not.
+#
+# bcrypt makes every password check expensive, so verified credentials
+# are remembered for AUTH_CACHE_TTL seconds (by a hash of the header,
+# never the password itself), together with the password_hash they were
+# checked against. A remembered login still re-reads the user's row, so
+# a changed password or a deleted user stops working at once.
+
+BATCH_LIMIT = 50          # ids per batch request
+OPPORTUNITY_PAGE_LIMIT = 100
+GZIP_MIN_BYTES = 1024
+AUTH_CACHE_TTL = 300
+
+USER_FIELDS = ('user_id', 'username', 'full_name', 'email', 'role', 'graduation_year', 'bio')
+
+OPPORTUNITY_QUERY = """
+    SELECT opportunity_id, title, description, status, created_by_user_id, updated_at,
+           UNIX_TIMESTAMP(updated_at) AS updated_epoch
+    FROM Opportunities WHERE opportunity_id = %s
+"""
+
+
+class ApiError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def _int(value, name):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise ApiError(400, f"{name} must be an integer") from None
+
+
+def _id_list(query):
+    raw = query.get('ids', [''])[0]
+    ids = list(dict.fromkeys(_int(part, 'ids') for part in raw.split(',') if part.strip()))
+    if not ids:
+        raise ApiError(400, "ids is required, e.g. ids=1,2,3")
+    if len(ids) > BATCH_LIMIT:
+        raise ApiError(400, f"at most {BATCH_LIMIT} ids per request")
+    return ids
+
+
+def _after(query):
+    after = query.get('after', [None])[0]
+    return _int(after, 'after') if after is not None else None
+
+
+def _page(rows_and_next):
+    rows, next_after = rows_and_next
+    return {'items': rows, 'next_after': next_after}
+
+# -----------------------------------------------------------------
+# ENDPOINTS
+# -----------------------------------------------------------------
+# Each takes (api, cursor, viewer, query, *path groups) and returns the
+# JSON-able body, or (body, last_modified) with last_modified in Unix seconds.
+
+def get_me(api, cursor, viewer, query):
+    return {field: viewer.get(field) for field in USER_FIELDS}
+
+
+def get_profile(api, cursor, viewer, query, user_id):
+    profile = load_profile(cursor, int(user_id), viewer['user_id'])
+    if profile['user'] is None:
+        raise ApiError(404, "no such user")
+    return profile
+
+
+def get_profiles(api, cursor, viewer, query):
+    return load_profiles(cursor, _id_list(query), viewer['user_id'])
+
+
+def get_connection_statuses(api, cursor, viewer, query):
+    pairs = [(viewer['user_id'], user_id) for user_id in _id_list(query)]
+    return {other: status for (_, other), status in load_connection_statuses(cursor, pairs).items()}
+
+
+def get_connections(api, cursor, viewer, query):
+    return _page(list_connections(cursor, viewer['user_id'], _after(query)))
+
+
+def get_pending_requests(api, cursor, viewer, query):
+    return _page(list_pending_requests(cursor, viewer['user_id'], _after(query)))
+
+
+def get_connection_count(api, cursor, viewer, query):
+    return {'connection_count': connection_count(cursor, viewer['user_id'])}
+
+
+def get_opportunities(api, cursor, viewer, query):
+    limit = min(_int(query.get('limit', [20])[0], 'limit'), OPPORTUNITY_PAGE_LIMIT)
+    if limit < 1:
+        raise ApiError(400, "limit must be positive")
+    return _page(list_open_opportunities(cursor, viewer['user_id'], _after(query), limit))
+
+
+def get_opportunity(api, cursor, viewer, query, opportunity_id):
+    cursor.execute(OPPORTUNITY_QUERY, (int(opportunity_id),))
+    row = cursor.fetchone()
+    if row is None:
+        raise ApiError(404, "no such opportunity")
+    return row, int(row.pop('updated_epoch'))
+
+
+def get_search(api, cursor, viewer, query):
+    term = query.get('q', [''])[0]
+    if not term.strip():
+        raise ApiError(400, "q is required")
+    page = _int(query.get('page', [0])[0], 'page')
+    rows, has_next = search_users(cursor, term, viewer['user_id'], page=max(page, 0), name_index=api.name_index)
+    return {'items': rows, 'has_next_page': has_next}
+
+
+ROUTES = [
+    (re.compile(r"^/v1/me$"), get_me),
+    (re.compile(r"^/v1/users/(\d+)$"), get_profile),
+    (re.compile(r"^/v1/profiles$"), get_profiles),
+    (re.compile(r"^/v1/connection-statuses$"), get_connection_statuses),
+    (re.compile(r"^/v1/connections$"), get_connections),
+    (re.compile(r"^/v1/connections/pending$"), get_pending_requests),
+    (re.compile(r"^/v1/connections/count$"), get_connection_count),
+    (re.compile(r"^/v1/opportunities$"), get_opportunities),
+    (re.compile(r"^/v1/opportunities/(\d+)$"), get_opportunity),
+    (re.compile(r"^/v1/search$"), get_search),
+]
+
+# -----------------------------------------------------------------
+# SERVER
+# -----------------------------------------------------------------
+
+def _json_default(value):
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    if isinstance(value, (set, frozenset)):
+        return sorted(value)
+    return str(value)
+
+
+def encode_json(body):
+    return json.dumps(body, default=_json_default, separators=(',', ':')).encode('utf-8')
+
+
+def etag_of(data):
+    return f'W/"{hashlib.sha1(data).hexdigest()}"'
+
+
+def etag_matches(if_none_match, etag):
+    """Weak comparison, as If-None-Match requires."""
+    if if_none_match is None:
+        return False
+    if if_none_match.strip() == '*':
+        return True
+    opaque = etag[2:]
+    return any(tag.strip().removeprefix('W/') == opaque for tag in if_none_match.split(','))
+
+
+def not_modified_since(if_modified_since, last_modified):
+    if if_modified_since is None or last_modified is None:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        return False
+    return last_modified <= since.timestamp()
+
+
+def accepts_gzip(accept_encoding):
+    """Whether an Accept-Encoding header allows a gzip response."""
+    qualities = {}
+    for part in (accept_encoding or '').split(','):
+        coding, *params = [item.strip() for item in part.split(';')]
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if coding:
+            qualities[coding.lower()] = quality
+    for coding in ('gzip', 'x-gzip', '*'):
+        if coding in qualities:
+            return qualities[coding] > 0
+    return False
+
+
+class Api:
+    """The state shared by every request: pools, the password hasher and caches."""
+
+    def __init__(self, pool, hasher):
+        self.pool = pool
+        self.hasher = hasher
+        self.name_index = NameIndex()
+        self.sessions = TTLCache(max_entries=10000, default_ttl=AUTH_CACHE_TTL)
+
+    def authenticate(self, cursor, header):
+        """The user behind a Basic Authorization header, or None."""
+        if not header or not header.startswith('Basic '):
+            return None
+        key = hashlib.sha256(header.encode('utf-8')).hexdigest()
+        remembered = self.sessions.get(key)
+        if remembered is not None:
+            user_id, password_hash = remembered
+            user = load_user(cursor, user_id)
+            if user and user['password_hash'] == password_hash:
+                return {field: user.get(field) for field in USER_FIELDS}
+            self.sessions.invalidate(key)
+        try:
+            username, _, password = base64.b64decode(header[6:]).decode('utf-8').partition(':')
+        except (ValueError, UnicodeDecodeError):
+            return None
+        user = load_user_by_username(cursor, username)
+        if not user or not self.hasher.verify(password, user['password_hash']):
+            return None
+        self.sessions.set(key, (user['user_id'], user['password_hash']))
+        return {field: user.get(field) for field in USER_FIELDS}
+
+    def handle(self, path, query, headers):
+        """Runs one GET; returns (status, extra headers, body bytes)."""
+        for pattern, endpoint in ROUTES:
+            match = pattern.match(path)
+            if match:
+                break
+        else:
+            raise ApiError(404, "no such endpoint")
+
+        conn = self.pool.get()
+        try:
+            cursor = conn.cursor(dictionary=True)
+            try:
+                viewer = self.authenticate(cursor, headers.get('Authorization'))
+                if viewer is None:
+                    raise ApiError(401, "valid credentials required")
+                result = endpoint(self, cursor, viewer, query, *match.groups())
+            finally:
+                cursor.close()
+        finally:
+            self.pool.put(conn)
+
+        body, last_modified = result if isinstance(result, tuple) else (result, None)
+        data = encode_json(body)
+        response_headers = {'ETag': etag_of(data), 'Cache-Control': 'private, no-cache'}
+        if last_modified is not None:
+            response_headers['Last-Modified'] = formatdate(last_modified, usegmt=True)
+
+        if_none_match = headers.get('If-None-Match')
+        if etag_matches(if_none_match, response_headers['ETag']) or (
+            if_none_match is None and not_modified_since(headers.get('If-Modified-Since'), last_modified)
+        ):
+            return 304, response_headers, b""
+        return 200, response_headers, data
+
+
+class ApiHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "apn-api"
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        try:
+            status, headers, data = self.server.api.handle(url.path, parse_qs(url.query), self.headers)
+        except ApiError as e:
+            status, headers, data = e.status, {}, encode_json({'error': str(e)})
+            if e.status == 401:
+                headers['WWW-Authenticate'] = 'Basic realm="apn"'
+        except (PoolExhausted, HasherBusy) as e:
+            status, headers, data = 503, {'Retry-After': '1'}, encode_json({'error': str(e)})
+        except mysql.connector.Error as e:
+            self.log_error("database error: %s", e)
+            status, headers, data = 500, {}, encode_json({'error': "database error"})
+
+        headers['Vary'] = 'Authorization, Accept-Encoding'
+        if status != 304:
+            headers['Content-Type'] = 'application/json'
+            if len(data) >= GZIP_MIN_BYTES and accepts_gzip(self.headers.get('Accept-Encoding')):
+                data = gzip.compress(data, compresslevel=6)
+                headers['Content-Encoding'] = 'gzip'
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def main():
+    parser = add_connection_args(argparse.ArgumentParser(description=__doc__.splitlines()[0]))
+    parser.add_argument("--bind", default="127.0.0.1", help="Address to listen on")
+    parser.add_argument("--listen-port", type=int, default=8080, help="HTTP port to serve on")
+    parser.add_argument("--pool-size", type=int, default=10)
+    parser.add_argument("--password-workers", type=int, default=2)
+    args = parser.parse_args()
+
+    pool = ConnectionPool(
+        size=args.pool_size, host=args.host, port=args.port, user=args.user, password=args.password, database=args.database
+    )
+    api = Api(pool, PasswordHasher(workers=args.password_workers))
+    server = ThreadingHTTPServer((args.bind, args.listen_port), ApiHandler)
+    server.api = api
+    print(f"Serving the APN API on http://{args.bind}:{args.listen_port}/v1/")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        api.hasher.shutdown()
+
+
+if __name__ == "__main__":
+    main()
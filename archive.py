@@ -0,0 +1,394 @@
+"""Archives old partitions of Applications and UserAuditLog to gzipped CSV files.
+
+Usage: python archive.py [--archive-dir archive] [--dry-run] [--host ... --database ...]
+
+Run it periodically (e.g. nightly from cron). Each run adds the
+partitions the next PARTITIONS_AHEAD periods will need, then exports
+every partition that is entirely older than its table's retention to
+<archive-dir>/<table>/<partition>.csv.gz and drops it. It also prunes the
+connection graph's change log (graph.prune_changes). --dry-run only
+prints what would be done.
+"""
+import argparse
+import csv
+import glob
+import gzip
+import os
+
+import pandas as pd
+
+from db import add_connection_args, connect
+from frames import APPLICATION_STATUS, fetch_frame, frame_from_chunks
+from graph import CHANGE_RETENTION_DAYS, prune_changes
+from paging import STREAM_CHUNK_SIZE
+
+# -----------------------------------------------------------------
+# PARTITION ARCHIVAL
+# -----------------------------------------------------------------
+# Migration 0011 range-partitions both tables by time. A partition
+# whose upper bound is older than the retention period is streamed to a
+# compressed CSV file (written under a temporary name and renamed when
+# complete), checked against the partition's row count, recorded in
+# ArchivedPartitions and dropped. Dropping a partition fires no
+# triggers, so the application rollups (migration 0007) are reduced by
+# the partition's applications in the same transaction that records it.
+# ApplicationKeys is not partitioned and keeps the archived applications'
+# keys, so a student cannot apply again to an archived opportunity.
+#
+# A run interrupted after that commit simply drops the partition on the
+# next run. Rows deleted from a partition between its export and its
+# drop would be subtracted twice; CALL sp_RebuildApplicationRollups()
+# repairs the rollups if that ever happens.
+
+ARCHIVE_DIR = "archive"
+PARTITIONS_AHEAD = 2
+USER_LOOKUP_BATCH = 1000
+ARCHIVE_READ_CHUNK = 100000  # rows per read_csv chunk when reading archived applications
+
+# table -> partitioning column, period ('year' or 'month'), periods kept, export query
+PARTITIONED_TABLES = {
+    'Applications': {
+        'column': 'applied_at',
+        'period': 'year',
+        'retention': 3,
+        'export': """
+            SELECT a.application_id, a.opportunity_id, o.created_by_user_id AS poster_user_id,
+                   a.student_user_id, a.status, a.applied_at
+            FROM Applications PARTITION ({partition}) a
+            LEFT JOIN Opportunities o ON o.opportunity_id = a.opportunity_id
+        """,
+    },
+    'UserAuditLog': {
+        'column': 'log_time',
+        'period': 'month',
+        'retention': 12,
+        'export': """
+            SELECT log_id, user_id, action_performed, log_time
+            FROM UserAuditLog PARTITION ({partition})
+        """,
+    },
+}
+
+ARCHIVED_APPLICATION_DTYPES = {
+    'application_id': 'int32',
+    'opportunity_id': 'int32',
+    'poster_user_id': 'Int32',
+    'student_user_id': 'int32',
+    'status': APPLICATION_STATUS,
+}
+
+
+class ArchiveMismatch(Exception):
+    """Raised when an exported file does not hold every row of its partition."""
+
+
+def period_start(day, period):
+    return day.replace(month=1, day=1) if period == 'year' else day.replace(day=1)
+
+
+def add_periods(day, period, n):
+    if period == 'year':
+        return day.replace(year=day.year + n)
+    months = day.year * 12 + day.month - 1 + n
+    return day.replace(year=months // 12, month=months % 12 + 1)
+
+
+def partition_name(day, period):
+    return f"p{day.year}" if period == 'year' else f"p{day.year}{day.month:02d}"
+
+
+def list_partitions(cursor, table):
+    """[(name, upper bound in Unix seconds or None for MAXVALUE, estimated rows)], oldest first."""
+    cursor.execute(
+        """
+        SELECT PARTITION_NAME, PARTITION_DESCRIPTION, TABLE_ROWS
+        FROM information_schema.PARTITIONS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND PARTITION_NAME IS NOT NULL
+        ORDER BY PARTITION_ORDINAL_POSITION
+        """,
+        (table,)
+    )
+    return [
+        (name, None if bound == 'MAXVALUE' else int(bound), rows)
+        for name, bound, rows in cursor.fetchall()
+    ]
+
+
+def db_timestamp(cursor, day):
+    """day's midnight in Unix seconds, in the session time zone (as the partition bounds are)."""
+    cursor.execute("SELECT UNIX_TIMESTAMP(%s)", (f"{day:%Y-%m-%d} 00:00:00",))
+    return int(cursor.fetchone()[0])
+
+# -----------------------------------------------------------------
+# ADDING PARTITIONS
+# -----------------------------------------------------------------
+
+def planned_partitions(cursor, table, today, ahead=PARTITIONS_AHEAD):
+    """The (name, start, end) partitions to split off pfuture so the next `ahead` periods have their own."""
+    period = PARTITIONED_TABLES[table]['period']
+    bounds = [bound for _, bound, _ in list_partitions(cursor, table) if bound is not None]
+    if not bounds:
+        return []
+    cursor.execute("SELECT DATE(FROM_UNIXTIME(%s))", (max(bounds),))
+    start = cursor.fetchone()[0]
+    last = add_periods(period_start(today, period), period, ahead)
+    planned = []
+    while start <= last:
+        end = add_periods(start, period, 1)
+        planned.append((partition_name(start, period), start, end))
+        start = end
+    return planned
+
+
+def add_partitions(conn, table, today, ahead=PARTITIONS_AHEAD, dry_run=False):
+    cursor = conn.cursor()
+    try:
+        planned = planned_partitions(cursor, table, today, ahead)
+        for name, start, end in planned:
+            print(f"{table}: adding partition {name} ({start} to {end})")
+            if not dry_run:
+                cursor.execute(
+                    f"ALTER TABLE {table} REORGANIZE PARTITION pfuture INTO ("
+                    f"PARTITION `{name}` VALUES LESS THAN (UNIX_TIMESTAMP('{end:%Y-%m-%d} 00:00:00')), "
+                    f"PARTITION pfuture VALUES LESS THAN MAXVALUE)"
+                )
+        return [name for name, _, _ in planned]
+    finally:
+        cursor.close()
+
+# -----------------------------------------------------------------
+# ARCHIVING
+# -----------------------------------------------------------------
+
+def expired_partitions(cursor, table, today):
+    """Partitions that end on or before the retention cutoff."""
+    config = PARTITIONED_TABLES[table]
+    cutoff_day = add_periods(period_start(today, config['period']), config['period'], -config['retention'])
+    cutoff = db_timestamp(cursor, cutoff_day)
+    return [name for name, bound, _ in list_partitions(cursor, table) if bound is not None and bound <= cutoff]
+
+
+def export_partition(conn, table, partition, archive_dir=ARCHIVE_DIR):
+    """Streams one partition to <archive_dir>/<table>/<partition>.csv.gz; returns (path, rows)."""
+    directory = os.path.join(archive_dir, table)
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{partition}.csv.gz")
+    partial = path + ".part"
+
+    cursor = conn.cursor()
+    rows = 0
+    try:
+        # Unbuffered: the partition is streamed, never held in memory
+        cursor.execute(PARTITIONED_TABLES[table]['export'].format(partition=f"`{partition}`"))
+        with gzip.open(partial, 'wt', newline='', encoding='utf-8') as out:
+            writer = csv.writer(out)
+            writer.writerow(cursor.column_names)
+            while True:
+                chunk = cursor.fetchmany(STREAM_CHUNK_SIZE)
+                if not chunk:
+                    break
+                writer.writerows(chunk)
+                rows += len(chunk)
+    finally:
+        cursor.close()
+    os.replace(partial, path)
+    return path, rows
+
+
+def subtract_application_rollups(cursor, partition):
+    """Takes one partition's applications out of the 0007 rollups (before it is dropped)."""
+    source = f"Applications PARTITION (`{partition}`)"
+    cursor.execute(f"""
+        UPDATE StudentApplicationCounts s
+        JOIN (SELECT student_user_id, COUNT(*) AS n FROM {source} GROUP BY student_user_id) a
+          ON a.student_user_id = s.student_user_id
+        SET s.application_count = s.application_count - a.n
+    """)
+    cursor.execute("DELETE FROM StudentApplicationCounts WHERE application_count <= 0")
+    cursor.execute(f"""
+        UPDATE OpportunityApplicantCounts c
+        JOIN (SELECT opportunity_id, COUNT(*) AS n FROM {source} GROUP BY opportunity_id) a
+          ON a.opportunity_id = c.opportunity_id
+        SET c.applicant_count = c.applicant_count - a.n
+    """)
+    cursor.execute(f"""
+        UPDATE PosterApplicants p
+        JOIN (
+            SELECT o.created_by_user_id AS poster_user_id, a.student_user_id, COUNT(*) AS n
+            FROM {source} a
+            JOIN Opportunities o ON o.opportunity_id = a.opportunity_id
+            GROUP BY o.created_by_user_id, a.student_user_id
+        ) a ON a.poster_user_id = p.poster_user_id AND a.student_user_id = p.student_user_id
+        SET p.application_count = p.application_count - a.n
+    """)
+    cursor.execute("DELETE FROM PosterApplicants WHERE application_count <= 0")
+
+
+def archive_partition(conn, table, partition, archive_dir=ARCHIVE_DIR):
+    """Exports, records and drops one partition; returns the rows archived."""
+    cursor = conn.cursor()
+    try:
+        cursor.execute(
+            "SELECT row_count FROM ArchivedPartitions WHERE table_name = %s AND partition_name = %s",
+            (table, partition)
+        )
+        recorded = cursor.fetchone()
+        if recorded is None:
+            path, rows = export_partition(conn, table, partition, archive_dir)
+            cursor.execute(f"SELECT COUNT(*) FROM {table} PARTITION (`{partition}`)")
+            in_table = cursor.fetchone()[0]
+            if in_table != rows:
+                raise ArchiveMismatch(
+                    f"{table}.{partition}: exported {rows} rows but the partition has {in_table}; run again"
+                )
+            if table == 'Applications':
+                subtract_application_rollups(cursor, partition)
+            cursor.execute(
+                "INSERT INTO ArchivedPartitions (table_name, partition_name, row_count, file_path) "
+                "VALUES (%s, %s, %s, %s)",
+                (table, partition, rows, path)
+            )
+            conn.commit()
+        else:
+            rows = recorded[0]
+        cursor.execute(f"ALTER TABLE {table} DROP PARTITION `{partition}`")
+        return rows
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+
+
+def run(conn, archive_dir=ARCHIVE_DIR, ahead=PARTITIONS_AHEAD, dry_run=False):
+    """One maintenance pass over every partitioned table."""
+    cursor = conn.cursor()
+    cursor.execute("SELECT CURDATE()")
+    today = cursor.fetchone()[0]
+    cursor.close()
+
+    for table in PARTITIONED_TABLES:
+        add_partitions(conn, table, today, ahead, dry_run)
+        cursor = conn.cursor()
+        expired = expired_partitions(cursor, table, today)
+        cursor.close()
+        for partition in expired:
+            if dry_run:
+                print(f"{table}: would archive partition {partition}")
+                continue
+            rows = archive_partition(conn, table, partition, archive_dir)
+            print(f"{table}: archived partition {partition} ({rows} rows)")
+
+    if dry_run:
+        print(f"ConnectionEdgeChanges: would prune changes older than {CHANGE_RETENTION_DAYS} days")
+    else:
+        print(f"ConnectionEdgeChanges: pruned {prune_changes(conn)} changes")
+
+# -----------------------------------------------------------------
+# READING ARCHIVED APPLICATIONS
+# -----------------------------------------------------------------
+# The admin rubric reports read the rollups, which only count live
+# applications. These versions add the archived ones from the files;
+# they read whole rollup tables, so they are for occasional use. The
+# files are read in chunks and filtered or counted as they go, so only
+# the matching rows (or one count per student) are ever held in memory.
+
+def _archived_chunks(archive_dir, columns):
+    """The given columns of every archived application, ARCHIVE_READ_CHUNK rows at a time."""
+    dtypes = {column: ARCHIVED_APPLICATION_DTYPES[column] for column in columns if column != 'applied_at'}
+    parse_dates = ['applied_at'] if 'applied_at' in columns else False
+    for path in sorted(glob.glob(os.path.join(archive_dir, 'Applications', '*.csv.gz'))):
+        yield from pd.read_csv(
+            path, usecols=list(columns), dtype=dtypes, parse_dates=parse_dates, chunksize=ARCHIVE_READ_CHUNK
+        )
+
+
+def load_archived_applications(archive_dir=ARCHIVE_DIR, poster_user_id=None, student_user_id=None):
+    """Archived applications to poster_user_id's opportunities and/or by student_user_id, as a DataFrame.
+
+    Empty when nothing matches or nothing is archived.
+    """
+    frames = []
+    for chunk in _archived_chunks(archive_dir, [*ARCHIVED_APPLICATION_DTYPES, 'applied_at']):
+        if poster_user_id is not None:
+            # poster_user_id is NA for opportunities deleted before their partition was archived
+            chunk = chunk[chunk['poster_user_id'].eq(poster_user_id).fillna(False).astype(bool)]
+        if student_user_id is not None:
+            chunk = chunk[chunk['student_user_id'] == student_user_id]
+        if len(chunk):
+            frames.append(chunk)
+    if not frames:
+        return pd.DataFrame({
+            column: pd.Series(dtype=dtype) for column, dtype in ARCHIVED_APPLICATION_DTYPES.items()
+        }).assign(applied_at=pd.Series(dtype='datetime64[ns]'))
+    return pd.concat(frames, ignore_index=True)
+
+
+def _users_frame(cursor, user_ids, columns):
+    """Users rows for user_ids (plain cursor), in user_id order."""
+    def chunks():
+        for start in range(0, len(user_ids), USER_LOOKUP_BATCH):
+            batch = user_ids[start:start + USER_LOOKUP_BATCH]
+            cursor.execute(
+                f"SELECT {', '.join(columns)} FROM Users "
+                f"WHERE user_id IN ({', '.join(['%s'] * len(batch))}) ORDER BY user_id",
+                batch
+            )
+            yield cursor.fetchall()
+    return frame_from_chunks(list(columns), chunks(), {'user_id': 'int32'})
+
+
+def archived_application_counts(archive_dir=ARCHIVE_DIR):
+    """Archived applications per student, as a Series indexed by student_user_id."""
+    counts = pd.Series(dtype='int64')
+    for chunk in _archived_chunks(archive_dir, ['student_user_id']):
+        counts = counts.add(chunk['student_user_id'].value_counts(), fill_value=0)
+    return counts.astype('int64')
+
+
+def applicants_of_poster_with_archive(cursor, poster_user_id, archive_dir=ARCHIVE_DIR):
+    """Students who applied to poster_user_id's opportunities, live or archived (user_id, full_name, email)."""
+    cursor.execute("SELECT student_user_id FROM PosterApplicants WHERE poster_user_id = %s", (poster_user_id,))
+    student_ids = {row[0] for row in cursor.fetchall()}
+    archived = load_archived_applications(archive_dir, poster_user_id=poster_user_id)
+    student_ids.update(int(i) for i in archived['student_user_id'])
+    return _users_frame(cursor, sorted(student_ids), ('user_id', 'full_name', 'email'))
+
+
+def applications_per_student_with_archive(cursor, archived_counts, limit):
+    """The `limit` students with the most applications, live plus archived (user_id, full_name, application_count).
+
+    archived_counts is archived_application_counts(), which callers may cache.
+    """
+    live = fetch_frame(
+        cursor, "SELECT student_user_id, application_count FROM StudentApplicationCounts",
+        dtypes={'student_user_id': 'int32', 'application_count': 'int32'}
+    )
+    counts = live.set_index('student_user_id')['application_count'].add(
+        archived_counts, fill_value=0
+    ).astype('int64')
+    top = (
+        counts.rename('application_count').rename_axis('user_id').reset_index()
+        .sort_values(['application_count', 'user_id'], ascending=False)
+        .head(limit)
+    )
+    names = _users_frame(cursor, sorted(int(i) for i in top['user_id']), ('user_id', 'full_name'))
+    return top.merge(names, on='user_id')[['user_id', 'full_name', 'application_count']]
+
+
+def main():
+    parser = add_connection_args(argparse.ArgumentParser(description=__doc__.splitlines()[0]))
+    parser.add_argument("--archive-dir", default=ARCHIVE_DIR)
+    parser.add_argument("--ahead", type=int, default=PARTITIONS_AHEAD, help="Future periods to keep partitions for")
+    parser.add_argument("--dry-run", action="store_true", help="Print what would be done and change nothing")
+    args = parser.parse_args()
+
+    conn = connect(args, consume_results=True)
+    try:
+        run(conn, args.archive_dir, args.ahead, args.dry_run)
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+import asyncio
+from contextlib import asynccontextmanager
+
+import aiomysql
+
+from db import PoolExhausted
+from paging import PAGE_SIZE
+from queries import (CONNECTION_COUNT_QUERY, CONNECTIONS_PAGER, PENDING_REQUESTS_PAGER, POSTED_OPPORTUNITIES_QUERY,
+                     PROFILE_QUERY, USER_BY_ID_QUERY, USER_BY_USERNAME_QUERY, applicants_query,
+                     connection_statuses_query, group_applicants, open_opportunities_query, order_users,
+                     profile_from_rows, profile_params, statuses_from_rows, users_by_ids_query)
+
+# -----------------------------------------------------------------
+# ASYNC DATA ACCESS
+# -----------------------------------------------------------------
+# The read helpers of queries.py (and the user lookups main.py caches)
+# as coroutines on aiomysql. They run the same statements and shape
+# their rows with the same functions; the sync helpers stay the API of
+# the Streamlit app. Each coroutine borrows its own connection from an
+# AsyncConnectionPool, so independent reads can be awaited together:
+#
+#     async with AsyncConnectionPool(host=..., database=...) as pool:
+#         profile, mutual = await asyncio.gather(
+#             load_profile(pool, user_id, viewer_id),
+#             get_connection_status(pool, viewer_id, user_id),
+#         )
+#
+# Connections run in autocommit mode, so every read sees the latest
+# committed data and nothing is left open when a connection goes back
+# to the pool. Everything here is read-only.
+
+class AsyncConnectionPool:
+    """An aiomysql pool with the checkout timeout of db.ConnectionPool.
+
+    Opened on first use (or with `async with`); must be used from one
+    event loop.
+    """
+
+    def __init__(self, size=10, timeout=5.0, **connect_args):
+        self.size = size
+        self.timeout = timeout
+        # Same keyword as mysql.connector / ConnectionPool
+        if 'database' in connect_args:
+            connect_args['db'] = connect_args.pop('database')
+        connect_args.setdefault('autocommit', True)
+        self.connect_args = connect_args
+        self._pool = None
+
+    async def open(self):
+        if self._pool is None:
+            self._pool = await aiomysql.create_pool(minsize=0, maxsize=self.size, **self.connect_args)
+        return self
+
+    async def close(self):
+        if self._pool is not None:
+            self._pool.close()
+            await self._pool.wait_closed()
+            self._pool = None
+
+    async def __aenter__(self):
+        return await self.open()
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    @asynccontextmanager
+    async def cursor(self):
+        """Borrows a connection for one dictionary cursor, waiting up to `timeout` seconds."""
+        await self.open()
+        try:
+            conn = await asyncio.wait_for(self._pool.acquire(), self.timeout)
+        except asyncio.TimeoutError:
+            raise PoolExhausted(
+                f"No database connection available after {self.timeout}s (pool size {self.size})"
+            ) from None
+        try:
+            async with conn.cursor(aiomysql.DictCursor) as cursor:
+                yield cursor
+        finally:
+            self._pool.release(conn)
+
+    def stats(self):
+        if self._pool is None:
+            return {'size': self.size, 'open': 0, 'idle': 0}
+        return {'size': self.size, 'open': self._pool.size, 'idle': self._pool.freesize}
+
+
+async def fetch_all(pool, sql, params=()):
+    async with pool.cursor() as cursor:
+        await cursor.execute(sql, params)
+        return list(await cursor.fetchall())
+
+
+async def fetch_one(pool, sql, params=()):
+    async with pool.cursor() as cursor:
+        await cursor.execute(sql, params)
+        return await cursor.fetchone()
+
+
+async def fetch_page(pool, pager, params=(), after=None, page_size=None):
+    """KeysetPager.page() for coroutines: (rows, next_after)."""
+    rows = await fetch_all(pool, *pager.page_query(params, after, page_size))
+    return pager.split_page(rows, page_size)
+
+# -----------------------------------------------------------------
+# USERS AND PROFILES
+# -----------------------------------------------------------------
+
+async def fetch_user_by_id(pool, user_id):
+    return await fetch_one(pool, USER_BY_ID_QUERY, (user_id,))
+
+
+async def fetch_user_by_username(pool, username):
+    return await fetch_one(pool, USER_BY_USERNAME_QUERY, (username,))
+
+
+async def fetch_users_by_ids(pool, user_ids):
+    user_ids = list(user_ids)
+    if not user_ids:
+        return []
+    return order_users(await fetch_all(pool, *users_by_ids_query(user_ids)), user_ids)
+
+
+async def load_profile(pool, user_id, viewer_id=None):
+    """Same dict as queries.load_profile() (main.py's get_profile_details)."""
+    rows = await fetch_all(pool, PROFILE_QUERY, profile_params(user_id, viewer_id))
+    return profile_from_rows(rows, user_id, viewer_id)
+
+# -----------------------------------------------------------------
+# CONNECTIONS
+# -----------------------------------------------------------------
+
+async def load_connection_statuses(pool, pairs):
+    pairs = list(dict.fromkeys(pairs))
+    if not pairs:
+        return {}
+    return statuses_from_rows(await fetch_all(pool, *connection_statuses_query(pairs)), pairs)
+
+
+async def get_connection_status(pool, user_id_1, user_id_2):
+    return (await load_connection_statuses(pool, [(user_id_1, user_id_2)]))[(user_id_1, user_id_2)]
+
+
+async def list_connections(pool, user_id, after=None, limit=PAGE_SIZE):
+    return await fetch_page(pool, CONNECTIONS_PAGER, (user_id,), after, limit)
+
+
+async def list_pending_requests(pool, user_id, after=None, limit=PAGE_SIZE):
+    return await fetch_page(pool, PENDING_REQUESTS_PAGER, (user_id,), after, limit)
+
+
+async def connection_count(pool, user_id):
+    row = await fetch_one(pool, CONNECTION_COUNT_QUERY, (user_id,))
+    return row['connection_count'] if row else 0
+
+
+async def load_connections_page(pool, user_id, pending_after=None, connections_after=None, limit=PAGE_SIZE):
+    """Everything the connections page shows, read concurrently.
+
+    Returns {'pending': (rows, next_after), 'connections': (rows, next_after), 'count': n}.
+    """
+    pending, connections, count = await asyncio.gather(
+        list_pending_requests(pool, user_id, pending_after, limit),
+        list_connections(pool, user_id, connections_after, limit),
+        connection_count(pool, user_id),
+    )
+    return {'pending': pending, 'connections': connections, 'count': count}
+
+# -----------------------------------------------------------------
+# OPPORTUNITIES
+# -----------------------------------------------------------------
+
+async def list_open_opportunities(pool, student_user_id, after=None, limit=20, opportunity_ids=None):
+    planned = open_opportunities_query(student_user_id, opportunity_ids)
+    if planned is None:
+        return [], None
+    pager, params = planned
+    return await fetch_page(pool, pager, params, after, limit)
+
+
+async def list_posted_opportunities(pool, user_id):
+    return await fetch_all(pool, POSTED_OPPORTUNITIES_QUERY, (user_id,))
+
+
+async def load_applicants(pool, opportunity_ids):
+    opportunity_ids = list(dict.fromkeys(opportunity_ids))
+    if not opportunity_ids:
+        return {}
+    return group_applicants(await fetch_all(pool, *applicants_query(opportunity_ids)), opportunity_ids)
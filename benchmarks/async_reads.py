@@ -0,0 +1,99 @@
+"""Page reads one after another on mysql.connector vs. gathered on aiomysql.
+
+Usage: python -m benchmarks.async_reads [--samples 200] [--concurrency 50] [--pool-size 10]
+
+Run against a database filled by benchmarks.generate. A "page" is what
+the connections page and a profile view need for one user: pending
+requests, connections, the connection count and a profile. The sync
+case runs the four queries back to back on one connection, as a
+Streamlit rerun without prefetching does; the async case gathers them
+on an AsyncConnectionPool. The concurrent case serves --concurrency
+users at once from the one event loop and reports pages per second.
+"""
+import asyncio
+import random
+import time
+
+import async_queries
+from async_queries import AsyncConnectionPool
+from benchmarks.common import connect, latency_stats, make_parser, report, time_calls
+from benchmarks.suite import sample_ids
+from queries import connection_count, list_connections, list_pending_requests, load_profile
+
+
+def sync_page(cursor, user_id, other_id):
+    list_pending_requests(cursor, user_id)
+    list_connections(cursor, user_id)
+    connection_count(cursor, user_id)
+    load_profile(cursor, other_id, user_id)
+
+
+async def async_page(pool, user_id, other_id):
+    await asyncio.gather(
+        async_queries.list_pending_requests(pool, user_id),
+        async_queries.list_connections(pool, user_id),
+        async_queries.connection_count(pool, user_id),
+        async_queries.load_profile(pool, other_id, user_id),
+    )
+
+
+async def run_async(pool, pairs, concurrency):
+    """Times each page alone, then all of them with `concurrency` in flight."""
+    samples = []
+    for user_id, other_id in pairs:
+        started = time.perf_counter()
+        await async_page(pool, user_id, other_id)
+        samples.append((time.perf_counter() - started) * 1000)
+    results = {'async gather': latency_stats(samples)}
+
+    gate = asyncio.Semaphore(concurrency)
+    loaded = []
+
+    async def one(pair):
+        async with gate:
+            started = time.perf_counter()
+            await async_page(pool, *pair)
+            loaded.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(pair) for pair in pairs))
+    wall = time.perf_counter() - started
+    results[f'async x{concurrency} users'] = {**latency_stats(loaded), 'pages_per_s': len(pairs) / wall}
+    return results
+
+
+async def with_pool(args, pairs):
+    async with AsyncConnectionPool(
+        size=args.pool_size, host=args.host, port=args.port, user=args.user, password=args.password, database=args.database
+    ) as pool:
+        return await run_async(pool, pairs, args.concurrency)
+
+
+def main():
+    parser = make_parser(__doc__.splitlines()[0])
+    parser.add_argument("--samples", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50, help="Pages in flight for the concurrent case")
+    parser.add_argument("--pool-size", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    conn = connect(args, consume_results=True)
+    try:
+        plain = conn.cursor()
+        users = sample_ids(plain, "SELECT user_id FROM Users", args.samples * 2, rng)
+        plain.close()
+        pairs = list(zip(users[:args.samples], users[args.samples:]))
+
+        cursor = conn.cursor(dictionary=True)
+        results = {'sync sequential': time_calls(lambda pair: sync_page(cursor, *pair), pairs)}
+        cursor.close()
+    finally:
+        conn.close()
+
+    results.update(asyncio.run(with_pool(args, pairs)))
+    report(results, args.json)
+
+
+if __name__ == "__main__":
+    main()
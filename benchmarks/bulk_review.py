@@ -0,0 +1,91 @@
+"""Approving applications one click at a time vs. in bulk through sp_ReviewApplications.
+
+Usage: python -m benchmarks.bulk_review [--approvals 1000] [--batch-size 200]
+
+Run against a database filled by benchmarks.generate (with migration
+0010 applied). This APPROVES 2 x --approvals pending applications for
+good, so regenerate the data before running it again. The per-click
+case calls sp_ApproveApplication and commits once per application, as
+the ✅ button does (without the page rerun the app adds on top); the
+bulk case approves the other half --batch-size applications per call
+and commit, grouped by poster as the bulk review form does.
+"""
+import itertools
+import time
+
+from benchmarks.common import connect, latency_stats, make_parser, report, time_calls
+from queries import review_applications
+
+PENDING_QUERY = """
+    SELECT a.application_id, o.created_by_user_id
+    FROM Applications a
+    JOIN Opportunities o ON o.opportunity_id = a.opportunity_id
+    WHERE a.status = 'pending'
+    ORDER BY a.application_id
+    LIMIT %s
+"""
+
+
+def approve_one(conn, cursor, application_id):
+    cursor.callproc('sp_ApproveApplication', (application_id,))
+    conn.commit()
+
+
+def approve_in_bulk(conn, cursor, applications, batch_size):
+    """Returns (per-call latencies, applications changed)."""
+    samples, changed = [], 0
+    by_poster = sorted(applications, key=lambda row: row[1])
+    for poster, rows in itertools.groupby(by_poster, key=lambda row: row[1]):
+        ids = [application_id for application_id, _ in rows]
+        for start in range(0, len(ids), batch_size):
+            started = time.perf_counter()
+            changed += len(review_applications(cursor, poster, ids[start:start + batch_size], 'approved'))
+            conn.commit()
+            samples.append((time.perf_counter() - started) * 1000)
+    return samples, changed
+
+
+def count_projects(cursor):
+    cursor.execute("SELECT COUNT(*) FROM OngoingProjects")
+    return cursor.fetchone()[0]
+
+
+def main():
+    parser = make_parser(__doc__.splitlines()[0])
+    parser.add_argument("--approvals", type=int, default=1000, help="Applications approved by each path")
+    parser.add_argument("--batch-size", type=int, default=200, help="Applications per bulk call")
+    args = parser.parse_args()
+
+    conn = connect(args, consume_results=True)
+    try:
+        cursor = conn.cursor()
+        cursor.execute(PENDING_QUERY, (args.approvals * 2,))
+        pending = cursor.fetchall()
+        if len(pending) < args.approvals * 2:
+            raise SystemExit(f"Need {args.approvals * 2} pending applications, found {len(pending)}")
+        one_by_one, bulk = pending[:args.approvals], pending[args.approvals:]
+        projects_before = count_projects(cursor)
+
+        started = time.perf_counter()
+        results = {'per-click': time_calls(lambda row: approve_one(conn, cursor, row[0]), one_by_one)}
+        results['per-click']['total_s'] = time.perf_counter() - started
+
+        started = time.perf_counter()
+        samples, changed = approve_in_bulk(conn, cursor, bulk, args.batch_size)
+        results[f'bulk x{args.batch_size}'] = {
+            **latency_stats(samples), 'total_s': time.perf_counter() - started, 'approved': changed,
+        }
+
+        # Both paths must create one OngoingProjects row per approval
+        created = count_projects(cursor) - projects_before
+        if created != args.approvals + changed:
+            raise SystemExit(f"Expected {args.approvals + changed} new ongoing projects, found {created}")
+        cursor.close()
+    finally:
+        conn.close()
+
+    report(results, args.json)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+import argparse
+import json
+import statistics
+import time
+
+from db import add_connection_args, connect  # noqa: F401 (re-exported for the benchmarks)
+
+# -----------------------------------------------------------------
+# SHARED BENCHMARK HELPERS
+# -----------------------------------------------------------------
+# Point a benchmark at a scratch database with --host/--database.
+
+def make_parser(description):
+    parser = add_connection_args(argparse.ArgumentParser(description=description))
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    return parser
+
+
+def time_calls(fn, inputs):
+    """Calls fn once per input and returns latency stats in milliseconds."""
+    samples = []
+    for value in inputs:
+        started = time.perf_counter()
+        fn(value)
+        samples.append((time.perf_counter() - started) * 1000)
+    return latency_stats(samples)
+
+
+def latency_stats(samples):
+    """Summarizes latencies in milliseconds (calls, mean, p50, p95, max)."""
+    samples = sorted(samples)
+    return {
+        'calls': len(samples),
+        'mean_ms': statistics.fmean(samples),
+        'p50_ms': samples[len(samples) // 2],
+        'p95_ms': samples[min(len(samples) - 1, int(len(samples) * 0.95))],
+        'max_ms': samples[-1],
+    }
+
+
+def report(results, as_json=False):
+    """Prints {name: stats} either as an aligned table or as JSON."""
+    if as_json:
+        print(json.dumps(results, indent=2, default=str))
+        return
+    for name, stats in results.items():
+        fields = "  ".join(
+            f"{key}={value:.3f}" if isinstance(value, float) else f"{key}={value}"
+            for key, value in stats.items()
+        )
+        print(f"{name:<28} {fields}")
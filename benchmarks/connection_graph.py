@@ -0,0 +1,104 @@
+"""Mutual connections and 2-hop suggestions: SQL self-joins vs. the in-memory ConnectionGraph.
+
+Usage: python -m benchmarks.connection_graph --seed-edges 1000000 [--samples 200]
+
+Seeding adds accepted connections between existing users (seed users
+first, e.g. with benchmarks.user_search) with a power-law degree
+distribution, through the Connections triggers like the app does.
+"""
+import random
+import time
+
+from benchmarks.common import connect, make_parser, report, time_calls
+from graph import ConnectionGraph
+
+MUTUAL_SQL = """
+    SELECT COUNT(*) AS mutual
+    FROM UserConnectionEdges a
+    JOIN UserConnectionEdges b ON b.user_id = %s AND b.other_user_id = a.other_user_id
+    WHERE a.user_id = %s
+"""
+
+SUGGESTIONS_SQL = """
+    SELECT e2.other_user_id AS user_id, COUNT(*) AS mutual
+    FROM UserConnectionEdges e1
+    JOIN UserConnectionEdges e2 ON e2.user_id = e1.other_user_id
+    WHERE e1.user_id = %s
+      AND e2.other_user_id <> %s
+      AND e2.other_user_id NOT IN (SELECT other_user_id FROM UserConnectionEdges WHERE user_id = %s)
+    GROUP BY e2.other_user_id
+    ORDER BY mutual DESC, e2.other_user_id
+    LIMIT 5
+"""
+
+
+def seed_edges(conn, n_edges, alpha=1.1, batch_size=5000):
+    """Inserts about n_edges accepted connections; endpoint i is picked with weight 1 / rank^alpha."""
+    cursor = conn.cursor()
+    cursor.execute("SELECT user_id FROM Users")
+    user_ids = [row[0] for row in cursor.fetchall()]
+    if len(user_ids) < 2:
+        raise SystemExit("Seed users first (e.g. python -m benchmarks.user_search --seed 100000)")
+    rng = random.Random(n_edges)
+    rng.shuffle(user_ids)
+    weights = [1 / (rank + 1) ** alpha for rank in range(len(user_ids))]
+
+    for start in range(0, n_edges, batch_size):
+        count = min(batch_size, n_edges - start)
+        hubs = rng.choices(user_ids, weights=weights, k=count)
+        others = rng.choices(user_ids, k=count)
+        cursor.executemany(
+            "INSERT IGNORE INTO Connections (requester_id, receiver_id, status) VALUES (%s, %s, 'accepted')",
+            [(a, b) for a, b in zip(hubs, others) if a != b]
+        )
+        conn.commit()
+    cursor.close()
+
+
+def main():
+    parser = make_parser(__doc__.splitlines()[0])
+    parser.add_argument("--seed-edges", type=int, default=0, help="Insert this many accepted connections first")
+    parser.add_argument("--samples", type=int, default=200)
+    args = parser.parse_args()
+
+    conn = connect(args)
+    if args.seed_edges:
+        seed_edges(conn, args.seed_edges)
+
+    cursor = conn.cursor(dictionary=True)
+    cursor.execute("SELECT user_id FROM UserConnectionCounts WHERE connection_count > 0")
+    connected = [row['user_id'] for row in cursor.fetchall()]
+    if len(connected) < 2:
+        raise SystemExit("Need accepted connections; run with --seed-edges N")
+
+    graph = ConnectionGraph()
+    started = time.perf_counter()
+    graph.load(cursor)
+    load_ms = (time.perf_counter() - started) * 1000
+
+    rng = random.Random(11)
+    pairs = [tuple(rng.sample(connected, 2)) for _ in range(args.samples)]
+    users = [a for a, _ in pairs]
+
+    def sql_mutual(pair):
+        cursor.execute(MUTUAL_SQL, (pair[1], pair[0]))
+        return cursor.fetchone()
+
+    def sql_suggestions(user_id):
+        cursor.execute(SUGGESTIONS_SQL, (user_id, user_id, user_id))
+        return cursor.fetchall()
+
+    results = {
+        'SQL mutual count': time_calls(sql_mutual, pairs),
+        'graph mutual count': time_calls(lambda p: graph.mutual_count(*p), pairs),
+        'SQL suggestions': time_calls(sql_suggestions, users),
+        'graph suggestions': time_calls(graph.suggestions, users),
+    }
+    results['graph load'] = dict(graph.degree_stats(), load_ms=load_ms)
+    cursor.close()
+    conn.close()
+    report(results, args.json)
+
+
+if __name__ == "__main__":
+    main()
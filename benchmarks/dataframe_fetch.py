@@ -0,0 +1,137 @@
+"""Building a DataFrame of Applications: dict rows + pd.DataFrame vs. frames.fetch_frame().
+
+Usage: python -m benchmarks.dataframe_fetch --seed-applications 1000000 [--repeat 3]
+
+Seeding adds bench students and opportunities and cross-joins them into
+Applications in SQL. Both paths read the same query; seconds is the
+best of --repeat runs, peak_mb the tracemalloc peak of one extra run and
+frame_mb the finished DataFrame's deep memory usage.
+"""
+import time
+import tracemalloc
+
+import pandas as pd
+
+from benchmarks.common import connect, make_parser, report
+from frames import APPLICATION_STATUS, ROLE, fetch_frame
+
+BENCH_PREFIX = "bench_frame_"
+
+APPLICATIONS_SQL = """
+    SELECT a.application_id, a.opportunity_id, a.student_user_id, a.status, u.role
+    FROM Applications a
+    JOIN Users u ON u.user_id = a.student_user_id
+"""
+
+DTYPES = {
+    'application_id': 'int32',
+    'opportunity_id': 'int32',
+    'student_user_id': 'int32',
+    'status': APPLICATION_STATUS,
+    'role': ROLE,
+}
+
+
+def seed(conn, n_applications, per_student=50):
+    """Inserts about n_applications applications (per_student each) for new bench users."""
+    cursor = conn.cursor()
+    n_students = max(1, n_applications // per_student)
+    cursor.execute("SELECT COUNT(*) FROM Users WHERE username LIKE %s", (f"{BENCH_PREFIX}%",))
+    offset = cursor.fetchone()[0]
+    cursor.execute("SELECT COALESCE(MAX(user_id), 0) FROM Users")
+    last_user_id = cursor.fetchone()[0]
+    cursor.execute("SELECT COALESCE(MAX(opportunity_id), 0) FROM Opportunities")
+    last_opportunity_id = cursor.fetchone()[0]
+
+    users = [
+        (f"{BENCH_PREFIX}{i}", f"Frame Bench {i}", f"{BENCH_PREFIX}{i}@example.com", 'faculty' if i == offset else 'student')
+        for i in range(offset, offset + n_students + 1)
+    ]
+    for start in range(0, len(users), 5000):
+        cursor.executemany(
+            "INSERT INTO Users (username, password_hash, full_name, email, role) VALUES (%s, 'x', %s, %s, %s)",
+            users[start:start + 5000]
+        )
+        conn.commit()
+    cursor.execute(
+        "SELECT user_id FROM Users WHERE user_id > %s AND username = %s", (last_user_id, f"{BENCH_PREFIX}{offset}")
+    )
+    poster_id = cursor.fetchone()[0]
+    cursor.executemany(
+        "INSERT INTO Opportunities (created_by_user_id, title, description) VALUES (%s, %s, 'Seeded opportunity')",
+        [(poster_id, f"Frame bench opportunity {k}") for k in range(per_student)]
+    )
+    conn.commit()
+
+    # Every bench student applies to every bench opportunity, in one statement
+    cursor.execute(
+        """
+        INSERT INTO Applications (opportunity_id, student_user_id, status)
+        SELECT o.opportunity_id, u.user_id, ELT(1 + (o.opportunity_id + u.user_id) % 3, 'pending', 'approved', 'rejected')
+        FROM Users u
+        CROSS JOIN Opportunities o
+        WHERE u.user_id > %s AND u.role = 'student' AND u.username LIKE %s
+          AND o.opportunity_id > %s AND o.created_by_user_id = %s
+        """,
+        (last_user_id, f"{BENCH_PREFIX}%", last_opportunity_id, poster_id)
+    )
+    conn.commit()
+    cursor.close()
+
+
+def dict_rows_frame(conn):
+    """The current path: dictionary cursor, fetchall(), pd.DataFrame(list of dicts)."""
+    cursor = conn.cursor(dictionary=True)
+    cursor.execute(APPLICATIONS_SQL)
+    frame = pd.DataFrame(cursor.fetchall())
+    cursor.close()
+    return frame
+
+
+def columnar_frame(conn):
+    cursor = conn.cursor()
+    frame = fetch_frame(cursor, APPLICATIONS_SQL, dtypes=DTYPES)
+    cursor.close()
+    return frame
+
+
+def measure(fn, conn, repeat):
+    # Timed runs without tracemalloc (it slows allocation down), then one traced run
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(conn)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    tracemalloc.start()
+    frame = fn(conn)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {
+        'rows': len(frame),
+        'seconds': best,
+        'peak_mb': peak / 2 ** 20,
+        'frame_mb': frame.memory_usage(deep=True).sum() / 2 ** 20,
+    }
+
+
+def main():
+    parser = make_parser(__doc__.splitlines()[0])
+    parser.add_argument("--seed-applications", type=int, default=0, help="Insert about this many applications first")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    conn = connect(args)
+    if args.seed_applications:
+        seed(conn, args.seed_applications)
+
+    results = {
+        'dict rows -> DataFrame': measure(dict_rows_frame, conn, args.repeat),
+        'fetch_frame (columnar)': measure(columnar_frame, conn, args.repeat),
+    }
+    conn.close()
+    report(results, args.json)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,247 @@
+"""Fills every table of the APN schema with deterministic synthetic data.
+
+Usage: python -m benchmarks.generate --scale 100k [--seed 42] [--avg-degree 10]
+
+Run it against an empty scratch database (apn.sql + migrate.py). The same
+--scale and --seed always produce the same rows:
+
+- Users: 85% students, 8% alumni, the rest faculty plus a few admins,
+  with 0-5 skills (common skills far more common), 0-2 projects and
+  0-2 experience entries. Every password is "password", hashed at a low
+  cost that the app upgrades on first login.
+- Opportunities: one per 20 users, posted by faculty/alumni with a
+  power-law spread of activity; 80% are open.
+- Applications: each student applies to a geometric number of
+  opportunities (mean --apps-per-student), picked by Zipf popularity;
+  10% are rejected and 5% approved through tr_AfterApplicationApproved,
+  which fills OngoingProjects.
+- Connections: power-law degree with mean --avg-degree; 80% accepted,
+  15% pending, 5% rejected.
+
+UserAuditLog and the trigger-maintained tables (connection edges, rollups)
+fill themselves.
+"""
+import itertools
+import random
+import time
+
+import bcrypt
+
+from benchmarks.common import connect, make_parser, report
+from benchmarks.user_search import FIRST_NAMES, LAST_NAMES, SKILLS
+from import_users import load_batch
+
+SCALES = {'10k': 10_000, '100k': 100_000, '1m': 1_000_000}
+USER_PREFIX = "gen_"
+BATCH_SIZE = 5000
+
+TOPICS = ["neural networks", "distributed systems", "genomics", "climate modelling", "computer vision",
+          "quantum computing", "human-computer interaction", "natural language processing", "robotics",
+          "database systems", "security", "econometrics", "materials science", "signal processing"]
+COMPANIES = ["Infosys", "Google", "Siemens", "TCS", "Microsoft", "Bosch", "Flipkart", "IBM", "Zoho", "Intel"]
+
+
+def zipf_weights(n, alpha=1.1):
+    """Cumulative weights for picking rank i with probability ~ 1 / (i + 1)^alpha."""
+    return list(itertools.accumulate(1 / (rank + 1) ** alpha for rank in range(n)))
+
+
+def timed(name, stats, rows, started):
+    elapsed = time.perf_counter() - started
+    stats[name] = {'rows': rows, 'seconds': elapsed, 'rows_per_s': rows / max(elapsed, 1e-9)}
+    print(f"{name}: {rows} rows in {elapsed:.1f}s")
+
+
+# -----------------------------------------------------------------
+# USERS AND PROFILES
+# -----------------------------------------------------------------
+
+def user_record(rng, i, password_hash, skill_weights):
+    roll = rng.random()
+    role = 'student' if roll < 0.85 else 'alumni' if roll < 0.93 else 'faculty' if roll < 0.999 else 'admin'
+    if i == 0:
+        role = 'admin'
+    skills = set(rng.choices(SKILLS, cum_weights=skill_weights, k=rng.randint(0, 5)))
+    topic = rng.choice(TOPICS)
+    return {
+        'username': f"{USER_PREFIX}{i}",
+        'password_hash': password_hash,
+        'full_name': f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+        'email': f"{USER_PREFIX}{i}@example.edu",
+        'role': role,
+        'graduation_year': rng.randint(2005, 2030) if role in ('student', 'alumni') else None,
+        'bio': f"Working on {topic} and {rng.choice(SKILLS)}.",
+        'skills': sorted(skills),
+        'projects': [
+            {
+                'project_title': f"{rng.choice(TOPICS).title()} project {k + 1}",
+                'project_description': f"A study of {topic} using {rng.choice(SKILLS)}.",
+                'start_date': f"{rng.randint(2018, 2024)}-0{rng.randint(1, 9)}-01",
+                'end_date': None,
+            }
+            for k in range(rng.randint(0, 2))
+        ],
+        'experience': [
+            {
+                'company_name': rng.choice(COMPANIES),
+                'role_title': rng.choice(["Intern", "Research Assistant", "Engineer", "Teaching Assistant"]),
+                'description': f"Worked on {rng.choice(TOPICS)}.",
+                'start_date': f"{rng.randint(2015, 2024)}-0{rng.randint(1, 9)}-01",
+                'end_date': None,
+            }
+            for _ in range(rng.randint(0, 2))
+        ],
+    }
+
+
+def generate_users(conn, rng, n_users, stats):
+    started = time.perf_counter()
+    password_hash = bcrypt.hashpw(b"password", bcrypt.gensalt(4)).decode('utf-8')
+    skill_weights = zipf_weights(len(SKILLS))
+    for start in range(0, n_users, BATCH_SIZE):
+        batch = [user_record(rng, i, password_hash, skill_weights) for i in range(start, min(start + BATCH_SIZE, n_users))]
+        load_batch(conn, batch)
+    timed('users', stats, n_users, started)
+
+    cursor = conn.cursor()
+    cursor.execute("SELECT user_id, role FROM Users WHERE username LIKE %s ORDER BY user_id", (f"{USER_PREFIX}%",))
+    users = cursor.fetchall()
+    cursor.close()
+    return users
+
+
+# -----------------------------------------------------------------
+# OPPORTUNITIES AND APPLICATIONS
+# -----------------------------------------------------------------
+
+def generate_opportunities(conn, rng, posters, n_opportunities, stats):
+    started = time.perf_counter()
+    cursor = conn.cursor()
+    rng.shuffle(posters)
+    weights = zipf_weights(len(posters))
+    for start in range(0, n_opportunities, BATCH_SIZE):
+        count = min(BATCH_SIZE, n_opportunities - start)
+        cursor.executemany(
+            "INSERT INTO Opportunities (created_by_user_id, title, description, status) VALUES (%s, %s, %s, %s)",
+            [
+                (
+                    poster,
+                    f"{rng.choice(['Research', 'Project', 'Internship', 'Thesis'])} in {rng.choice(TOPICS)}",
+                    f"Looking for students with {rng.choice(SKILLS)} and {rng.choice(SKILLS)} to work on {rng.choice(TOPICS)}.",
+                    'open' if rng.random() < 0.8 else 'closed',
+                )
+                for poster in rng.choices(posters, cum_weights=weights, k=count)
+            ]
+        )
+        conn.commit()
+    cursor.execute("SELECT opportunity_id FROM Opportunities ORDER BY opportunity_id")
+    opportunity_ids = [row[0] for row in cursor.fetchall()]
+    cursor.close()
+    timed('opportunities', stats, n_opportunities, started)
+    return opportunity_ids
+
+
+def generate_applications(conn, rng, students, opportunity_ids, mean_apps, stats):
+    started = time.perf_counter()
+    cursor = conn.cursor()
+    popularity = list(opportunity_ids)
+    rng.shuffle(popularity)
+    weights = zipf_weights(len(popularity))
+    rows, total = [], 0
+
+    def flush():
+        cursor.executemany(
+            "INSERT IGNORE INTO Applications (opportunity_id, student_user_id, status) VALUES (%s, %s, %s)", rows
+        )
+        conn.commit()
+
+    for student in students:
+        fan_out = min(int(rng.expovariate(1 / mean_apps)), len(popularity))
+        for opportunity_id in set(rng.choices(popularity, cum_weights=weights, k=fan_out)):
+            rows.append((opportunity_id, student, 'rejected' if rng.random() < 0.1 else 'pending'))
+        if len(rows) >= BATCH_SIZE:
+            total += len(rows)
+            flush()
+            rows = []
+    if rows:
+        total += len(rows)
+        flush()
+    timed('applications', stats, total, started)
+
+    # Approve one in twenty pending applications through the app's trigger
+    started = time.perf_counter()
+    cursor.execute("SELECT COALESCE(MAX(application_id), 0) FROM Applications")
+    last_id = cursor.fetchone()[0]
+    approved = 0
+    for low in range(0, last_id, 50000):
+        cursor.execute(
+            "UPDATE Applications SET status = 'approved' "
+            "WHERE application_id > %s AND application_id <= %s AND status = 'pending' AND MOD(application_id, 20) = 0",
+            (low, low + 50000)
+        )
+        approved += cursor.rowcount
+        conn.commit()
+    cursor.close()
+    timed('approvals', stats, approved, started)
+
+
+# -----------------------------------------------------------------
+# CONNECTIONS
+# -----------------------------------------------------------------
+
+def generate_connections(conn, rng, user_ids, avg_degree, stats):
+    started = time.perf_counter()
+    cursor = conn.cursor()
+    ranked = list(user_ids)
+    rng.shuffle(ranked)
+    weights = zipf_weights(len(ranked))
+    n_requests = len(ranked) * avg_degree // 2
+    for start in range(0, n_requests, BATCH_SIZE):
+        count = min(BATCH_SIZE, n_requests - start)
+        hubs = rng.choices(ranked, cum_weights=weights, k=count)
+        others = rng.choices(ranked, k=count)
+        cursor.executemany(
+            "INSERT IGNORE INTO Connections (requester_id, receiver_id, status) VALUES (%s, %s, %s)",
+            [
+                (a, b, 'accepted' if roll < 0.8 else 'pending' if roll < 0.95 else 'rejected')
+                for a, b, roll in zip(others, hubs, (rng.random() for _ in range(count)))
+                if a != b
+            ]
+        )
+        conn.commit()
+    cursor.close()
+    timed('connections', stats, n_requests, started)
+
+
+def generate(conn, n_users, seed=42, avg_degree=10, apps_per_student=3):
+    """Generates a full dataset; returns {table: {rows, seconds, rows_per_s}}."""
+    rng = random.Random(seed)
+    stats = {}
+    users = generate_users(conn, rng, n_users, stats)
+    students = [user_id for user_id, role in users if role == 'student']
+    posters = [user_id for user_id, role in users if role in ('faculty', 'alumni')]
+    opportunity_ids = generate_opportunities(conn, rng, posters, max(1, n_users // 20), stats)
+    generate_applications(conn, rng, students, opportunity_ids, apps_per_student, stats)
+    generate_connections(conn, rng, [user_id for user_id, _ in users], avg_degree, stats)
+    return stats
+
+
+def main():
+    parser = make_parser(__doc__.splitlines()[0])
+    parser.add_argument("--scale", default="10k", help=f"One of {', '.join(SCALES)} or a number of users")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--avg-degree", type=int, default=10, help="Mean connections (of any status) per user")
+    parser.add_argument("--apps-per-student", type=float, default=3, help="Mean applications per student")
+    args = parser.parse_args()
+
+    n_users = SCALES.get(args.scale.lower()) or int(args.scale)
+    conn = connect(args)
+    try:
+        stats = generate(conn, n_users, args.seed, args.avg_degree, args.apps_per_student)
+    finally:
+        conn.close()
+    report(stats, args.json)
+
+
+if __name__ == "__main__":
+    main()
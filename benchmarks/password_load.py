@@ -0,0 +1,81 @@
+"""Login storm: bcrypt on the request threads vs. the bounded PasswordHasher pool.
+
+Usage: python -m benchmarks.password_load [--logins 200] [--concurrency 50] [--rounds 12]
+
+No database needed. Each simulated login verifies one password; the
+report shows per-login latency, throughput, rejected logins and the
+pool's own hash/queue-wait metrics.
+"""
+import argparse
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import bcrypt
+
+from passwords import HasherBusy, PasswordHasher
+
+
+def storm(verify, logins, concurrency):
+    latencies, rejected = [], 0
+    lock = threading.Lock()
+
+    def login(_):
+        nonlocal rejected
+        started = time.perf_counter()
+        try:
+            verify()
+        except HasherBusy:
+            with lock:
+                rejected += 1
+            return
+        with lock:
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as threads:
+        list(threads.map(login, range(logins)))
+    wall = time.perf_counter() - started
+    latencies.sort()
+    return {
+        'logins': logins,
+        'rejected': rejected,
+        'logins_per_s': len(latencies) / wall,
+        'p50_ms': latencies[len(latencies) // 2] if latencies else 0.0,
+        'p95_ms': latencies[int(len(latencies) * 0.95)] if latencies else 0.0,
+        'max_ms': latencies[-1] if latencies else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50, help="Simultaneous login requests")
+    parser.add_argument("--rounds", type=int, default=12)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--max-queue", type=int, default=32)
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    password = "correct horse battery staple"
+    hashed = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(args.rounds))
+
+    results = {
+        'inline bcrypt': storm(lambda: bcrypt.checkpw(password.encode('utf-8'), hashed), args.logins, args.concurrency),
+    }
+    hasher = PasswordHasher(workers=args.workers, max_queue=args.max_queue, rounds=args.rounds)
+    hasher.verify(password, hashed.decode('utf-8'))  # start the worker processes outside the timing
+    results['PasswordHasher pool'] = storm(lambda: hasher.verify(password, hashed.decode('utf-8')), args.logins, args.concurrency)
+    results['pool metrics'] = hasher.stats()
+    hasher.shutdown()
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        for name, stats in results.items():
+            print(f"{name}: {json.dumps(stats)}")
+
+
+if __name__ == "__main__":
+    main()
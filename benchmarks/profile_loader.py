@@ -0,0 +1,87 @@
+"""Per-profile latency: four sequential SELECTs + status call vs. load_profile().
+
+Usage: python -m benchmarks.profile_loader [--seed 1000] [--samples 500]
+"""
+import random
+
+from benchmarks.common import connect, make_parser, report, time_calls
+from queries import load_profile
+
+BENCH_PREFIX = "bench_profile_"
+
+
+def seed(conn, n_users, per_section=5):
+    """Inserts n_users synthetic users with a few rows in every profile section."""
+    cursor = conn.cursor()
+    # Continue numbering after any earlier seed run so usernames stay unique
+    cursor.execute("SELECT COUNT(*) FROM Users WHERE username LIKE %s", (f"{BENCH_PREFIX}%",))
+    offset = cursor.fetchone()[0]
+    cursor.execute("SELECT COALESCE(MAX(user_id), 0) FROM Users")
+    last_id = cursor.fetchone()[0]
+    cursor.executemany(
+        "INSERT INTO Users (username, password_hash, full_name, email, role, graduation_year, bio) "
+        "VALUES (%s, 'x', %s, %s, 'student', 2025, %s)",
+        [
+            (f"{BENCH_PREFIX}{i}", f"Bench User {i}", f"{BENCH_PREFIX}{i}@example.com", "Seeded for benchmarks.")
+            for i in range(offset, offset + n_users)
+        ]
+    )
+    conn.commit()
+    cursor.execute("SELECT user_id FROM Users WHERE user_id > %s AND username LIKE %s", (last_id, f"{BENCH_PREFIX}%"))
+    user_ids = [row[0] for row in cursor.fetchall()]
+    for table, sql in (
+        ('Skills', "INSERT INTO Skills (user_id, skill_name) VALUES (%s, %s)"),
+        ('Projects', "INSERT INTO Projects (user_id, project_title, project_description) VALUES (%s, %s, 'Seeded project')"),
+        ('Experience', "INSERT INTO Experience (user_id, company_name, role_title) VALUES (%s, %s, 'Intern')"),
+    ):
+        cursor.executemany(sql, [(uid, f"{table} {k}") for uid in user_ids for k in range(per_section)])
+        conn.commit()
+    cursor.close()
+
+
+def legacy_profile(cursor, user_id, viewer_id):
+    """The original get_profile_details() + get_connection_status() path."""
+    details = {}
+    cursor.execute("SELECT user_id, full_name, email, role, graduation_year, bio FROM Users WHERE user_id = %s", (user_id,))
+    details['user'] = cursor.fetchone()
+    cursor.execute("SELECT skill_id, skill_name FROM Skills WHERE user_id = %s", (user_id,))
+    details['skills'] = cursor.fetchall()
+    cursor.execute("SELECT project_id, project_title, project_description, start_date, end_date FROM Projects WHERE user_id = %s", (user_id,))
+    details['projects'] = cursor.fetchall()
+    cursor.execute("SELECT experience_id, company_name, role_title, description, start_date, end_date FROM Experience WHERE user_id = %s", (user_id,))
+    details['experience'] = cursor.fetchall()
+    cursor.execute("SELECT fn_GetConnectionStatus(%s, %s) AS status", (viewer_id, user_id))
+    details['connection_status'] = cursor.fetchone()['status']
+    return details
+
+
+def main():
+    parser = make_parser(__doc__.splitlines()[0])
+    parser.add_argument("--seed", type=int, default=0, help="Insert this many synthetic users first")
+    parser.add_argument("--samples", type=int, default=500)
+    args = parser.parse_args()
+
+    conn = connect(args)
+    if args.seed:
+        seed(conn, args.seed)
+
+    cursor = conn.cursor(dictionary=True)
+    cursor.execute("SELECT user_id FROM Users")
+    user_ids = [row['user_id'] for row in cursor.fetchall()]
+    if len(user_ids) < 2:
+        raise SystemExit("Need at least two users; run with --seed N")
+
+    rng = random.Random(42)
+    pairs = [tuple(rng.sample(user_ids, 2)) for _ in range(args.samples)]
+
+    results = {
+        'legacy (5 queries)': time_calls(lambda p: legacy_profile(cursor, p[0], p[1]), pairs),
+        'load_profile (1 query)': time_calls(lambda p: load_profile(cursor, p[0], p[1]), pairs),
+    }
+    cursor.close()
+    conn.close()
+    report(results, args.json)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+"""End-to-end latency of the app's queries and helpers, as JSON for regression tracking.
+
+Usage: python -m benchmarks.suite [--samples 200] [--output results.json] [--compare baseline.json]
+
+Run against a database filled by benchmarks.generate. Every case calls
+the same helper main.py uses, with users, terms and page cursors picked
+deterministically from the data. --output writes the results with the
+table sizes they were measured at; --compare prints each case's p50
+against an earlier file and exits non-zero when one got slower than
+--tolerance.
+"""
+import json
+import platform
+import random
+import sys
+import time
+
+from benchmarks.common import connect, make_parser, report, time_calls
+from benchmarks.user_search import FIRST_NAMES, LAST_NAMES, SKILLS
+from queries import (applicants_of_poster_frame, applications_per_student_frame, connection_count,
+                     list_connections, list_open_opportunities, list_pending_requests, load_connection_statuses,
+                     load_profile, posted_opportunities_frame)
+from search import NameIndex, search_users
+
+COUNTED_TABLES = ("Users", "Skills", "Projects", "Experience", "Connections", "Opportunities",
+                  "Applications", "OngoingProjects", "UserAuditLog")
+
+
+def table_sizes(cursor):
+    sizes = {}
+    for table in COUNTED_TABLES:
+        cursor.execute(f"SELECT COUNT(*) FROM {table}")
+        sizes[table] = cursor.fetchone()[0]
+    return sizes
+
+
+def sample_ids(cursor, sql, n, rng):
+    cursor.execute(sql)
+    ids = [row[0] for row in cursor.fetchall()]
+    if not ids:
+        raise SystemExit(f"No rows for: {sql.strip()} (fill the database with benchmarks.generate first)")
+    return [rng.choice(ids) for _ in range(n)]
+
+
+def run_cases(conn, samples, seed=7):
+    """Times every case; returns {case: latency stats}."""
+    rng = random.Random(seed)
+    plain = conn.cursor()
+    users = sample_ids(plain, "SELECT user_id FROM Users", samples * 2, rng)
+    pairs = list(zip(users[:samples], users[samples:]))
+    students = sample_ids(plain, "SELECT user_id FROM Users WHERE role = 'student'", samples, rng)
+    posters = sample_ids(plain, "SELECT DISTINCT created_by_user_id FROM Opportunities", samples, rng)
+    # Keyset cursors for deep pages: a random opportunity_id to list below
+    opportunity_cursors = sample_ids(plain, "SELECT opportunity_id FROM Opportunities WHERE status = 'open'", samples, rng)
+    terms = [rng.choice(FIRST_NAMES + LAST_NAMES + SKILLS) for _ in range(samples)]
+
+    cursor = conn.cursor(dictionary=True)
+    name_index = NameIndex()
+    name_index.refresh(cursor)
+
+    cases = {
+        'load_profile': lambda p: load_profile(cursor, p[0], p[1]),
+        'fetch_user_by_id': lambda u: (cursor.execute("SELECT * FROM Users WHERE user_id = %s", (u,)), cursor.fetchone()),
+        'connection statuses (20 pairs)': lambda p: load_connection_statuses(
+            cursor, [(p[0], other) for other in users[:20]]
+        ),
+        'list_pending_requests': lambda u: list_pending_requests(cursor, u),
+        'list_connections': lambda u: list_connections(cursor, u),
+        'connection_count': lambda u: connection_count(cursor, u),
+        'search_users (fulltext)': lambda t: search_users(cursor, t, 0),
+        'search_users (2 chars, NameIndex)': lambda t: search_users(cursor, t[:2], 0, name_index=name_index),
+        'list_open_opportunities (first page)': lambda s: list_open_opportunities(cursor, s),
+        'list_open_opportunities (deep page)': lambda c: list_open_opportunities(cursor, students[0], after=c),
+        'posted_opportunities_frame': lambda u: posted_opportunities_frame(plain, u),
+        'rubric: applicants of poster': lambda u: applicants_of_poster_frame(plain, u),
+        'rubric: applications per student': lambda _: applications_per_student_frame(plain),
+    }
+    inputs = {
+        'load_profile': pairs,
+        'fetch_user_by_id': users[:samples],
+        'connection statuses (20 pairs)': pairs,
+        'list_pending_requests': users[:samples],
+        'list_connections': users[:samples],
+        'connection_count': users[:samples],
+        'search_users (fulltext)': terms,
+        'search_users (2 chars, NameIndex)': terms,
+        'list_open_opportunities (first page)': students,
+        'list_open_opportunities (deep page)': opportunity_cursors,
+        'posted_opportunities_frame': posters,
+        'rubric: applicants of poster': posters,
+        'rubric: applications per student': range(samples),
+    }
+    results = {}
+    for name, fn in cases.items():
+        results[name] = time_calls(fn, inputs[name])
+        conn.rollback()  # don't let one case's snapshot carry into the next
+    cursor.close()
+    plain.close()
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """Prints p50 changes against a baseline run; returns the names of regressed cases."""
+    regressed = []
+    for name, stats in results.items():
+        before = baseline['results'].get(name)
+        if not before:
+            print(f"{name:<40} new")
+            continue
+        change = stats['p50_ms'] / max(before['p50_ms'], 1e-9) - 1
+        flag = "REGRESSION" if change > tolerance else ""
+        print(f"{name:<40} {before['p50_ms']:8.3f} -> {stats['p50_ms']:8.3f} ms  {change:+7.1%}  {flag}")
+        if flag:
+            regressed.append(name)
+    return regressed
+
+
+def main():
+    parser = make_parser(__doc__.splitlines()[0])
+    parser.add_argument("--samples", type=int, default=200)
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    parser.add_argument("--compare", help="A JSON file from an earlier --output run")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed p50 slowdown for --compare (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    # Some helpers read a single row with fetchone(); let the next query discard the rest
+    conn = connect(args, consume_results=True)
+    try:
+        cursor = conn.cursor()
+        sizes = table_sizes(cursor)
+        cursor.execute("SELECT VERSION()")
+        mysql_version = cursor.fetchone()[0]
+        cursor.close()
+        results = run_cases(conn, args.samples)
+    finally:
+        conn.close()
+
+    run = {
+        'timestamp': time.strftime("%Y-%m-%dT%H:%M:%S"),
+        'mysql_version': mysql_version,
+        'python_version': platform.python_version(),
+        'samples': args.samples,
+        'table_sizes': sizes,
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(run, f, indent=2)
+    if args.json:
+        print(json.dumps(run, indent=2))
+    else:
+        report(results)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if baseline.get('table_sizes') != sizes:
+            print("note: the baseline was measured on different table sizes")
+        if compare(results, baseline, args.tolerance):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""Find Users latency: legacy LIKE '%term%' scan vs. FULLTEXT search vs. in-process NameIndex.
+
+Usage: python -m benchmarks.user_search --seed 100000 [--samples 200]
+       python -m benchmarks.user_search --seed 900000   # tops the table up to 1M
+"""
+import random
+import time
+
+from benchmarks.common import connect, make_parser, report, time_calls
+from search import NameIndex, search_users
+
+BENCH_PREFIX = "bench_search_"
+FIRST_NAMES = ["Aarav", "Priya", "Rohan", "Ananya", "Vikram", "Meera", "Arjun", "Kavya", "Ishaan", "Diya",
+               "Liam", "Emma", "Noah", "Olivia", "Lucas", "Sofia", "Mateo", "Chloe", "Ethan", "Zara"]
+LAST_NAMES = ["Sharma", "Iyer", "Reddy", "Nair", "Patel", "Gupta", "Menon", "Rao", "Kapoor", "Bose",
+              "Smith", "Garcia", "Chen", "Kim", "Müller", "Rossi", "Silva", "Novak", "Cohen", "Khan"]
+SKILLS = ["python", "machine learning", "databases", "react", "statistics", "robotics", "embedded c",
+          "data visualization", "cloud computing", "cryptography", "compilers", "bioinformatics"]
+
+
+def seed(conn, n_users, batch_size=5000):
+    """Inserts n_users users with random names, a short bio and two skills each."""
+    rng = random.Random(n_users)
+    cursor = conn.cursor()
+    cursor.execute("SELECT COUNT(*) FROM Users WHERE username LIKE %s", (f"{BENCH_PREFIX}%",))
+    offset = cursor.fetchone()[0]
+    for start in range(offset, offset + n_users, batch_size):
+        stop = min(start + batch_size, offset + n_users)
+        cursor.execute("SELECT COALESCE(MAX(user_id), 0) FROM Users")
+        last_id = cursor.fetchone()[0]
+        cursor.executemany(
+            "INSERT INTO Users (username, password_hash, full_name, email, role, graduation_year, bio) "
+            "VALUES (%s, 'x', %s, %s, 'student', 2025, %s)",
+            [
+                (
+                    f"{BENCH_PREFIX}{i}",
+                    f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+                    f"{BENCH_PREFIX}{i}@example.com",
+                    f"Interested in {rng.choice(SKILLS)} and {rng.choice(SKILLS)}.",
+                )
+                for i in range(start, stop)
+            ]
+        )
+        cursor.execute("SELECT user_id FROM Users WHERE user_id > %s", (last_id,))
+        new_ids = [row[0] for row in cursor.fetchall()]
+        cursor.executemany(
+            "INSERT INTO Skills (user_id, skill_name) VALUES (%s, %s)",
+            [(uid, skill) for uid in new_ids for skill in rng.sample(SKILLS, 2)]
+        )
+        conn.commit()
+    cursor.close()
+
+
+def legacy_search(cursor, term, exclude_user_id):
+    """The original show_find_users() query: unanchored LIKE, no LIMIT."""
+    cursor.execute(
+        "SELECT user_id, full_name, role, email FROM Users WHERE full_name LIKE %s AND user_id != %s",
+        (f"%{term}%", exclude_user_id)
+    )
+    return cursor.fetchall()
+
+
+def main():
+    parser = make_parser(__doc__.splitlines()[0])
+    parser.add_argument("--seed", type=int, default=0, help="Insert this many synthetic users first")
+    parser.add_argument("--samples", type=int, default=200)
+    args = parser.parse_args()
+
+    conn = connect(args)
+    if args.seed:
+        seed(conn, args.seed)
+
+    cursor = conn.cursor(dictionary=True)
+    cursor.execute("SELECT COUNT(*) AS n FROM Users")
+    n_users = cursor.fetchone()['n']
+
+    rng = random.Random(7)
+    full_terms = [rng.choice(FIRST_NAMES + LAST_NAMES + SKILLS) for _ in range(args.samples)]
+    short_terms = [term[:2] for term in full_terms]
+
+    index = NameIndex()
+    started = time.perf_counter()
+    index.refresh(cursor)
+    build_ms = (time.perf_counter() - started) * 1000
+
+    results = {
+        'legacy LIKE %term%': time_calls(lambda t: legacy_search(cursor, t, 0), full_terms),
+        'FULLTEXT search_users': time_calls(lambda t: search_users(cursor, t, 0), full_terms),
+        'prefix LIKE (2 chars)': time_calls(lambda t: search_users(cursor, t, 0), short_terms),
+        'NameIndex (2 chars)': time_calls(lambda t: search_users(cursor, t, 0, name_index=index), short_terms),
+    }
+    results['NameIndex build'] = {'users': n_users, 'build_ms': build_ms}
+    cursor.close()
+    conn.close()
+    report(results, args.json)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+import threading
+import time
+from collections import OrderedDict
+
+# -----------------------------------------------------------------
+# SHARED READ CACHE
+# -----------------------------------------------------------------
+# A per-process cache shared by every Streamlit session. Entries expire
+# after their TTL, the least recently used ones are evicted past
+# max_entries, and the write paths in main.py invalidate what they
+# change so a session always sees its own writes. Other server
+# processes only see a change once their copy expires, so keep TTLs
+# short for anything users edit.
+#
+# Keys are tuples whose first element names the kind of data, e.g.
+# ('user_id', 42) or ('profile', 42, 7); invalidate_prefix() drops every
+# key that starts with the given elements.
+
+_MISSING = object()
+
+
+class TTLCache:
+    def __init__(self, max_entries=10000, default_ttl=60):
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self._entries = OrderedDict()   # key -> (expires_at, value), oldest use first
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'expirations': 0, 'invalidations': 0}
+
+    def get(self, key, default=None):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key, _MISSING)
+            if entry is _MISSING:
+                self._stats['misses'] += 1
+                return default
+            expires_at, value = entry
+            if expires_at <= now:
+                del self._entries[key]
+                self._stats['expirations'] += 1
+                self._stats['misses'] += 1
+                return default
+            self._entries.move_to_end(key)
+            self._stats['hits'] += 1
+            return value
+
+    def set(self, key, value, ttl=None):
+        expires_at = time.monotonic() + (self.default_ttl if ttl is None else ttl)
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats['evictions'] += 1
+
+    def get_or_load(self, key, loader, ttl=None):
+        """Returns the cached value for key, calling loader() on a miss.
+
+        None results are not cached: they usually mean "not found" or
+        "database unavailable", and both should be retried.
+        """
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = loader()
+            if value is not None:
+                self.set(key, value, ttl)
+        return value
+
+    def invalidate(self, *keys):
+        with self._lock:
+            for key in keys:
+                if self._entries.pop(key, _MISSING) is not _MISSING:
+                    self._stats['invalidations'] += 1
+
+    def invalidate_prefix(self, *prefix):
+        """Drops every key whose leading elements equal prefix."""
+        n = len(prefix)
+        with self._lock:
+            stale = [key for key in self._entries if key[:n] == prefix]
+            for key in stale:
+                del self._entries[key]
+            self._stats['invalidations'] += len(stale)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            snapshot = dict(self._stats, entries=len(self._entries), max_entries=self.max_entries)
+        lookups = snapshot['hits'] + snapshot['misses']
+        snapshot['hit_rate'] = snapshot['hits'] / lookups if lookups else 0.0
+        return snapshot
@@ -0,0 +1,364 @@
+import itertools
+import os
+import socket
+import threading
+import time
+from collections import deque
+
+import mysql.connector
+
+# -----------------------------------------------------------------
+# COMMAND-LINE CONNECTIONS
+# -----------------------------------------------------------------
+# Used by the scripts that run outside Streamlit (migrations, checks,
+# benchmarks). Defaults match the DB settings in main.py.
+
+def add_connection_args(parser):
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=3306)
+    parser.add_argument("--user", default="root")
+    parser.add_argument("--password", default="")
+    parser.add_argument("--database", default="apn_db")
+    return parser
+
+
+def connect(args, **extra):
+    return mysql.connector.connect(
+        host=args.host,
+        port=args.port,
+        user=args.user,
+        password=args.password,
+        database=args.database,
+        **extra
+    )
+
+# -----------------------------------------------------------------
+# CONNECTION POOL
+# -----------------------------------------------------------------
+
+class PoolExhausted(Exception):
+    """Raised when no connection frees up within the checkout timeout."""
+
+
+class ReplicaReadFailed(Exception):
+    """Raised when a replica fails part-way through a read; retry it on the primary."""
+
+
+class ConnectionPool:
+    """A thread-safe pool of MySQL connections shared by every session.
+
+    Connections are opened lazily up to `size`. Borrowers wait up to
+    `timeout` seconds for one to be returned, and idle connections are
+    pinged before being handed out so a dropped socket is replaced
+    instead of surfacing as a query error.
+    """
+
+    def __init__(self, size=10, timeout=5.0, health_check=True, **connect_args):
+        self.size = size
+        self.timeout = timeout
+        self.health_check = health_check
+        # A reused connection must not carry a half-read result into the
+        # next borrower's first query.
+        connect_args.setdefault('consume_results', True)
+        self.connect_args = connect_args
+
+        self._idle = deque()
+        self._open = 0
+        self._cond = threading.Condition()
+        self._stats = {
+            'checkouts': 0,
+            'waits': 0,
+            'wait_time': 0.0,
+            'exhausted': 0,
+            'created': 0,
+            'discarded': 0,
+        }
+
+    def _connect(self):
+        conn = mysql.connector.connect(**self.connect_args)
+        with self._cond:
+            self._stats['created'] += 1
+        return conn
+
+    def _is_healthy(self, conn):
+        try:
+            return conn.is_connected()
+        except mysql.connector.Error:
+            return False
+
+    def _discard(self, conn):
+        try:
+            conn.close()
+        except mysql.connector.Error:
+            pass
+        with self._cond:
+            self._open -= 1
+            self._stats['discarded'] += 1
+            self._cond.notify()
+
+    def get(self):
+        """Borrows a connection, waiting up to `timeout` seconds for one."""
+        deadline = time.monotonic() + self.timeout
+        waited = False
+        with self._cond:
+            while not self._idle and self._open >= self.size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._stats['exhausted'] += 1
+                    raise PoolExhausted(
+                        f"No database connection available after {self.timeout}s "
+                        f"(pool size {self.size})"
+                    )
+                if not waited:
+                    waited = True
+                    self._stats['waits'] += 1
+                    wait_started = time.monotonic()
+                self._cond.wait(remaining)
+            if waited:
+                self._stats['wait_time'] += time.monotonic() - wait_started
+            self._stats['checkouts'] += 1
+            if self._idle:
+                conn = self._idle.pop()
+            else:
+                conn = None
+                self._open += 1
+
+        if conn is not None:
+            if not self.health_check or self._is_healthy(conn):
+                return conn
+            # Stale socket: drop it but keep the slot for its replacement
+            try:
+                conn.close()
+            except mysql.connector.Error:
+                pass
+            with self._cond:
+                self._stats['discarded'] += 1
+
+        try:
+            return self._connect()
+        except mysql.connector.Error:
+            with self._cond:
+                self._open -= 1
+                self._cond.notify()
+            raise
+
+    def put(self, conn):
+        """Returns a borrowed connection, rolling back any open transaction."""
+        try:
+            # A SELECT leaves a read snapshot open when autocommit is off, so
+            # reset it here or the next borrower would see stale data.
+            if conn.in_transaction:
+                conn.rollback()
+        except mysql.connector.Error:
+            self._discard(conn)
+            return
+        with self._cond:
+            self._idle.append(conn)
+            self._cond.notify()
+
+    def stats(self):
+        """Returns a snapshot of the pool counters."""
+        with self._cond:
+            snapshot = dict(self._stats)
+            snapshot['size'] = self.size
+            snapshot['open'] = self._open
+            snapshot['idle'] = len(self._idle)
+            snapshot['in_use'] = self._open - len(self._idle)
+        return snapshot
+
+    def close(self):
+        """Closes every idle connection."""
+        with self._cond:
+            idle, self._idle = list(self._idle), deque()
+            self._open -= len(idle)
+        for conn in idle:
+            try:
+                conn.close()
+            except mysql.connector.Error:
+                pass
+
+# -----------------------------------------------------------------
+# READ REPLICAS
+# -----------------------------------------------------------------
+# A ReplicaSet sends writes to the primary pool and lets read-only work
+# use replica pools. Replication progress is measured with a heartbeat
+# (migration 0009): every check_interval the set bumps a sequence number
+# in its own ReplicationHeartbeat row on the primary and reads back, on
+# each replica, which sequence number that replica has applied. A
+# replica that has applied heartbeat N has applied every transaction
+# committed before heartbeat N was written.
+#
+# Read-your-writes: after committing, a session asks for write_token().
+# The token is a heartbeat number that is only written after the
+# commit, so a replica that has reached it is guaranteed to show the
+# write; reads carrying the token go to the primary until some replica
+# has. Replicas that stop answering, or fall more than max_lag seconds
+# behind, get no reads until a later check finds them healthy again.
+#
+# The heartbeat row outlives the process: a restarted server (same
+# hostname and pid, as in a container) carries on from the row's seq
+# instead of counting up from 0 again, which would make a replica
+# still showing the old, higher seq look caught up.
+
+HEARTBEAT_WRITE = (
+    "INSERT INTO ReplicationHeartbeat (source, seq, beat_at) VALUES (%s, %s, NOW(6)) "
+    "ON DUPLICATE KEY UPDATE seq = VALUES(seq), beat_at = VALUES(beat_at)"
+)
+HEARTBEAT_QUERY = "SELECT seq FROM ReplicationHeartbeat WHERE source = %s"
+
+
+class ReplicaSet:
+    """Routes reads to caught-up replicas and everything else to the primary."""
+
+    def __init__(self, primary, replicas=(), max_lag=5.0, check_interval=0.5, source=None):
+        self.primary = primary
+        self.replicas = list(replicas)
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        # One heartbeat row per process, so several app servers can share a primary
+        self.source = source or f"{socket.gethostname()}:{os.getpid()}"
+
+        self._lock = threading.Lock()
+        self._seq = 0                      # last heartbeat committed on the primary
+        self._resumed = False              # _seq picked up from the primary's row yet?
+        self._written = {}                 # heartbeat -> time.monotonic() it was committed
+        self._latest_token = 0             # highest token handed out by this process
+        self._state = [
+            {'healthy': False, 'applied': 0, 'lag': None, 'error': None, 'reads': 0}
+            for _ in self.replicas
+        ]
+        self._primary_reads = 0
+        self._round_robin = itertools.count()
+        self._stop = threading.Event()
+        self._thread = None
+
+    # --- Routing ---
+
+    def write_token(self):
+        """Call after a commit: reads carrying this token will see it."""
+        with self._lock:
+            # Heartbeat _seq + 1 may already be on its way to the primary,
+            # written before this commit; _seq + 2 is only written after.
+            token = self._seq + 2
+            self._latest_token = max(self._latest_token, token)
+            return token
+
+    def latest_token(self):
+        """A token covering every write this process has reported (for shared caches)."""
+        with self._lock:
+            return self._latest_token
+
+    def read_pool(self, token=0):
+        """A replica pool that has applied heartbeat `token`, or the primary if none has."""
+        with self._lock:
+            ready = [
+                i for i, state in enumerate(self._state)
+                if state['healthy'] and state['applied'] >= (token or 0)
+            ]
+            if not ready:
+                self._primary_reads += 1
+                return self.primary
+            i = ready[next(self._round_robin) % len(ready)]
+            self._state[i]['reads'] += 1
+            return self.replicas[i]
+
+    def mark_failed(self, pool, error):
+        """Stops routing reads to a replica that just failed, until its next good check."""
+        with self._lock:
+            for replica, state in zip(self.replicas, self._state):
+                if replica is pool:
+                    state['healthy'] = False
+                    state['error'] = str(error)
+
+    # --- Heartbeat ---
+
+    def _resume(self, cursor):
+        """Continues from the seq a previous process with this source left on the primary."""
+        cursor.execute(HEARTBEAT_QUERY, (self.source,))
+        row = cursor.fetchone()
+        with self._lock:
+            self._seq = max(self._seq, row[0] if row else 0)
+            self._resumed = True
+
+    def _beat(self):
+        conn = self.primary.get()
+        try:
+            cursor = conn.cursor()
+            if not self._resumed:
+                self._resume(cursor)
+            seq = self._seq + 1
+            cursor.execute(HEARTBEAT_WRITE, (self.source, seq))
+            conn.commit()
+            cursor.close()
+        finally:
+            self.primary.put(conn)
+        with self._lock:
+            self._seq = seq
+            self._written[seq] = time.monotonic()
+            # Keep enough history to time the slowest replica we still accept
+            for old in [n for n in self._written if n < seq - 10 - self.max_lag / max(self.check_interval, 0.01)]:
+                del self._written[old]
+
+    def _check(self, i):
+        replica = self.replicas[i]
+        try:
+            conn = replica.get()
+            try:
+                cursor = conn.cursor()
+                cursor.execute(HEARTBEAT_QUERY, (self.source,))
+                row = cursor.fetchone()
+                cursor.close()
+            finally:
+                replica.put(conn)
+        except (mysql.connector.Error, PoolExhausted) as e:
+            with self._lock:
+                self._state[i].update(healthy=False, error=str(e))
+            return
+        applied = row[0] if row else 0
+        with self._lock:
+            written_at = self._written.get(applied + 1)
+            # Lag: how long ago the first heartbeat this replica is missing was written
+            lag = 0.0 if applied >= self._seq else (
+                time.monotonic() - written_at if written_at is not None else float('inf')
+            )
+            self._state[i].update(applied=applied, lag=lag, healthy=lag <= self.max_lag, error=None)
+
+    def check(self):
+        """One heartbeat: writes to the primary, then reads every replica's progress."""
+        self._beat()
+        for i in range(len(self.replicas)):
+            self._check(i)
+
+    def start(self):
+        """Starts the heartbeat thread (nothing to do without replicas)."""
+        if self.replicas and self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="replica-heartbeat", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _run(self):
+        while not self._stop.wait(self.check_interval):
+            try:
+                self.check()
+            except (mysql.connector.Error, PoolExhausted) as e:
+                # Primary unreachable: without fresh heartbeats no replica can
+                # prove it is caught up, so reads fall back to the primary too.
+                with self._lock:
+                    for state in self._state:
+                        state.update(healthy=False, error=f"heartbeat failed: {e}")
+
+    def stats(self):
+        with self._lock:
+            return {
+                'heartbeat': self._seq,
+                'primary_reads': self._primary_reads,
+                'replicas': [
+                    dict(state, host=replica.connect_args.get('host'), port=replica.connect_args.get('port'))
+                    for replica, state in zip(self.replicas, self._state)
+                ],
+            }
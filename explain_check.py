@@ -0,0 +1,118 @@
+"""EXPLAINs every query the app runs and fails if one has no index to use.
+
+Usage: python explain_check.py [--host ... --database ...]
+
+A table access is flagged when EXPLAIN reports a full table scan
+(type = ALL), whether or not it lists possible_keys, unless the query
+names that table as allowed to scan. The optimizer also picks full
+scans of tiny tables, so run it against a seeded database (see
+benchmarks.generate), where the plans match production.
+
+Keep APP_QUERIES in step with main.py when adding or changing queries.
+"""
+import argparse
+import sys
+
+from api import OPPORTUNITY_QUERY
+from db import HEARTBEAT_QUERY, add_connection_args, connect
+from feed import PENDING_EVENTS_QUERY, PULL_ACTORS_QUERY, TIMELINE_PAGER, pulled_events_query
+from graph import CHANGES_SINCE_QUERY, EDGES_QUERY, LAST_CHANGE_QUERY, PRUNE_CUTOFF_QUERY
+from queries import (APPLICANTS_OF_POSTER_PAGER, APPLICATIONS_PER_STUDENT_PAGER, APPLIED_OPPORTUNITIES_QUERY,
+                     CONNECTION_COUNT_QUERY, CONNECTIONS_PAGER, DELETE_OPPORTUNITY_QUERY, FACULTY_LIST_QUERY,
+                     MENTOR_PROJECTS_QUERY, PENDING_REQUESTS_PAGER, POSTED_OPPORTUNITIES_QUERY, PROFILE_ITEM_IDS,
+                     PROFILE_QUERY, REJECT_APPLICATION_QUERY, SET_CONNECTION_STATUS_QUERY,
+                     SET_OPPORTUNITY_STATUS_QUERY, STUDENT_PROJECTS_QUERY, UPDATE_BIO_QUERY, USER_BY_ID_QUERY,
+                     USER_BY_USERNAME_QUERY, applicants_query, connection_statuses_query, delete_profile_item_query,
+                     open_opportunities_query, profiles_query, users_by_ids_query)
+from recommend import CHANGED_OPPORTUNITY_TEXT_QUERY, OPPORTUNITY_TEXT_QUERY, PROFILE_TEXT_QUERY
+from search import NAME_INDEX_QUERY, PREFIX_SEARCH_QUERY, SEARCH_QUERY, search_query
+
+# (name, sql, params, tables allowed to scan). Sample parameter values
+# don't need to exist; EXPLAIN only needs valid types.
+APP_QUERIES = [
+    ("fetch_user_by_username", USER_BY_USERNAME_QUERY, ("someone",), ()),
+    ("fetch_user_by_id", USER_BY_ID_QUERY, (1,), ()),
+    ("fetch_users_by_ids", *users_by_ids_query([2, 3, 4]), ()),
+    ("load_profile", PROFILE_QUERY, (1, 2, 2, 2, 2), ()),
+    ("load_profiles", *profiles_query([2, 3, 4], 1), ()),
+    ("load_connection_statuses", *connection_statuses_query([(1, 2), (1, 3)]), ()),
+    ("list_student_projects", STUDENT_PROJECTS_QUERY, (1,), ()),
+    ("list_mentor_projects", MENTOR_PROJECTS_QUERY, (1,), ()),
+    ("list_posted_opportunities", POSTED_OPPORTUNITIES_QUERY, (1,), ()),
+    ("list_open_opportunities", *open_opportunities_query(1)[0].page_query([1], after=1000, page_size=20), ()),
+    ("applied_opportunity_ids", APPLIED_OPPORTUNITIES_QUERY, (1,), ()),
+    ("load_applicants", *applicants_query([1, 2, 3]), ()),
+    ("search_users", SEARCH_QUERY, {'q': "ann*", 'exclude': 1, 'limit': 21, 'offset': 0}, ()),
+    ("search_users: short terms", search_query(["li"])[0],
+     {'q': "wang*", 'exclude': 1, 'limit': 21, 'offset': 0, **search_query(["li"])[1]}, ()),
+    ("search_users: prefix", PREFIX_SEARCH_QUERY, ("an%", 1, 21, 0), ()),
+    ("NameIndex.refresh", NAME_INDEX_QUERY, (0, 10000), ()),
+    ("student_terms", PROFILE_TEXT_QUERY, (2, 1, 1), ()),
+    ("OpportunityRecommender.refresh", CHANGED_OPPORTUNITY_TEXT_QUERY, ("2025-01-01 00:00:00",), ()),
+    # Indexes every opportunity once per process.
+    ("OpportunityRecommender.refresh: first load", OPPORTUNITY_TEXT_QUERY, (), ("Opportunities",)),
+    ("profile: update bio", UPDATE_BIO_QUERY, ("", 1), ()),
+    *((f"profile: delete from {table}", delete_profile_item_query(table), (1, 1), ()) for table in PROFILE_ITEM_IDS),
+    ("opportunity: close", SET_OPPORTUNITY_STATUS_QUERY, ("closed", 1), ()),
+    ("opportunity: delete", DELETE_OPPORTUNITY_QUERY, (1,), ()),
+    ("application: reject", REJECT_APPLICATION_QUERY, (1,), ()),
+    ("list_pending_requests", PENDING_REQUESTS_PAGER.page_sql(), (1, 0, 51), ()),
+    ("connections: accept", SET_CONNECTION_STATUS_QUERY, ("accepted", 1, 2), ()),
+    ("list_connections", CONNECTIONS_PAGER.page_sql(), (1, 0, 51), ()),
+    ("connection_count", CONNECTION_COUNT_QUERY, (1,), ()),
+    ("ConnectionGraph.refresh", CHANGES_SINCE_QUERY, (0,), ()),
+    ("graph: prune cutoff", PRUNE_CUTOFF_QUERY, (7,), ()),
+    ("ConnectionGraph.load: watermark", LAST_CHANGE_QUERY, (), ()),
+    # Loads the whole graph once per process.
+    ("ConnectionGraph.load", EDGES_QUERY, (), ("UserConnectionEdges",)),
+    ("rubric: faculty list", FACULTY_LIST_QUERY, (), ()),
+    ("rubric: applicants of faculty", APPLICANTS_OF_POSTER_PAGER.page_sql(), (1, 0, 51), ()),
+    ("rubric: applications per student", APPLICATIONS_PER_STUDENT_PAGER.page_sql(), (10, 1, 51), ()),
+    ("load_feed", TIMELINE_PAGER.page_sql(), (1, 1000, 21), ()),
+    ("load_feed: pull actors", PULL_ACTORS_QUERY, (1,), ()),
+    ("load_feed: pulled events", *pulled_events_query([1, 2], after=1000), ()),
+    ("fan_out_pending", PENDING_EVENTS_QUERY, (200,), ()),
+    ("api: opportunity", OPPORTUNITY_QUERY, (1,), ()),
+    ("ReplicaSet heartbeat", HEARTBEAT_QUERY, ("app:1",), ()),
+]
+
+
+def full_scans(cursor, sql, params, allowed=()):
+    """Returns the EXPLAIN rows that are full table scans of tables not in allowed."""
+    cursor.execute("EXPLAIN " + sql, params)
+    flagged = []
+    for row in cursor.fetchall():
+        table = row.get('table') or ''
+        if table.startswith('<') or table in allowed:
+            continue  # derived/union temp tables, or an expected scan
+        if row.get('type') == 'ALL':
+            flagged.append(row)
+    return flagged
+
+
+def main():
+    parser = add_connection_args(argparse.ArgumentParser(description=__doc__.splitlines()[0]))
+    args = parser.parse_args()
+
+    conn = connect(args)
+    cursor = conn.cursor(dictionary=True)
+    failures = 0
+    for name, sql, params, allowed in APP_QUERIES:
+        flagged = full_scans(cursor, sql, params, allowed)
+        if flagged:
+            failures += 1
+            tables = ", ".join(row['table'] for row in flagged)
+            print(f"FAIL  {name}: full scan of {tables}")
+        else:
+            print(f"ok    {name}")
+    cursor.close()
+    conn.rollback()
+    conn.close()
+
+    if failures:
+        print(f"{failures} of {len(APP_QUERIES)} queries fall back to a full table scan.")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,283 @@
+"""Fans out pending activity-feed events (normally done by the app's own worker thread).
+
+Usage: python feed.py [--once] [--interval 1.0] [--host ... --database ...]
+
+Useful when several app servers share one database and you would rather
+run a single dedicated worker, or to drain a backlog after a bulk load.
+"""
+import argparse
+import threading
+import time
+
+from db import add_connection_args, connect
+from paging import KeysetPager
+
+# -----------------------------------------------------------------
+# ACTIVITY FEED
+# -----------------------------------------------------------------
+# Triggers (migration 0008) append events to FeedEvents as part of the
+# writes that cause them, so the app's write paths only pay for one
+# extra row. fan_out_pending() later copies each event into the UserFeed
+# timeline of everyone who should see it (fan-out on write), which makes
+# reading a feed a single primary-key range scan of UserFeed.
+#
+# An actor with more than FANOUT_DEGREE_LIMIT connections would turn
+# every event into that many rows, so their events are marked 'pull'
+# and delivered only to the event's target; their connections' feed
+# reads merge those events in from FeedEvents (fan-out on read).
+#
+# Only one worker fans out at a time: each round holds a MySQL named
+# lock, so every app server can run a FeedWorker safely.
+
+FEED_PAGE_SIZE = 20
+FANOUT_DEGREE_LIMIT = 1000
+FANOUT_BATCH_SIZE = 200
+FANOUT_INTERVAL = 1.0   # seconds between rounds when there is nothing to do
+FANOUT_LOCK = "apn_feed_fanout"
+
+FEED_COLUMNS = """
+    f.event_id, f.event_type, f.created_at, f.actor_user_id, a.full_name AS actor_name,
+    f.target_user_id, t.full_name AS target_name, f.opportunity_id, o.title AS opportunity_title
+"""
+FEED_JOINS = """
+    JOIN Users a ON a.user_id = f.actor_user_id
+    LEFT JOIN Users t ON t.user_id = f.target_user_id
+    LEFT JOIN Opportunities o ON o.opportunity_id = f.opportunity_id
+"""
+
+TIMELINE_PAGER = KeysetPager(
+    f"""
+    SELECT {FEED_COLUMNS}
+    FROM UserFeed uf
+    JOIN FeedEvents f ON f.event_id = uf.event_id
+    {FEED_JOINS}
+    WHERE uf.user_id = %s AND {{keyset}}
+    """,
+    [('uf.event_id', 'event_id')],
+    descending=True,
+    page_size=FEED_PAGE_SIZE
+)
+
+PULLED_EVENTS_PAGER = KeysetPager(
+    f"""
+    SELECT {FEED_COLUMNS}
+    FROM FeedEvents f
+    {FEED_JOINS}
+    WHERE f.actor_user_id = %s AND f.delivery = 'pull' AND {{keyset}}
+    """,
+    [('f.event_id', 'event_id')],
+    descending=True,
+    page_size=FEED_PAGE_SIZE
+)
+
+PULL_ACTORS_QUERY = """
+    SELECT e.other_user_id
+    FROM UserConnectionEdges e
+    JOIN FeedPullActors p ON p.user_id = e.other_user_id
+    WHERE e.user_id = %s
+"""
+
+# -----------------------------------------------------------------
+# READING
+# -----------------------------------------------------------------
+
+def pulled_events_query(actor_ids, after=None, limit=FEED_PAGE_SIZE):
+    """One page of several actors' 'pull' events: a UNION ALL of one index range per actor."""
+    parts, params = [], []
+    for actor_id in actor_ids:
+        sql, part_params = PULLED_EVENTS_PAGER.page_query((actor_id,), after, limit)
+        parts.append(f"({sql})")
+        params.extend(part_params)
+    return " UNION ALL ".join(parts) + " ORDER BY event_id DESC LIMIT %s", params + [limit + 1]
+
+
+def load_feed(cursor, user_id, after=None, limit=FEED_PAGE_SIZE):
+    """Fetches one page of a user's feed, newest first, as (rows, next_after).
+
+    Rows have event_type, created_at, the actor and target (ids and
+    names) and the opportunity (id and title) where there is one.
+    """
+    cursor.execute(*TIMELINE_PAGER.page_query((user_id,), after, limit))
+    rows = cursor.fetchall()
+
+    cursor.execute(PULL_ACTORS_QUERY, (user_id,))
+    actor_ids = [row['other_user_id'] for row in cursor.fetchall()]
+    if actor_ids:
+        # Both sources fetched limit + 1 rows below the same key, so the
+        # merged top limit + 1 are exactly the next rows of the feed.
+        cursor.execute(*pulled_events_query(actor_ids, after, limit))
+        merged = {row['event_id']: row for row in rows}
+        merged.update((row['event_id'], row) for row in cursor.fetchall())
+        rows = sorted(merged.values(), key=lambda row: row['event_id'], reverse=True)
+    return TIMELINE_PAGER.split_page(rows, limit)
+
+# -----------------------------------------------------------------
+# FAN-OUT
+# -----------------------------------------------------------------
+
+PENDING_EVENTS_QUERY = """
+    SELECT f.event_id, f.actor_user_id, COALESCE(c.connection_count, 0)
+    FROM FeedEvents f
+    LEFT JOIN UserConnectionCounts c ON c.user_id = f.actor_user_id
+    WHERE f.delivery = 'pending'
+    ORDER BY f.event_id
+    LIMIT %s
+"""
+
+
+def fan_out_pending(conn, batch_size=FANOUT_BATCH_SIZE, degree_limit=FANOUT_DEGREE_LIMIT):
+    """Delivers up to batch_size pending events in one transaction.
+
+    Returns (events delivered, UserFeed rows written). The caller must
+    hold FANOUT_LOCK.
+    """
+    cursor = conn.cursor()
+    try:
+        cursor.execute(PENDING_EVENTS_QUERY, (batch_size,))
+        events = cursor.fetchall()
+        if not events:
+            conn.rollback()
+            return 0, 0
+
+        push = [event_id for event_id, _, degree in events if degree <= degree_limit]
+        pull = [event_id for event_id, _, degree in events if degree > degree_limit]
+        every = ", ".join(["%s"] * len(events))
+        written = 0
+
+        cursor.execute(
+            f"INSERT IGNORE INTO UserFeed(user_id, event_id) "
+            f"SELECT target_user_id, event_id FROM FeedEvents "
+            f"WHERE event_id IN ({every}) AND target_user_id IS NOT NULL",
+            [event_id for event_id, _, _ in events]
+        )
+        written += cursor.rowcount
+        if push:
+            placeholders = ", ".join(["%s"] * len(push))
+            cursor.execute(
+                f"INSERT IGNORE INTO UserFeed(user_id, event_id) "
+                f"SELECT e.other_user_id, f.event_id FROM FeedEvents f "
+                f"JOIN UserConnectionEdges e ON e.user_id = f.actor_user_id "
+                f"WHERE f.event_id IN ({placeholders})",
+                push
+            )
+            written += cursor.rowcount
+            cursor.execute(f"UPDATE FeedEvents SET delivery = 'push' WHERE event_id IN ({placeholders})", push)
+        if pull:
+            placeholders = ", ".join(["%s"] * len(pull))
+            cursor.execute(f"UPDATE FeedEvents SET delivery = 'pull' WHERE event_id IN ({placeholders})", pull)
+            cursor.executemany(
+                "INSERT IGNORE INTO FeedPullActors(user_id) VALUES (%s)",
+                [(actor,) for actor in {actor for event_id, actor, degree in events if degree > degree_limit}]
+            )
+        conn.commit()
+        return len(events), written
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+
+
+def drain(conn, batch_size=FANOUT_BATCH_SIZE, degree_limit=FANOUT_DEGREE_LIMIT):
+    """Fans out every pending event if no other worker is; returns (events, rows)."""
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT GET_LOCK(%s, 0)", (FANOUT_LOCK,))
+        if not cursor.fetchone()[0]:
+            return 0, 0
+        try:
+            events = rows = 0
+            while True:
+                delivered, written = fan_out_pending(conn, batch_size, degree_limit)
+                events += delivered
+                rows += written
+                if delivered < batch_size:
+                    return events, rows
+        finally:
+            cursor.execute("SELECT RELEASE_LOCK(%s)", (FANOUT_LOCK,))
+            cursor.fetchone()
+    finally:
+        cursor.close()
+
+
+class FeedWorker:
+    """Background thread that drains pending feed events on a pooled connection."""
+
+    def __init__(self, pool, interval=FANOUT_INTERVAL, batch_size=FANOUT_BATCH_SIZE,
+                 degree_limit=FANOUT_DEGREE_LIMIT):
+        self.pool = pool
+        self.interval = interval
+        self.batch_size = batch_size
+        self.degree_limit = degree_limit
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._stats = {'rounds': 0, 'events': 0, 'rows': 0, 'errors': 0, 'last_error': None, 'last_round_ms': 0.0}
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="feed-fanout", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def run_once(self):
+        """One round: borrows a connection and drains what is pending."""
+        started = time.perf_counter()
+        conn = self.pool.get()
+        try:
+            events, rows = drain(conn, self.batch_size, self.degree_limit)
+        finally:
+            self.pool.put(conn)
+        with self._lock:
+            self._stats['rounds'] += 1
+            self._stats['events'] += events
+            self._stats['rows'] += rows
+            self._stats['last_round_ms'] = (time.perf_counter() - started) * 1000
+        return events
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.run_once()
+            except Exception as e:
+                # Database trouble or a bad event: try again next round, the
+                # events stay pending. Anything else escaping would end the thread.
+                with self._lock:
+                    self._stats['errors'] += 1
+                    self._stats['last_error'] = f"{type(e).__name__}: {e}"
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats, running=self._thread is not None and self._thread.is_alive())
+
+
+def main():
+    parser = add_connection_args(argparse.ArgumentParser(description=__doc__.splitlines()[0]))
+    parser.add_argument("--once", action="store_true", help="Drain what is pending and exit")
+    parser.add_argument("--interval", type=float, default=FANOUT_INTERVAL)
+    parser.add_argument("--batch-size", type=int, default=FANOUT_BATCH_SIZE)
+    parser.add_argument("--degree-limit", type=int, default=FANOUT_DEGREE_LIMIT)
+    args = parser.parse_args()
+
+    conn = connect(args, consume_results=True)
+    try:
+        while True:
+            events, rows = drain(conn, args.batch_size, args.degree_limit)
+            if events or args.once:
+                print(f"Delivered {events} events ({rows} feed rows).")
+            if args.once:
+                return
+            time.sleep(args.interval)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+import numpy as np
+import pandas as pd
+
+from paging import STREAM_CHUNK_SIZE
+
+# -----------------------------------------------------------------
+# COLUMNAR DATAFRAME FETCH
+# -----------------------------------------------------------------
+# Builds DataFrames straight from a plain (tuple) cursor: each chunk of
+# rows is transposed into columns, converted to a typed NumPy array and
+# the chunks are concatenated at the end. No per-row dicts are created,
+# enum columns are stored as small integer category codes instead of one
+# Python string per row, and ids are int32.
+#
+# Pass a cursor from conn.cursor() / db_cursor(dictionary=False); rows
+# from a dictionary cursor are not supported.
+
+# The ENUMs from apn.sql
+ROLE = pd.CategoricalDtype(['student', 'faculty', 'alumni', 'admin'])
+OPPORTUNITY_STATUS = pd.CategoricalDtype(['open', 'closed'])
+APPLICATION_STATUS = pd.CategoricalDtype(['pending', 'approved', 'rejected'])
+CONNECTION_STATUS = pd.CategoricalDtype(['pending', 'accepted', 'rejected'])
+
+
+def _code_lookup(dtype):
+    return {value: code for code, value in enumerate(dtype.categories)}
+
+
+def _convert(values, dtype, lookup):
+    """Turns one chunk of one column into an array (category codes for categoricals)."""
+    if lookup is not None:
+        # Unknown values and NULL become -1, i.e. NaN in the Categorical
+        return np.fromiter((lookup.get(v, -1) for v in values), dtype=np.int8, count=len(values))
+    if dtype is None:
+        return np.array(values, dtype=object)
+    return np.array(values, dtype=dtype)
+
+
+def _finish(chunks, dtype):
+    if not chunks:
+        values = np.empty(0, dtype=np.int8 if isinstance(dtype, pd.CategoricalDtype) else (dtype or object))
+    else:
+        values = np.concatenate(chunks)
+    if isinstance(dtype, pd.CategoricalDtype):
+        return pd.Categorical.from_codes(values, dtype=dtype)
+    return values
+
+
+def frame_from_chunks(columns, chunks, dtypes=None):
+    """Builds a DataFrame from an iterable of lists of row tuples.
+
+    dtypes maps column names to a NumPy dtype (e.g. 'int32') or a
+    pd.CategoricalDtype; other columns are kept as Python objects.
+    """
+    dtypes = dtypes or {}
+    column_dtypes = [dtypes.get(name) for name in columns]
+    lookups = [_code_lookup(dt) if isinstance(dt, pd.CategoricalDtype) else None for dt in column_dtypes]
+    parts = [[] for _ in columns]
+    for rows in chunks:
+        if not rows:
+            continue
+        for i, values in enumerate(zip(*rows)):
+            parts[i].append(_convert(values, column_dtypes[i], lookups[i]))
+    return pd.DataFrame({
+        name: _finish(parts[i], column_dtypes[i]) for i, name in enumerate(columns)
+    })
+
+
+def fetch_frame(cursor, sql, params=(), dtypes=None, chunk_size=STREAM_CHUNK_SIZE):
+    """Runs sql and returns the whole result as a typed DataFrame, streamed in chunks."""
+    cursor.execute(sql, params)
+    columns = list(cursor.column_names)
+
+    def chunks():
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                return
+            yield rows
+
+    return frame_from_chunks(columns, chunks(), dtypes)
+
+
+def fetch_frame_page(cursor, pager, params=(), after=None, page_size=None, dtypes=None):
+    """One page of a paging.KeysetPager as (DataFrame, next_after)."""
+    rows, next_after = pager.page(cursor, params, after=after, page_size=page_size)
+    return frame_from_chunks(list(cursor.column_names), [rows], dtypes), next_after
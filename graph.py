@@ -0,0 +1,234 @@
+import threading
+
+import numpy as np
+
+from paging import iter_chunks
+
+# -----------------------------------------------------------------
+# CONNECTION GRAPH
+# -----------------------------------------------------------------
+# The accepted connections as an in-memory CSR adjacency: user_ids are
+# mapped to dense row numbers, indptr[i]:indptr[i + 1] slices the sorted
+# neighbour rows of row i out of indices. The arrays are loaded once from
+# UserConnectionEdges; afterwards refresh() replays ConnectionEdgeChanges
+# into small added/removed overlays, which are folded back into the
+# arrays once they grow past COMPACT_THRESHOLD changes.
+#
+# Every process keeps its own graph and watermark, so the change log is
+# pruned by age: prune_changes() deletes changes older than
+# CHANGE_RETENTION_DAYS (but never the newest). refresh() re-reads the
+# change at its own watermark; when that row is gone the changes after
+# it may be too, and the graph reloads instead of missing them.
+
+COMPACT_THRESHOLD = 50000
+FETCH_BATCH_SIZE = 50000
+CHANGE_RETENTION_DAYS = 7
+PRUNE_BATCH_SIZE = 10000
+
+LAST_CHANGE_QUERY = "SELECT COALESCE(MAX(change_id), 0) AS last_change_id FROM ConnectionEdgeChanges"
+EDGES_QUERY = "SELECT user_id, other_user_id FROM UserConnectionEdges"
+CHANGES_SINCE_QUERY = """
+    SELECT change_id, user_a, user_b, added FROM ConnectionEdgeChanges
+    WHERE change_id >= %s ORDER BY change_id
+"""
+
+PRUNE_CUTOFF_QUERY = """
+    SELECT MAX(change_id) AS cutoff FROM ConnectionEdgeChanges
+    WHERE changed_at < NOW() - INTERVAL %s DAY
+"""
+
+
+def _pair_keys(a, b):
+    """Packs (user_a, user_b) id pairs into single int64 keys for set operations."""
+    return (np.asarray(a, dtype=np.int64) << 32) | np.asarray(b, dtype=np.int64)
+
+
+class ConnectionGraph:
+    """Mutual connections, 2-hop suggestions and degree stats over accepted connections."""
+
+    def __init__(self):
+        self._ids = np.empty(0, dtype=np.int64)       # row -> user_id (sorted)
+        self._indptr = np.zeros(1, dtype=np.int64)
+        self._indices = np.empty(0, dtype=np.int32)   # neighbour rows
+        self._added = {}     # user_id -> set of user_ids added since the last compaction
+        self._removed = {}   # user_id -> set of user_ids removed since the last compaction
+        self._pending = 0
+        self._last_change_id = None
+        self._lock = threading.RLock()
+
+    # --- Loading ---
+
+    def _build(self, src, dst):
+        """Builds the CSR arrays from directed (user_id, user_id) edge arrays."""
+        ids = np.unique(np.concatenate([src, dst]))
+        rows = np.searchsorted(ids, src)
+        cols = np.searchsorted(ids, dst).astype(np.int32)
+        order = np.lexsort((cols, rows))
+        rows, cols = rows[order], cols[order]
+        indptr = np.zeros(len(ids) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=len(ids)), out=indptr[1:])
+        self._ids, self._indptr, self._indices = ids, indptr, cols
+        self._added, self._removed, self._pending = {}, {}, 0
+
+    def load(self, cursor):
+        """Loads every edge from UserConnectionEdges."""
+        # Read the change watermark first: changes racing with the load are
+        # replayed by the next refresh(), and replaying one is harmless.
+        cursor.execute(LAST_CHANGE_QUERY)
+        last_change_id = cursor.fetchone()['last_change_id']
+
+        src_chunks, dst_chunks = [], []
+        edges = iter_chunks(cursor, EDGES_QUERY, chunk_size=FETCH_BATCH_SIZE)
+        for rows in edges:
+            src_chunks.append(np.fromiter((r['user_id'] for r in rows), dtype=np.int64, count=len(rows)))
+            dst_chunks.append(np.fromiter((r['other_user_id'] for r in rows), dtype=np.int64, count=len(rows)))
+
+        empty = np.empty(0, dtype=np.int64)
+        with self._lock:
+            self._build(np.concatenate(src_chunks or [empty]), np.concatenate(dst_chunks or [empty]))
+            self._last_change_id = last_change_id
+
+    def refresh(self, cursor):
+        """Applies the edge changes logged since the last load/refresh (loading first if needed)."""
+        if self._last_change_id is None:
+            self.load(cursor)
+            return
+        # >= : the change at the watermark itself shows it has not been pruned
+        cursor.execute(CHANGES_SINCE_QUERY, (self._last_change_id,))
+        changes = cursor.fetchall()
+        if self._last_change_id and (not changes or changes[0]['change_id'] != self._last_change_id):
+            self.load(cursor)
+            return
+        changes = [change for change in changes if change['change_id'] > self._last_change_id]
+        if not changes:
+            return
+        with self._lock:
+            for change in changes:
+                if change['added']:
+                    self._add_edge(change['user_a'], change['user_b'])
+                else:
+                    self._remove_edge(change['user_a'], change['user_b'])
+            self._last_change_id = changes[-1]['change_id']
+            if self._pending >= COMPACT_THRESHOLD:
+                self.compact()
+
+    def _add_edge(self, a, b):
+        for u, v in ((a, b), (b, a)):
+            self._removed.get(u, set()).discard(v)
+            self._added.setdefault(u, set()).add(v)
+        self._pending += 1
+
+    def _remove_edge(self, a, b):
+        for u, v in ((a, b), (b, a)):
+            self._added.get(u, set()).discard(v)
+            self._removed.setdefault(u, set()).add(v)
+        self._pending += 1
+
+    def compact(self):
+        """Folds the added/removed overlays back into the CSR arrays."""
+        with self._lock:
+            degrees = np.diff(self._indptr)
+            src = np.repeat(self._ids, degrees)
+            dst = self._ids[self._indices]
+
+            removed = [(u, v) for u, vs in self._removed.items() for v in vs]
+            if removed:
+                keep = ~np.isin(_pair_keys(src, dst), _pair_keys(*zip(*removed)))
+                src, dst = src[keep], dst[keep]
+
+            added = [(u, v) for u, vs in self._added.items() for v in vs]
+            if added:
+                add_src, add_dst = (np.array(col, dtype=np.int64) for col in zip(*added))
+                # An edge can be in both the arrays and the overlay (removed, then re-added)
+                fresh = ~np.isin(_pair_keys(add_src, add_dst), _pair_keys(src, dst))
+                src = np.concatenate([src, add_src[fresh]])
+                dst = np.concatenate([dst, add_dst[fresh]])
+
+            self._build(src, dst)
+
+    # --- Queries ---
+
+    def neighbors(self, user_id):
+        """Returns the sorted user_ids of a user's accepted connections."""
+        with self._lock:
+            row = np.searchsorted(self._ids, user_id)
+            if row < len(self._ids) and self._ids[row] == user_id:
+                result = self._ids[self._indices[self._indptr[row]:self._indptr[row + 1]]]
+            else:
+                result = np.empty(0, dtype=np.int64)
+            removed = self._removed.get(user_id)
+            if removed:
+                result = result[~np.isin(result, list(removed))]
+            added = self._added.get(user_id)
+            if added:
+                result = np.union1d(result, np.fromiter(added, dtype=np.int64))
+        return result
+
+    def mutual_count(self, user_a, user_b):
+        """Counts the connections two users have in common."""
+        return len(np.intersect1d(self.neighbors(user_a), self.neighbors(user_b), assume_unique=True))
+
+    def suggestions(self, user_id, limit=5):
+        """Returns [(user_id, mutual_count)] for 2-hop neighbours, most mutual connections first."""
+        with self._lock:
+            direct = self.neighbors(user_id)
+            if not len(direct):
+                return []
+            # Neighbours with overlay changes go through neighbors(); the rest
+            # are sliced out of the CSR arrays all at once.
+            patched = np.array([v for v in direct if v in self._added or v in self._removed], dtype=np.int64)
+            plain = direct[~np.isin(direct, patched)] if len(patched) else direct
+            rows = np.searchsorted(self._ids, plain)
+            found = rows < len(self._ids)
+            rows = rows[found][self._ids[rows[found]] == plain[found]]
+            starts, lengths = self._indptr[rows], np.diff(self._indptr)[rows]
+            # Position i of the concatenated slices is indices[i + (start - offset) of its slice]
+            offsets = np.repeat(starts - (np.cumsum(lengths) - lengths), lengths) + np.arange(lengths.sum())
+            hops = [self._ids[self._indices[offsets]]] + [self.neighbors(v) for v in patched]
+        two_hop = np.concatenate(hops)
+        candidates, counts = np.unique(two_hop, return_counts=True)
+        keep = (candidates != user_id) & ~np.isin(candidates, direct, assume_unique=True)
+        candidates, counts = candidates[keep], counts[keep]
+        top = np.lexsort((candidates, -counts))[:limit]
+        return [(int(candidates[i]), int(counts[i])) for i in top]
+
+    def degree_stats(self):
+        """Summarises the degree distribution (as of the last compaction)."""
+        with self._lock:
+            degrees = np.diff(self._indptr)
+        if not len(degrees):
+            return {'users': 0, 'edges': 0, 'mean': 0.0, 'median': 0.0, 'p99': 0.0, 'max': 0}
+        return {
+            'users': int(len(degrees)),
+            'edges': int(degrees.sum() // 2),
+            'mean': float(degrees.mean()),
+            'median': float(np.median(degrees)),
+            'p99': float(np.percentile(degrees, 99)),
+            'max': int(degrees.max()),
+        }
+
+
+def prune_changes(conn, retention_days=CHANGE_RETENTION_DAYS):
+    """Deletes connection changes older than retention_days, keeping the newest; returns the rows deleted."""
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT MAX(change_id) FROM ConnectionEdgeChanges")
+        newest = cursor.fetchone()[0]
+        cursor.execute(PRUNE_CUTOFF_QUERY, (retention_days,))
+        cutoff = cursor.fetchone()[0]
+        if cutoff is None:
+            return 0
+        cutoff = min(cutoff, newest - 1)
+        deleted = 0
+        while True:
+            # Short transactions, so the procedures appending changes are not held up
+            cursor.execute(
+                "DELETE FROM ConnectionEdgeChanges WHERE change_id <= %s ORDER BY change_id LIMIT %s",
+                (cutoff, PRUNE_BATCH_SIZE)
+            )
+            conn.commit()
+            deleted += cursor.rowcount
+            if cursor.rowcount < PRUNE_BATCH_SIZE:
+                return deleted
+    finally:
+        cursor.close()
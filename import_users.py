@@ -0,0 +1,321 @@
+"""Bulk-imports users and their profiles from a CSV or JSONL file.
+
+Usage: python import_users.py cohort.jsonl [--batch-size 1000] [--workers 8] [--host ... --database ...]
+
+One record per line (JSONL) or row (CSV) with username, full_name,
+email, role, and either password (hashed here with bcrypt) or
+password_hash (already hashed). Optional: graduation_year, bio, skills
+(a list, or "a;b;c" in CSV), projects and experience (lists of objects
+with the Projects / Experience column names; JSON text in CSV).
+
+The input is streamed in batches. While one batch is written, the
+passwords of the next are hashed on a process pool. Each batch is one
+transaction with multi-row inserts into Users, Skills, Projects and
+Experience; tr_LogUserCreation writes the UserAuditLog rows inside the
+same transaction, so the audit log matches exactly what was committed.
+Invalid records, and records whose username or email is already taken
+(in the database or by an earlier record in the file), are skipped and
+reported with their line numbers; the rest of the import carries on.
+
+Passwords hashed at a lower --rounds are upgraded to the app's cost the
+first time each user logs in.
+"""
+import argparse
+import csv
+import itertools
+import json
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import mysql.connector
+
+from db import add_connection_args, connect
+from passwords import DEFAULT_ROUNDS, hash_many
+
+ROLES = ('student', 'faculty', 'alumni', 'admin')
+REQUIRED_FIELDS = ('username', 'full_name', 'email', 'role')
+HASH_CHUNK_SIZE = 50  # passwords per worker job
+
+PROJECT_FIELDS = ('project_title', 'project_description', 'start_date', 'end_date')
+EXPERIENCE_FIELDS = ('company_name', 'role_title', 'description', 'start_date', 'end_date')
+
+
+class InvalidRecord(Exception):
+    """Raised for a record that cannot be imported (the message has its line number).
+
+    batches() reports and skips these instead of stopping the import.
+    """
+
+
+# -----------------------------------------------------------------
+# READING
+# -----------------------------------------------------------------
+
+def _parse_csv(row):
+    record = {key: value if value != '' else None for key, value in row.items()}
+    if record.get('skills'):
+        record['skills'] = [skill.strip() for skill in record['skills'].split(';') if skill.strip()]
+    for key in ('projects', 'experience'):
+        if record.get(key):
+            record[key] = json.loads(record[key])
+    return record
+
+
+def _csv_rows(f):
+    reader = csv.DictReader(f)
+    for row in reader:
+        # line_num is the last line of the row, which can span lines when quoted
+        yield reader.line_num, row
+
+
+def _jsonl_lines(f):
+    for line_no, line in enumerate(f, start=1):
+        if line.strip():
+            yield line_no, line
+
+
+def read_records(path, fmt=None):
+    """Yields (line_number, record) from a CSV or JSONL file without loading it whole.
+
+    A line that does not parse comes back as (line_number, InvalidRecord),
+    so one bad line is reported like any other invalid record.
+    """
+    fmt = fmt or ('csv' if path.endswith('.csv') else 'jsonl')
+    rows, parse = (_csv_rows, _parse_csv) if fmt == 'csv' else (_jsonl_lines, json.loads)
+    with open(path, newline='', encoding='utf-8') as f:
+        for line_no, raw in rows(f):
+            try:
+                yield line_no, parse(raw)
+            except ValueError as e:   # json.JSONDecodeError is a ValueError
+                yield line_no, InvalidRecord(f"line {line_no}: not valid JSON ({e})")
+
+
+def _check_lists(line_no, record):
+    if not isinstance(record.get('skills') or [], list):
+        raise InvalidRecord(f"line {line_no}: skills must be a list")
+    for key in ('projects', 'experience'):
+        items = record.get(key) or []
+        if not isinstance(items, list) or not all(isinstance(item, dict) for item in items):
+            raise InvalidRecord(f"line {line_no}: {key} must be a list of objects")
+
+
+def validate(line_no, record):
+    if isinstance(record, InvalidRecord):
+        raise record
+    if not isinstance(record, dict):
+        raise InvalidRecord(f"line {line_no}: expected a JSON object, got {type(record).__name__}")
+    missing = [field for field in REQUIRED_FIELDS if not record.get(field)]
+    if not record.get('password') and not record.get('password_hash'):
+        missing.append('password')
+    if missing:
+        raise InvalidRecord(f"line {line_no}: missing {', '.join(missing)}")
+    if record['role'] not in ROLES:
+        raise InvalidRecord(f"line {line_no}: unknown role {record['role']!r}")
+    _check_lists(line_no, record)
+    record['line_no'] = line_no
+    return record
+
+
+# -----------------------------------------------------------------
+# HASHING
+# -----------------------------------------------------------------
+
+def submit_hashing(executor, batch, rounds):
+    """Starts hashing the plain-text passwords of a batch; returns the futures."""
+    plain = [record['password'] for record in batch if not record.get('password_hash')]
+    return [
+        executor.submit(hash_many, plain[i:i + HASH_CHUNK_SIZE], rounds)
+        for i in range(0, len(plain), HASH_CHUNK_SIZE)
+    ]
+
+
+def collect_hashes(batch, futures):
+    hashes = iter([h for future in futures for h in future.result()])
+    for record in batch:
+        if not record.get('password_hash'):
+            record['password_hash'] = next(hashes)
+        record.pop('password', None)
+
+
+# -----------------------------------------------------------------
+# LOADING
+# -----------------------------------------------------------------
+
+def _key(value):
+    # Users.username and Users.email are UNIQUE under a case-insensitive collation
+    return value.strip().casefold()
+
+
+def drop_taken(cursor, batch):
+    """Splits off records whose username or email is taken, in Users or earlier in the batch.
+
+    Returns (records to insert, skip messages).
+    """
+    usernames = [record['username'] for record in batch]
+    emails = [record['email'] for record in batch]
+    cursor.execute(
+        f"SELECT username, email FROM Users "
+        f"WHERE username IN ({', '.join(['%s'] * len(usernames))}) OR email IN ({', '.join(['%s'] * len(emails))})",
+        usernames + emails
+    )
+    taken = {}  # ('username' or 'email', key) -> who has it
+    for username, email in cursor.fetchall():
+        taken[('username', _key(username))] = "an existing user"
+        taken[('email', _key(email))] = "an existing user"
+
+    kept, skipped = [], []
+    for record in batch:
+        keys = [(field, _key(record[field])) for field in ('username', 'email')]
+        clash = next((key for key in keys if key in taken), None)
+        if clash:
+            field = clash[0]
+            skipped.append(f"line {record['line_no']}: {field} {record[field]!r} already used by {taken[clash]}")
+        else:
+            kept.append(record)
+        # A skipped record's username and email still shadow later duplicates of it
+        for key in keys:
+            taken.setdefault(key, f"line {record['line_no']}")
+    return kept, skipped
+
+
+def load_batch(conn, batch):
+    """Writes one batch in a single transaction; returns (users inserted, profile rows, skip messages)."""
+    cursor = conn.cursor()
+    try:
+        batch, skipped = drop_taken(cursor, batch)
+        if not batch:
+            return 0, 0, skipped
+
+        cursor.executemany(
+            "INSERT INTO Users (username, password_hash, full_name, email, role, graduation_year, bio) "
+            "VALUES (%s, %s, %s, %s, %s, %s, %s)",
+            [
+                (r['username'], r['password_hash'], r['full_name'], r['email'], r['role'],
+                 r.get('graduation_year'), r.get('bio'))
+                for r in batch
+            ]
+        )
+        placeholders = ", ".join(["%s"] * len(batch))
+        cursor.execute(
+            f"SELECT username, user_id FROM Users WHERE username IN ({placeholders})",
+            [record['username'] for record in batch]
+        )
+        user_ids = dict(cursor.fetchall())
+
+        skills, projects, experience = [], [], []
+        for record in batch:
+            user_id = user_ids[record['username']]
+            skills.extend((user_id, skill) for skill in record.get('skills') or ())
+            projects.extend(
+                (user_id, *(item.get(field) for field in PROJECT_FIELDS)) for item in record.get('projects') or ()
+            )
+            experience.extend(
+                (user_id, *(item.get(field) for field in EXPERIENCE_FIELDS)) for item in record.get('experience') or ()
+            )
+        if skills:
+            cursor.executemany("INSERT INTO Skills (user_id, skill_name) VALUES (%s, %s)", skills)
+        if projects:
+            cursor.executemany(
+                f"INSERT INTO Projects (user_id, {', '.join(PROJECT_FIELDS)}) VALUES (%s, %s, %s, %s, %s)", projects
+            )
+        if experience:
+            cursor.executemany(
+                f"INSERT INTO Experience (user_id, {', '.join(EXPERIENCE_FIELDS)}) VALUES (%s, %s, %s, %s, %s, %s)",
+                experience
+            )
+        conn.commit()
+        return len(batch), len(skills) + len(projects) + len(experience), skipped
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+
+
+def batches(records, batch_size, skipped):
+    """Yields lists of valid records; the messages of invalid ones are appended to skipped."""
+    while True:
+        chunk = list(itertools.islice(records, batch_size))
+        if not chunk:
+            return
+        batch = []
+        for line_no, record in chunk:
+            try:
+                batch.append(validate(line_no, record))
+            except InvalidRecord as e:
+                skipped.append(str(e))
+        if batch:
+            yield batch
+
+
+def run_import(conn, path, batch_size=1000, workers=None, rounds=DEFAULT_ROUNDS, fmt=None, out=sys.stdout):
+    """Imports every record in path; returns the totals. Skipped records are printed to out."""
+    workers = workers or os.cpu_count() or 1
+    totals = {'users': 0, 'profile_rows': 0, 'skipped': 0, 'seconds': 0.0}
+    invalid = []  # filled by batches() as it reads ahead
+    started = time.perf_counter()
+    # spawn, like PasswordHasher, so workers don't inherit the open connection
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as executor:
+        pending = None  # (batch, hash futures) for the batch being hashed
+        records = batches(read_records(path, fmt), batch_size, invalid)
+        for number, batch in enumerate(itertools.chain(records, [None]), start=0):
+            # Start hashing this batch before writing the previous one
+            current = pending
+            pending = (batch, submit_hashing(executor, batch, rounds)) if batch else None
+            if current is None:
+                continue
+
+            batch_started = time.perf_counter()
+            collect_hashes(*current)
+            hashed = time.perf_counter()
+            users, rows, taken = load_batch(conn, current[0])
+            done = time.perf_counter()
+
+            skipped, invalid[:] = invalid + taken, []
+            for message in skipped:
+                print(f"skipped {message}", file=out)
+            totals['users'] += users
+            totals['profile_rows'] += rows
+            totals['skipped'] += len(skipped)
+            print(
+                f"batch {number}: {users} users, {rows} profile rows, {len(skipped)} skipped  "
+                f"hash wait {hashed - batch_started:.2f}s  load {done - hashed:.2f}s  "
+                f"{users / max(done - batch_started, 1e-9):.0f} users/s",
+                file=out
+            )
+    # Invalid records after the last batch that had any valid ones
+    for message in invalid:
+        print(f"skipped {message}", file=out)
+    totals['skipped'] += len(invalid)
+    totals['seconds'] = time.perf_counter() - started
+    return totals
+
+
+def main():
+    parser = add_connection_args(argparse.ArgumentParser(description=__doc__.splitlines()[0]))
+    parser.add_argument("path", help="CSV or JSONL file")
+    parser.add_argument("--format", choices=("csv", "jsonl"), help="Default: from the file extension")
+    parser.add_argument("--batch-size", type=int, default=1000, help="Users per transaction")
+    parser.add_argument("--workers", type=int, default=None, help="Hashing processes (default: CPU count)")
+    parser.add_argument("--rounds", type=int, default=DEFAULT_ROUNDS, help="bcrypt cost for plain-text passwords")
+    args = parser.parse_args()
+
+    conn = connect(args)
+    try:
+        totals = run_import(conn, args.path, args.batch_size, args.workers, args.rounds, args.format)
+    except mysql.connector.Error as e:
+        sys.exit(f"Import stopped: {e} (earlier batches are committed)")
+    finally:
+        conn.close()
+    print(
+        f"Imported {totals['users']} users and {totals['profile_rows']} profile rows "
+        f"({totals['skipped']} records skipped) in {totals['seconds']:.1f}s, "
+        f"{totals['users'] / max(totals['seconds'], 1e-9):.0f} users/s."
+    )
+
+
+if __name__ == "__main__":
+    main()
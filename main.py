@@ -1,8 +1,28 @@
 import streamlit as st
 import mysql.connector
+import json
+import threading
 import pandas as pd
-import bcrypt
 from contextlib import contextmanager
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+from archive import (ARCHIVE_DIR, applicants_of_poster_with_archive, applications_per_student_with_archive,
+                     archived_application_counts)
+from cache import TTLCache
+from db import ConnectionPool, PoolExhausted, ReplicaReadFailed, ReplicaSet
+from feed import FeedWorker, load_feed
+from graph import ConnectionGraph
+from queries import (DELETE_OPPORTUNITY_QUERY, FACULTY_LIST_QUERY, PROFILE_ITEM_IDS, REJECT_APPLICATION_QUERY,
+                     SET_CONNECTION_STATUS_QUERY, SET_OPPORTUNITY_STATUS_QUERY, UPDATE_BIO_QUERY,
+                     applicants_of_poster_frame, applications_per_student_frame, applied_opportunity_ids,
+                     connection_count, delete_profile_item_query, fetch_users_by_ids, list_connections,
+                     list_mentor_projects, list_open_opportunities, list_pending_requests, list_posted_opportunities,
+                     list_student_projects, load_applicants, load_connection_statuses, load_profile, load_user,
+                     load_user_by_username, posted_opportunities_frame, review_applications)
+from passwords import HasherBusy, PasswordHasher
+from profiler import HISTOGRAM_BUCKETS_MS, QueryProfiler
+from recommend import OpportunityRecommender, student_terms
+from request_context import RequestContext
+from search import NameIndex, search_users
 
 # -----------------------------------------------------------------
 # DATABASE CONFIGURATION
@@ -14,46 +34,188 @@ DB_USER = "root"
 DB_PASSWORD = ""  # <-- CHANGE THIS
 DB_NAME = "apn_db"
 
-# Function to create a new database connection
-def get_db_connection():
-    try:
-        conn = mysql.connector.connect(
-            host=DB_HOST,
+# Connection pool settings (shared by every Streamlit session)
+DB_POOL_SIZE = 10
+DB_POOL_TIMEOUT = 5  # seconds to wait for a free connection
+
+# Read replicas of DB_HOST as (host, port). Leave empty to run every query on DB_HOST.
+DB_REPLICAS = []                # e.g. [("localhost", 3307)]
+REPLICA_MAX_LAG = 5.0           # seconds behind the primary before a replica stops getting reads
+REPLICA_CHECK_INTERVAL = 0.5    # seconds between replication heartbeats
+
+# Shared read cache (per server process): entry lifetime and size bound
+CACHE_TTL = 30            # seconds
+CACHE_MAX_ENTRIES = 10000
+FACULTY_LIST_TTL = 300    # the faculty picker only changes on signup
+
+# Number of opportunity cards shown per page
+OPPORTUNITIES_PAGE_SIZE = 20
+# Rows per page for the other paged lists (connections, requests, admin reports)
+LIST_PAGE_SIZE = 50
+ARCHIVE_REPORT_ROWS = 500   # rows shown by the rubric reports when archived applications are included
+ARCHIVE_CACHE_TTL = 3600    # archive.py adds files at most once per run
+# Reads a page may run at once on separate pooled connections (keep well below DB_POOL_SIZE)
+PREFETCH_WORKERS = 3
+RECOMMENDATIONS_SHOWN = 3
+
+# One pool per server process; st.cache_resource keeps it alive across reruns
+@st.cache_resource
+def get_db_pool():
+    return ConnectionPool(
+        size=DB_POOL_SIZE,
+        timeout=DB_POOL_TIMEOUT,
+        host=DB_HOST,
+        user=DB_USER,
+        password=DB_PASSWORD,
+        database=DB_NAME
+    )
+
+# Read routing: replicas for read-only work, DB_HOST for writes (see db.ReplicaSet)
+@st.cache_resource
+def get_replica_set():
+    replicas = [
+        ConnectionPool(
+            size=DB_POOL_SIZE,
+            timeout=DB_POOL_TIMEOUT,
+            host=host,
+            port=port,
             user=DB_USER,
             password=DB_PASSWORD,
             database=DB_NAME
         )
-        return conn
+        for host, port in DB_REPLICAS
+    ]
+    return ReplicaSet(
+        get_db_pool(), replicas, max_lag=REPLICA_MAX_LAG, check_interval=REPLICA_CHECK_INTERVAL
+    ).start()
+
+# In-process name index used for short (typeahead) searches on Find Users
+@st.cache_resource
+def get_name_index():
+    return NameIndex()
+
+# In-process connection graph for mutual connections and suggestions
+@st.cache_resource
+def get_connection_graph():
+    return ConnectionGraph()
+
+# In-process TF-IDF index of opportunities for the "Recommended for You" section
+@st.cache_resource
+def get_recommender():
+    return OpportunityRecommender()
+
+# Cache for read-mostly lookups; the write paths below invalidate what they change
+@st.cache_resource
+def get_cache():
+    return TTLCache(max_entries=CACHE_MAX_ENTRIES, default_ttl=CACHE_TTL)
+
+# Background fan-out of activity-feed events into each reader's timeline
+@st.cache_resource
+def get_feed_worker():
+    return FeedWorker(get_db_pool()).start()
+
+# Per-statement timings for the admin diagnostics page (one per server process)
+@st.cache_resource
+def get_profiler():
+    return QueryProfiler(app_file=__file__)
+
+# Function to borrow a database connection from the pool
+def get_db_connection():
+    try:
+        return get_db_pool().get()
+    except PoolExhausted as e:
+        st.error(f"The server is busy, please try again: {e}")
+        return None
     except mysql.connector.Error as e:
         st.error(f"Error connecting to MySQL: {e}")
         return None
 
+def get_read_connection(shared=False):
+    """Borrows a replica connection for read-only work: (pool, conn), or (primary pool, None).
+
+    Only replicas that have this session's last write are used (see
+    note_write()); with shared=True, for results that go into the shared
+    cache, only those that have every write this process has made.
+    """
+    replicas = get_replica_set()
+    token = replicas.latest_token() if shared else st.session_state.get('write_token', 0)
+    pool = replicas.read_pool(token)
+    if pool is get_db_pool():
+        return pool, None
+    try:
+        return pool, pool.get()
+    except PoolExhausted:
+        return get_db_pool(), None
+    except mysql.connector.Error as e:
+        # Fail over to the primary and keep this replica out until its next good check
+        replicas.mark_failed(pool, e)
+        return get_db_pool(), None
+
+def note_write():
+    """Call after a commit, so this session's reads wait for a replica that has it."""
+    st.session_state.write_token = get_replica_set().write_token()
+
 # Use a context manager for safe database operations
+# (dictionary=False gives a plain tuple cursor, for the *_frame query helpers;
+# read_only=True may run the block on a replica, so only for blocks that never write.
+# A replica that fails part-way through the block is taken out of rotation and
+# ReplicaReadFailed is raised: replica_read() then retries on the primary, and
+# the page router reruns pages whose read-only blocks render as they read.)
 @contextmanager
-def db_cursor():
-    conn = get_db_connection()
+def db_cursor(dictionary=True, read_only=False, shared=False):
+    pool, conn = get_read_connection(shared) if read_only else (get_db_pool(), None)
+    if conn is None:
+        conn = get_db_connection()
     if conn is None:
         yield None, None
         return
     
-    cursor = conn.cursor(dictionary=True)
+    cursor = get_profiler().wrap(conn.cursor(dictionary=dictionary))
     try:
         yield cursor, conn
+    except mysql.connector.Error as e:
+        if pool is get_db_pool():
+            raise
+        get_replica_set().mark_failed(pool, e)
+        raise ReplicaReadFailed(f"Replica read failed: {e}") from e
     finally:
-        cursor.close()
-        conn.close()
+        try:
+            cursor.close()
+        finally:
+            pool.put(conn)
 
 # -----------------------------------------------------------------
 # PASSWORD HASHING
 # -----------------------------------------------------------------
 
+# bcrypt cost factor for new hashes. Logins transparently re-hash
+# passwords stored with a different cost.
+BCRYPT_ROUNDS = 12
+PASSWORD_WORKERS = 2      # worker processes doing bcrypt
+PASSWORD_MAX_QUEUE = 32   # password operations allowed in flight before logins are turned away
+
+@st.cache_resource
+def get_password_hasher():
+    return PasswordHasher(workers=PASSWORD_WORKERS, max_queue=PASSWORD_MAX_QUEUE, rounds=BCRYPT_ROUNDS)
+
 def hash_password(password):
-    """Hashes a password using bcrypt."""
-    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt())
+    """Hashes a password using bcrypt (on the worker pool)."""
+    return get_password_hasher().hash(password)
 
 def check_password(password, hashed_password):
-    """Checks if a password matches its hash."""
-    return bcrypt.checkpw(password.encode('utf-8'), hashed_password.encode('utf-8'))
+    """Checks if a password matches its hash (on the worker pool)."""
+    return get_password_hasher().verify(password, hashed_password)
+
+def upgrade_password_hash(user, password):
+    """Re-hashes a just-verified password if it was stored with an outdated cost."""
+    if not get_password_hasher().needs_rehash(user['password_hash']):
+        return
+    new_hash = hash_password(password)
+    with db_cursor() as (cursor, conn):
+        if cursor:
+            cursor.execute("UPDATE Users SET password_hash = %s WHERE user_id = %s", (new_hash.decode('utf-8'), user['user_id']))
+            conn.commit()
+            invalidate_user(user['user_id'], user['username'])
 
 # -----------------------------------------------------------------
 # SESSION STATE INITIALIZATION
@@ -67,57 +229,200 @@ if 'logged_in' not in st.session_state:
     st.session_state.page = 'login' # Controls navigation
     st.session_state.view_profile_id = None # Which user's profile to view
 
+# -----------------------------------------------------------------
+# PER-RERUN DATA
+# -----------------------------------------------------------------
+# Streamlit executes this script in a fresh namespace on every rerun, so
+# rerun_data below holds only this rerun's reads: each helper result is
+# loaded once however many sections ask for it, and pages prefetch
+# their independent reads concurrently.
+
+def prefetch_thread_setup():
+    """Lets prefetch threads render errors and record queries for this rerun."""
+    script_ctx = get_script_run_ctx()
+    run = get_profiler().current_run()
+
+    @contextmanager
+    def setup():
+        add_script_run_ctx(threading.current_thread(), script_ctx)
+        with get_profiler().joined(run):
+            yield
+
+    return setup
+
+rerun_data = RequestContext(max_workers=PREFETCH_WORKERS, thread_setup=prefetch_thread_setup)
+
 # -----------------------------------------------------------------
 # HELPER FUNCTIONS (Database Queries)
 # -----------------------------------------------------------------
 
+def cached_read(key, load, ttl=None):
+    """Reads through this rerun's memo, then the shared cache, then load()."""
+    return rerun_data.get(key, lambda: get_cache().get_or_load(key, load, ttl=ttl))
+
+def replica_read(read, default=None, shared=False):
+    """Runs read(cursor) on a replica if one is ready, and on the primary if the replica fails mid-read."""
+    try:
+        with db_cursor(read_only=True, shared=shared) as (cursor, conn):
+            return read(cursor) if cursor else default
+    except ReplicaReadFailed:
+        with db_cursor() as (cursor, conn):
+            return read(cursor) if cursor else default
+
+def get_archived_application_counts():
+    """Applications per student that archive.py has moved out of the database (one count per student)."""
+    return cached_read(
+        ('archived_application_counts',), lambda: archived_application_counts(ARCHIVE_DIR), ttl=ARCHIVE_CACHE_TTL
+    )
+
 def fetch_user_by_username(username):
-    with db_cursor() as (cursor, conn):
-        if cursor:
-            cursor.execute("SELECT * FROM Users WHERE username = %s", (username,))
-            return cursor.fetchone()
-    return None
+    def load():
+        return replica_read(lambda cursor: load_user_by_username(cursor, username), shared=True)
+    return cached_read(('username', username), load)
 
 def fetch_user_by_id(user_id):
-    with db_cursor() as (cursor, conn):
-        if cursor:
-            cursor.execute("SELECT * FROM Users WHERE user_id = %s", (user_id,))
-            return cursor.fetchone()
-    return None
-
-def get_profile_details(user_id):
-    """Fetches all profile components for a user."""
-    details = {}
-    with db_cursor() as (cursor, conn):
-        if not cursor:
-            return None
-        
-        # User info
-        cursor.execute("SELECT user_id, full_name, email, role, graduation_year, bio FROM Users WHERE user_id = %s", (user_id,))
-        details['user'] = cursor.fetchone()
-        
-        # Skills
-        cursor.execute("SELECT skill_id, skill_name FROM Skills WHERE user_id = %s", (user_id,))
-        details['skills'] = cursor.fetchall()
-        
-        # Projects
-        cursor.execute("SELECT project_id, project_title, project_description, start_date, end_date FROM Projects WHERE user_id = %s", (user_id,))
-        details['projects'] = cursor.fetchall()
-        
-        # Experience
-        cursor.execute("SELECT experience_id, company_name, role_title, description, start_date, end_date FROM Experience WHERE user_id = %s", (user_id,))
-        details['experience'] = cursor.fetchall()
-        
-    return details
+    def load():
+        return replica_read(lambda cursor: load_user(cursor, user_id), shared=True)
+    return cached_read(('user_id', user_id), load)
+
+def get_profile_details(user_id, viewer_id=None):
+    """Fetches all profile components for a user (and viewer's connection status) in one query."""
+    def load():
+        return replica_read(lambda cursor: load_profile(cursor, user_id, viewer_id), shared=True)
+    return cached_read(('profile', user_id, viewer_id), load)
+
+def get_faculty_list():
+    """Fetches the faculty/alumni shown in the admin rubric picker."""
+    def load(cursor):
+        cursor.execute(FACULTY_LIST_QUERY)
+        return cursor.fetchall()
+    return cached_read(('faculty_list',), lambda: replica_read(load, shared=True), ttl=FACULTY_LIST_TTL) or []
+
+# --- Cache invalidation (call after every commit that changes cached data) ---
+# Each of these also forgets everything read so far in this rerun and
+# records the write for read-your-writes routing (note_write()).
+
+def invalidate_user(user_id, username=None):
+    """Drops a user's cached row and every cached view of their profile."""
+    rerun_data.clear()
+    note_write()
+    get_cache().invalidate(('user_id', user_id), ('username', username))
+    get_cache().invalidate_prefix('profile', user_id)
+
+def invalidate_profile(user_id):
+    """Drops every cached view of a user's profile sections."""
+    rerun_data.clear()
+    note_write()
+    get_cache().invalidate_prefix('profile', user_id)
+
+def invalidate_connection(user_id_1, user_id_2):
+    """Drops the cached profiles that show the status between two users."""
+    rerun_data.clear()
+    note_write()
+    get_cache().invalidate(('profile', user_id_1, user_id_2), ('profile', user_id_2, user_id_1))
+
+def invalidate_open_opportunities(student_user_id=None):
+    """Drops cached opportunity listings: one student's, or everyone's."""
+    rerun_data.clear()
+    note_write()
+    if student_user_id is None:
+        get_cache().invalidate_prefix('open_opportunities')
+    else:
+        get_cache().invalidate_prefix('open_opportunities', student_user_id)
 
 def get_connection_status(user_id_1, user_id_2):
-    """Calls the fn_GetConnectionStatus function."""
-    with db_cursor() as (cursor, conn):
-        if cursor:
-            cursor.execute("SELECT fn_GetConnectionStatus(%s, %s) AS status", (user_id_1, user_id_2))
-            result = cursor.fetchone()
-            return result['status'] if result else 'none'
-    return 'none'
+    """Looks up the connection status between two users."""
+    pair = (user_id_1, user_id_2)
+    def load():
+        return replica_read(lambda cursor: load_connection_statuses(cursor, [pair])[pair], 'none')
+    return rerun_data.get(('connection_status', *pair), load)
+
+def load_connection_graph(cursor):
+    """Returns the shared connection graph, caught up with the latest connection changes."""
+    graph = get_connection_graph()
+    graph.refresh(cursor)
+    return graph
+
+def get_mutual_connection_count(user_id_1, user_id_2):
+    def load():
+        return replica_read(lambda cursor: load_connection_graph(cursor).mutual_count(user_id_1, user_id_2), 0)
+    return rerun_data.get(('mutual_count', user_id_1, user_id_2), load)
+
+def get_pending_requests(user_id, after=None):
+    """One page of the connection requests a user has received: (rows, next_after)."""
+    def load():
+        return replica_read(
+            lambda cursor: list_pending_requests(cursor, user_id, after=after, limit=LIST_PAGE_SIZE), ([], None)
+        )
+    return rerun_data.get(('pending_requests', user_id, after), load)
+
+def get_connections(user_id, after=None):
+    """One page of a user's accepted connections: (rows, next_after)."""
+    def load():
+        return replica_read(
+            lambda cursor: list_connections(cursor, user_id, after=after, limit=LIST_PAGE_SIZE), ([], None)
+        )
+    return rerun_data.get(('connections', user_id, after), load)
+
+def get_connection_count(user_id):
+    def load():
+        return replica_read(lambda cursor: connection_count(cursor, user_id), 0)
+    return rerun_data.get(('connection_count', user_id), load)
+
+# Badges shown next to users in lists, keyed by connection status
+CONNECTION_BADGES = {
+    'accepted': "✅ Connected",
+    'pending': "⏳ Request pending",
+    'rejected': "❌ Request rejected",
+    'none': "",
+}
+
+def describe_feed_event(event, viewer_id):
+    """One line of the activity feed, as seen by viewer_id."""
+    actor, target = event['actor_name'], event['target_name']
+    if event['event_type'] == 'opportunity_posted':
+        return f"**{actor}** posted a new opportunity: *{event['opportunity_title']}*"
+    if event['event_type'] == 'application_approved':
+        if event['actor_user_id'] == viewer_id:
+            return f"Your application to *{event['opportunity_title']}* was approved"
+        return f"**{actor}** joined *{event['opportunity_title']}*"
+    if event['target_user_id'] == viewer_id:
+        return f"**{actor}** accepted your connection request"
+    return f"**{actor}** is now connected with **{target}**"
+
+# -----------------------------------------------------------------
+# UI: PAGE CONTROLS (for keyset-paged lists)
+# -----------------------------------------------------------------
+
+# st.session_state[state_key] holds the keyset cursor of every page up to
+# the one being shown ([None] is the first page), so Previous only has to
+# drop the last one.
+
+def page_start(state_key):
+    """Returns the keyset cursor for the page of state_key's list being shown."""
+    return st.session_state.setdefault(state_key, [None])[-1]
+
+def restart_if_empty(state_key, rows):
+    """Goes back to the first page when a later page has emptied out (rows deleted since)."""
+    if not rows and len(st.session_state.get(state_key, [None])) > 1:
+        st.session_state[state_key] = [None]
+        st.rerun()
+
+def show_page_controls(state_key, next_after):
+    """Previous/Next buttons for a paged list; nothing when it fits on one page."""
+    page_starts = st.session_state.setdefault(state_key, [None])
+    if len(page_starts) == 1 and next_after is None:
+        return
+    col1, col2, col3 = st.columns([1, 2, 1])
+    with col1:
+        if st.button("Previous", key=f"{state_key}_prev", disabled=len(page_starts) == 1, use_container_width=True):
+            page_starts.pop()
+            st.rerun()
+    col2.caption(f"Page {len(page_starts)}")
+    with col3:
+        if st.button("Next", key=f"{state_key}_next", disabled=next_after is None, use_container_width=True):
+            page_starts.append(next_after)
+            st.rerun()
 
 # -----------------------------------------------------------------
 # UI: LOGIN PAGE
@@ -134,12 +439,22 @@ def show_login_page():
 
         if submitted:
             user = fetch_user_by_username(username)
-            if user and check_password(password, user['password_hash']):
+            try:
+                valid = bool(user) and check_password(password, user['password_hash'])
+            except HasherBusy:
+                valid = None
+            if valid is None:
+                st.error("The server is busy, please try logging in again in a moment.")
+            elif valid:
                 st.session_state.logged_in = True
                 st.session_state.user_id = user['user_id']
                 st.session_state.username = user['username']
                 st.session_state.role = user['role']
                 st.session_state.page = 'dashboard'
+                try:
+                    upgrade_password_hash(user, password)
+                except HasherBusy:
+                    pass  # the upgrade is retried on a later login
                 st.success("Logged in successfully!")
                 st.rerun()
             else:
@@ -183,9 +498,14 @@ def show_signup_page():
                             if cursor:
                                 cursor.callproc('sp_CreateUser', (username, hashed_pass.decode('utf-8'), full_name, email, role, grad_year))
                                 conn.commit()
+                                note_write()
+                                if role in ('faculty', 'alumni'):
+                                    get_cache().invalidate(('faculty_list',))
                                 st.success("Account created successfully! Please login.")
                                 st.session_state.page = 'login'
                                 st.rerun()
+                    except HasherBusy:
+                        st.error("The server is busy, please try again in a moment.")
                     except mysql.connector.Error as e:
                         st.error(f"Error creating account: {e}")
 
@@ -236,6 +556,10 @@ def show_main_app():
                 st.session_state.page = 'rubric_queries'
                 st.session_state.view_profile_id = None
                 st.rerun()
+            if st.button("Admin: Diagnostics", use_container_width=True):
+                st.session_state.page = 'diagnostics'
+                st.session_state.view_profile_id = None
+                st.rerun()
         
         st.divider()
         if st.button("Logout", use_container_width=True):
@@ -256,6 +580,8 @@ def show_main_app():
         show_connections()
     elif st.session_state.page == 'rubric_queries':
         show_rubric_queries()
+    elif st.session_state.page == 'diagnostics':
+        show_diagnostics()
 
 # -----------------------------------------------------------------
 # UI: DASHBOARD PAGE
@@ -266,22 +592,14 @@ def show_dashboard():
     role = st.session_state.role
     user_id = st.session_state.user_id
 
-    with db_cursor() as (cursor, conn):
+    with db_cursor(read_only=True) as (cursor, conn):
         if not cursor:
             return
 
         if role == 'student':
             st.subheader("My Ongoing Projects")
-            # Query for projects where this student was approved
-            query = """
-                SELECT p.ongoing_project_id, o.title, u.full_name AS faculty_name
-                FROM OngoingProjects p
-                JOIN Opportunities o ON p.opportunity_id = o.opportunity_id
-                JOIN Users u ON p.faculty_user_id = u.user_id
-                WHERE p.student_user_id = %s
-            """
-            cursor.execute(query, (user_id,))
-            projects = cursor.fetchall()
+            # Projects where this student was approved
+            projects = list_student_projects(cursor, user_id)
             if projects:
                 for proj in projects:
                     st.info(f"**{proj['title']}** (with {proj['faculty_name']})")
@@ -290,16 +608,8 @@ def show_dashboard():
         
         elif role in ('faculty', 'alumni'):
             st.subheader("My Ongoing Projects (as Mentor)")
-            # Query for projects this faculty/alumni created and are ongoing
-            query = """
-                SELECT p.ongoing_project_id, o.title, u.full_name AS student_name
-                FROM OngoingProjects p
-                JOIN Opportunities o ON p.opportunity_id = o.opportunity_id
-                JOIN Users u ON p.student_user_id = u.user_id
-                WHERE p.faculty_user_id = %s
-            """
-            cursor.execute(query, (user_id,))
-            projects = cursor.fetchall()
+            # Projects this faculty/alumni created and are ongoing
+            projects = list_mentor_projects(cursor, user_id)
             if projects:
                 for proj in projects:
                     st.info(f"**{proj['title']}** (with {proj['student_name']})")
@@ -308,41 +618,75 @@ def show_dashboard():
                 
             st.subheader("My Posted Opportunities")
             # Aggregate query: Count applicants for each opportunity
-            query = """
-                SELECT o.title, o.status, COUNT(a.application_id) AS applicant_count
-                FROM Opportunities o
-                LEFT JOIN Applications a ON o.opportunity_id = a.opportunity_id
-                WHERE o.created_by_user_id = %s
-                GROUP BY o.opportunity_id, o.title, o.status
-            """
-            cursor.execute(query, (user_id,))
-            opportunities = cursor.fetchall()
-            if opportunities:
-                df = pd.DataFrame(opportunities)
-                st.dataframe(df)
+            frame_cursor = get_profiler().wrap(conn.cursor())
+            try:
+                df = posted_opportunities_frame(frame_cursor, user_id)
+            finally:
+                frame_cursor.close()
+            if not df.empty:
+                st.dataframe(df[['title', 'status', 'applicant_count']])
             else:
                 st.write("You have not posted any opportunities.")
 
+        # --- People You May Know (2-hop suggestions from the connection graph) ---
+        st.subheader("People You May Know")
+        suggestions = load_connection_graph(cursor).suggestions(user_id, limit=5)
+        if suggestions:
+            mutual_counts = dict(suggestions)
+            for person in fetch_users_by_ids(cursor, mutual_counts):
+                col1, col2 = st.columns([3, 1])
+                col1.write(f"**{person['full_name']}** ({person['role'].capitalize()})")
+                col1.caption(f"{mutual_counts[person['user_id']]} mutual connections")
+                if col2.button("View Profile", key=f"view_suggested_{person['user_id']}"):
+                    st.session_state.page = 'profile'
+                    st.session_state.view_profile_id = person['user_id']
+                    st.rerun()
+        else:
+            st.write("Connect with people to see suggestions here.")
+
+        # --- Recent Activity (the user's feed timeline, see feed.py) ---
+        st.subheader("Recent Activity")
+        events, next_after = load_feed(cursor, user_id, after=page_start('feed_pages'))
+        restart_if_empty('feed_pages', events)
+        if events:
+            for event in events:
+                st.write(describe_feed_event(event, user_id))
+                st.caption(event['created_at'].strftime("%d %b %Y, %H:%M"))
+            show_page_controls('feed_pages', next_after)
+        else:
+            st.write("Nothing new from your connections yet.")
+
 
 # -----------------------------------------------------------------
 # UI: PROFILE PAGE (View & Edit)
 # -----------------------------------------------------------------
 
 def show_profile(profile_user_id):
-    details = get_profile_details(profile_user_id)
+    viewer_id = st.session_state.user_id
+    is_own_profile = (profile_user_id == viewer_id)
+    if is_own_profile:
+        details = get_profile_details(profile_user_id, viewer_id)
+    else:
+        # Both are needed below; load them side by side
+        details, _ = rerun_data.prefetch(
+            lambda: get_profile_details(profile_user_id, viewer_id),
+            lambda: get_mutual_connection_count(viewer_id, profile_user_id),
+        )
     if not details:
         st.error("Could not load profile.")
         return
 
     user_info = details['user']
-    is_own_profile = (profile_user_id == st.session_state.user_id)
 
     st.title(f"{user_info['full_name']}'s Profile")
     st.caption(f"Role: {user_info['role'].capitalize()} | {user_info['email']}")
     
     # --- Connection Button (if viewing others) ---
     if not is_own_profile:
-        status = get_connection_status(st.session_state.user_id, profile_user_id)
+        mutual_count = get_mutual_connection_count(st.session_state.user_id, profile_user_id)
+        if mutual_count:
+            st.caption(f"{mutual_count} mutual connections")
+        status = details['connection_status']
         if status == 'none':
             if st.button("Send Connection Request"):
                 try:
@@ -357,6 +701,7 @@ def show_profile(profile_user_id):
                                 (req_id, rec_id)
                             )
                             conn.commit()
+                            invalidate_connection(req_id, rec_id)
                             st.success("Connection request sent!")
                             st.rerun()
                 except mysql.connector.Error as e:
@@ -378,8 +723,9 @@ def show_profile(profile_user_id):
         if st.button("Save Bio"):
             with db_cursor() as (cursor, conn):
                 if cursor:
-                    cursor.execute("UPDATE Users SET bio = %s WHERE user_id = %s", (new_bio, st.session_state.user_id))
+                    cursor.execute(UPDATE_BIO_QUERY, (new_bio, st.session_state.user_id))
                     conn.commit()
+                    invalidate_user(st.session_state.user_id, st.session_state.username)
                     st.success("Bio updated!")
                     st.rerun()
     else:
@@ -399,7 +745,7 @@ def show_profile(profile_user_id):
         # Read/Delete
         if info['data']:
             for item in info['data']:
-                item_id = item[f"{info['table'].lower()[:-1]}_id"]
+                item_id = item[PROFILE_ITEM_IDS[info['table']]]
                 item_name = item[info['col']]
                 
                 col1, col2 = st.columns([4, 1])
@@ -415,9 +761,9 @@ def show_profile(profile_user_id):
                         if st.button(f"Delete", key=f"del_{info['table']}_{item_id}"):
                             with db_cursor() as (cursor, conn):
                                 if cursor:
-                                    query = f"DELETE FROM {info['table']} WHERE {info['table'].lower()[:-1]}_id = %s AND user_id = %s"
-                                    cursor.execute(query, (item_id, st.session_state.user_id))
+                                    cursor.execute(delete_profile_item_query(info['table']), (item_id, st.session_state.user_id))
                                     conn.commit()
+                                    invalidate_profile(st.session_state.user_id)
                                     st.success(f"{section_name} item deleted.")
                                     st.rerun()
         else:
@@ -434,6 +780,7 @@ def show_profile(profile_user_id):
                             with db_cursor() as (cursor, conn):
                                 cursor.execute("INSERT INTO Skills (user_id, skill_name) VALUES (%s, %s)", (st.session_state.user_id, val1))
                                 conn.commit()
+                                invalidate_profile(st.session_state.user_id)
                                 st.success("Skill added!")
                                 st.rerun()
                     
@@ -445,6 +792,7 @@ def show_profile(profile_user_id):
                             with db_cursor() as (cursor, conn):
                                 cursor.execute("INSERT INTO Projects (user_id, project_title, project_description) VALUES (%s, %s, %s)", (st.session_state.user_id, val1, val2))
                                 conn.commit()
+                                invalidate_profile(st.session_state.user_id)
                                 st.success("Project added!")
                                 st.rerun()
 
@@ -457,6 +805,7 @@ def show_profile(profile_user_id):
                             with db_cursor() as (cursor, conn):
                                 cursor.execute("INSERT INTO Experience (user_id, company_name, role_title, description) VALUES (%s, %s, %s, %s)", (st.session_state.user_id, val1, val2, val3))
                                 conn.commit()
+                                invalidate_profile(st.session_state.user_id)
                                 st.success("Experience added!")
                                 st.rerun()
 
@@ -466,19 +815,30 @@ def show_profile(profile_user_id):
 
 def show_find_users():
     st.title("Find Users")
-    search_term = st.text_input("Search by name:")
+    search_term = st.text_input("Search by name, bio or skill:")
+
+    # Start from the first page whenever the search term changes
+    if st.session_state.get('find_users_term') != search_term:
+        st.session_state.find_users_term = search_term
+        st.session_state.find_users_page = 0
+    page = st.session_state.find_users_page
 
     if search_term:
-        with db_cursor() as (cursor, conn):
+        with db_cursor(read_only=True) as (cursor, conn):
             if cursor:
-                query = "SELECT user_id, full_name, role, email FROM Users WHERE full_name LIKE %s AND user_id != %s"
-                cursor.execute(query, (f"%{search_term}%", st.session_state.user_id))
-                results = cursor.fetchall()
+                results, has_next_page = search_users(
+                    cursor, search_term, st.session_state.user_id, page=page, name_index=get_name_index()
+                )
                 
                 if results:
+                    # One lookup for the status badges of the whole page
+                    statuses = load_connection_statuses(
+                        cursor, [(st.session_state.user_id, user['user_id']) for user in results]
+                    )
                     for user in results:
                         st.subheader(user['full_name'])
-                        st.caption(f"{user['role'].capitalize()} | {user['email']}")
+                        badge = CONNECTION_BADGES[statuses[(st.session_state.user_id, user['user_id'])]]
+                        st.caption(f"{user['role'].capitalize()} | {user['email']}" + (f" | {badge}" if badge else ""))
                         if st.button("View Profile", key=f"view_user_{user['user_id']}"):
                             st.session_state.page = 'profile'
                             st.session_state.view_profile_id = user['user_id']
@@ -487,64 +847,109 @@ def show_find_users():
                 else:
                     st.write("No users found.")
 
+                # --- Page controls ---
+                col1, col2, col3 = st.columns([1, 2, 1])
+                with col1:
+                    if st.button("Previous", disabled=page == 0, use_container_width=True):
+                        st.session_state.find_users_page -= 1
+                        st.rerun()
+                col2.caption(f"Page {page + 1}")
+                with col3:
+                    if st.button("Next", disabled=not has_next_page, use_container_width=True):
+                        st.session_state.find_users_page += 1
+                        st.rerun()
+
 # -----------------------------------------------------------------
 # UI: OPPORTUNITIES PAGE
 # -----------------------------------------------------------------
 
+def show_opportunity_card(op, user_id, key_prefix=""):
+    """Renders one open opportunity for a student, with an Apply button if not yet applied."""
+    with st.container(border=True):
+        st.subheader(op['title'])
+        st.caption(f"Posted by: {op['posted_by']}")
+        st.write(op['description'])
+        
+        if op['application_status']:
+            st.info(f"You applied for this. Status: {op['application_status']}")
+        else:
+            if st.button("Apply Now", key=f"{key_prefix}apply_{op['opportunity_id']}"):
+                try:
+                    with db_cursor() as (cursor, conn):
+                        if cursor:
+                            cursor.execute(
+                                "INSERT INTO Applications (opportunity_id, student_user_id, status) VALUES (%s, %s, 'pending')",
+                                (op['opportunity_id'], user_id)
+                            )
+                            conn.commit()
+                            invalidate_open_opportunities(user_id)
+                            st.success("Application submitted!")
+                            st.rerun()
+                except mysql.connector.Error as e:
+                    st.error(f"Error applying: {e}")
+
+def show_recommended_opportunities(cursor, user_id):
+    """Shows the open opportunities that best match the student's skills and projects."""
+    recommender = get_recommender()
+    recommender.refresh(cursor)
+    student_profile = student_terms(cursor, user_id)
+    if not student_profile:
+        st.caption("Add skills and projects to your profile to get recommendations.")
+        return
+
+    # Leave out what the student already applied for, over-fetch, then re-check
+    # against the database: drops anything closed, deleted or applied for since.
+    ranked = recommender.recommend(
+        student_profile, limit=RECOMMENDATIONS_SHOWN * 3, exclude_ids=applied_opportunity_ids(cursor, user_id)
+    )
+    matches, _ = list_open_opportunities(
+        cursor, user_id, limit=len(ranked), opportunity_ids=[op_id for op_id, _ in ranked]
+    )
+    rows = {op['opportunity_id']: op for op in matches}
+    shown = 0
+    for op_id, _ in ranked:
+        op = rows.get(op_id)
+        if op and not op['application_status'] and shown < RECOMMENDATIONS_SHOWN:
+            show_opportunity_card(op, user_id, key_prefix="rec_")
+            shown += 1
+    if not shown:
+        st.caption("No new matches for your profile right now.")
+
 def show_opportunities():
     st.title("Opportunities")
     role = st.session_state.role
     user_id = st.session_state.user_id
 
     if role == 'student':
+        st.subheader("Recommended for You")
+        with db_cursor(read_only=True) as (cursor, conn):
+            if cursor:
+                show_recommended_opportunities(cursor, user_id)
+
         st.subheader("Available Opportunities")
         
         # --- RUBRIC: JOIN QUERY ---
-        # This query joins Opportunities and Users to show who posted it.
-        query = """
-            SELECT o.opportunity_id, o.title, o.description, u.full_name AS posted_by
-            FROM Opportunities o
-            JOIN Users u ON o.created_by_user_id = u.user_id
-            WHERE o.status = 'open'
-        """
-        
-        with db_cursor() as (cursor, conn):
+        # list_open_opportunities() joins Opportunities and Users to show who
+        # posted it, one keyset page at a time.
+        after = page_start('opportunity_page_starts')
+
+        with db_cursor(read_only=True, shared=True) as (cursor, conn):
             if not cursor:
                 return
-            cursor.execute(query)
-            opportunities = cursor.fetchall()
+            opportunities, next_after = get_cache().get_or_load(
+                ('open_opportunities', user_id, after),
+                lambda: list_open_opportunities(cursor, user_id, after=after, limit=OPPORTUNITIES_PAGE_SIZE)
+            )
             
             if not opportunities:
+                restart_if_empty('opportunity_page_starts', opportunities)
                 st.write("No open opportunities at this time.")
                 return
 
             for op in opportunities:
-                with st.container(border=True):
-                    st.subheader(op['title'])
-                    st.caption(f"Posted by: {op['posted_by']}")
-                    st.write(op['description'])
-                    
-                    # Check if already applied
-                    cursor.execute(
-                        "SELECT * FROM Applications WHERE opportunity_id = %s AND student_user_id = %s",
-                        (op['opportunity_id'], user_id)
-                    )
-                    application = cursor.fetchone()
-                    
-                    if application:
-                        st.info(f"You applied for this. Status: {application['status']}")
-                    else:
-                        if st.button("Apply Now", key=f"apply_{op['opportunity_id']}"):
-                            try:
-                                cursor.execute(
-                                    "INSERT INTO Applications (opportunity_id, student_user_id, status) VALUES (%s, %s, 'pending')",
-                                    (op['opportunity_id'], user_id)
-                                )
-                                conn.commit()
-                                st.success("Application submitted!")
-                                st.rerun()
-                            except mysql.connector.Error as e:
-                                st.error(f"Error applying: {e}")
+                show_opportunity_card(op, user_id)
+
+            show_page_controls('opportunity_page_starts', next_after)
     
     elif role in ('faculty', 'alumni'):
         with st.expander("Post a New Opportunity"):
@@ -561,21 +966,33 @@ def show_opportunities():
                                 (user_id, title, description)
                             )
                             conn.commit()
+                            invalidate_open_opportunities()
                             st.success("Opportunity posted!")
                             st.rerun()
                             
         st.divider()
         st.subheader("Manage My Posted Opportunities")
-        with db_cursor() as (cursor, conn):
+        # Outcome of the last bulk review, kept across its rerun
+        review_feedback = st.session_state.pop('review_feedback', None)
+        if review_feedback:
+            st.success(review_feedback)
+        with db_cursor(read_only=True) as (cursor, conn):
             if not cursor:
                 return
-            # Get opportunities posted by this user
-            cursor.execute("SELECT * FROM Opportunities WHERE created_by_user_id = %s", (user_id,))
-            my_ops = cursor.fetchall()
+            # Get opportunities posted by this user, with applicant counts
+            my_ops = list_posted_opportunities(cursor, user_id)
             
             if not my_ops:
                 st.write("You haven't posted any opportunities.")
                 return
+
+            # Applicant lists are only loaded for the opportunities whose
+            # "Show applicants" toggle is on, all in a single query.
+            expanded_ids = [
+                op['opportunity_id'] for op in my_ops
+                if op['applicant_count'] and st.session_state.get(f"show_apps_{op['opportunity_id']}")
+            ]
+            applicants_by_op = load_applicants(cursor, expanded_ids)
                 
             for op in my_ops:
                 # --- NEW CODE BLOCK: Close, Re-open, and Delete ---
@@ -589,16 +1006,18 @@ def show_opportunities():
                         if st.button("Close", key=f"close_{op['opportunity_id']}", use_container_width=True):
                             with db_cursor() as (cursor, conn):
                                 if cursor:
-                                    cursor.execute("UPDATE Opportunities SET status = 'closed' WHERE opportunity_id = %s", (op['opportunity_id'],))
+                                    cursor.execute(SET_OPPORTUNITY_STATUS_QUERY, ('closed', op['opportunity_id']))
                                     conn.commit()
+                                    invalidate_open_opportunities()
                             st.success("Opportunity closed.")
                             st.rerun()
                     else:
                         if st.button("Re-open", key=f"reopen_{op['opportunity_id']}", use_container_width=True):
                             with db_cursor() as (cursor, conn):
                                 if cursor:
-                                    cursor.execute("UPDATE Opportunities SET status = 'open' WHERE opportunity_id = %s", (op['opportunity_id'],))
+                                    cursor.execute(SET_OPPORTUNITY_STATUS_QUERY, ('open', op['opportunity_id']))
                                     conn.commit()
+                                    invalidate_open_opportunities()
                             st.success("Opportunity re-opened.")
                             st.rerun()
 
@@ -608,28 +1027,25 @@ def show_opportunities():
                             if cursor:
                                 # The 'ON DELETE CASCADE' in your SQL file will
                                 # automatically delete all associated applications.
-                                cursor.execute("DELETE FROM Opportunities WHERE opportunity_id = %s", (op['opportunity_id'],))
+                                cursor.execute(DELETE_OPPORTUNITY_QUERY, (op['opportunity_id'],))
                                 conn.commit()
+                                invalidate_open_opportunities()
                         st.warning("Opportunity deleted.")
                         st.rerun()
                 
-                # Get applicants for this opportunity
-                cursor.execute(
-                    """
-                    SELECT a.application_id, a.status, u.full_name, u.user_id AS student_user_id
-                    FROM Applications a
-                    JOIN Users u ON a.student_user_id = u.user_id
-                    WHERE a.opportunity_id = %s
-                    """,
-                    (op['opportunity_id'],)
-                )
-                applicants = cursor.fetchall()
-                
-                if not applicants:
+                if not op['applicant_count']:
                     st.write("No applicants yet.")
                     st.divider() # Add divider even if no applicants
                     continue
 
+                if not st.toggle(f"Show applicants ({op['applicant_count']})", key=f"show_apps_{op['opportunity_id']}"):
+                    st.divider()
+                    continue
+
+                applicants = applicants_by_op.get(op['opportunity_id'], [])
+                pending = {app['application_id']: app['full_name'] for app in applicants if app['status'] == 'pending'}
+                if len(pending) > 1:
+                    show_bulk_review(user_id, op['opportunity_id'], pending)
                 for app in applicants:
                     col1, col2, col3, col4 = st.columns([2, 1, 1, 1])
                     col1.write(f"Applicant: **{app['full_name']}**")
@@ -647,18 +1063,61 @@ def show_opportunities():
                             with col4a:
                                 if st.button("✅", key=f"approve_{app['application_id']}", help="Approve"):
                                     # Call procedure to approve
-                                    cursor.callproc('sp_ApproveApplication', (app['application_id'],))
-                                    conn.commit()
+                                    with db_cursor() as (write_cursor, write_conn):
+                                        if write_cursor:
+                                            write_cursor.callproc('sp_ApproveApplication', (app['application_id'],))
+                                            write_conn.commit()
+                                            invalidate_open_opportunities(app['student_user_id'])
                                     st.success(f"Approved {app['full_name']}! Project created.")
                                     st.rerun()
                             with col4b:
                                 if st.button("❌", key=f"reject_{app['application_id']}", help="Reject"):
-                                    cursor.execute("UPDATE Applications SET status = 'rejected' WHERE application_id = %s", (app['application_id'],))
-                                    conn.commit()
+                                    with db_cursor() as (write_cursor, write_conn):
+                                        if write_cursor:
+                                            write_cursor.execute(REJECT_APPLICATION_QUERY, (app['application_id'],))
+                                            write_conn.commit()
+                                            invalidate_open_opportunities(app['student_user_id'])
                                     st.warning(f"Rejected {app['full_name']}.")
                                     st.rerun()
                 st.divider()
 
+def show_bulk_review(user_id, opportunity_id, pending):
+    """Approves or rejects several pending applicants in one transaction.
+
+    pending maps application_id to the applicant's name.
+    """
+    with st.expander(f"Bulk review ({len(pending)} pending)"):
+        select_all = st.checkbox("Select all pending", key=f"bulk_all_{opportunity_id}")
+        selected = st.multiselect(
+            "Applicants", list(pending), default=list(pending) if select_all else [],
+            format_func=pending.get, key=f"bulk_pick_{opportunity_id}_{select_all}"
+        )
+        col1, col2 = st.columns(2)
+        approve = col1.button("Approve selected", key=f"bulk_approve_{opportunity_id}", disabled=not selected,
+                              use_container_width=True)
+        reject = col2.button("Reject selected", key=f"bulk_reject_{opportunity_id}", disabled=not selected,
+                             use_container_width=True)
+        if not (approve or reject):
+            return
+
+        status = 'approved' if approve else 'rejected'
+        try:
+            with db_cursor() as (cursor, conn):
+                if not cursor:
+                    return
+                changed = review_applications(cursor, user_id, selected, status)
+                conn.commit()
+        except mysql.connector.Error as e:
+            st.error(f"Error reviewing applications: {e}")
+            return
+        if changed:
+            invalidate_open_opportunities()
+        message = f"{status.capitalize()} {len(changed)} of {len(selected)} selected applications."
+        if len(changed) < len(selected):
+            message += f" {len(selected) - len(changed)} had already been reviewed."
+        st.session_state.review_feedback = message
+        st.rerun()
+
 # -----------------------------------------------------------------
 # UI: CONNECTIONS PAGE
 # -----------------------------------------------------------------
@@ -666,73 +1125,63 @@ def show_opportunities():
 def show_connections():
     st.title("My Connections")
     user_id = st.session_state.user_id
+    pending_after = page_start('pending_request_pages')
+    connections_after = page_start('connection_pages')
+
+    # The three reads are independent; send them together
+    (requests, next_pending), (connections, next_connection), total = rerun_data.prefetch(
+        lambda: get_pending_requests(user_id, pending_after),
+        lambda: get_connections(user_id, connections_after),
+        lambda: get_connection_count(user_id),
+    )
+
+    # --- Pending Requests Received ---
+    st.subheader("Pending Requests")
+    restart_if_empty('pending_request_pages', requests)
+
+    if not requests:
+        st.write("No pending requests.")
+    else:
+        for req in requests:
+            col1, col2, col3 = st.columns(3)
+            col1.write(req['full_name'])
+            if col2.button("Accept", key=f"accept_{req['user_id']}"):
+                respond_to_request(req['user_id'], user_id, 'accepted')
+                st.success("Connection accepted!")
+                st.rerun()
+            if col3.button("Reject", key=f"reject_conn_{req['user_id']}"):
+                respond_to_request(req['user_id'], user_id, 'rejected')
+                st.warning("Connection rejected.")
+                st.rerun()
+        show_page_controls('pending_request_pages', next_pending)
 
-    with db_cursor() as (cursor, conn):
-        if not cursor:
-            return
+    st.divider()
 
-        # --- Pending Requests Received ---
-        st.subheader("Pending Requests")
-        query = """
-            SELECT u.user_id, u.full_name
-            FROM Connections c
-            JOIN Users u ON c.requester_id = u.user_id
-            WHERE c.receiver_id = %s AND c.status = 'pending'
-        """
-        cursor.execute(query, (user_id,))
-        requests = cursor.fetchall()
-        
-        if not requests:
-            st.write("No pending requests.")
-        else:
-            for req in requests:
-                col1, col2, col3 = st.columns(3)
-                col1.write(req['full_name'])
-                if col2.button("Accept", key=f"accept_{req['user_id']}"):
-                    cursor.execute(
-                        "UPDATE Connections SET status = 'accepted' WHERE requester_id = %s AND receiver_id = %s",
-                        (req['user_id'], user_id)
-                    )
-                    conn.commit()
-                    st.success("Connection accepted!")
-                    st.rerun()
-                if col3.button("Reject", key=f"reject_conn_{req['user_id']}"):
-                    cursor.execute(
-                        "UPDATE Connections SET status = 'rejected' WHERE requester_id = %s AND receiver_id = %s",
-                        (req['user_id'], user_id)
-                    )
-                    conn.commit()
-                    st.warning("Connection rejected.")
-                    st.rerun()
-        
-        st.divider()
-        
-        # --- Accepted Connections ---
-        st.subheader("My Connections")
-        query = """
-            SELECT u.user_id, u.full_name, u.role
-            FROM Users u
-            WHERE u.user_id IN (
-                -- Users who sent me a request that I accepted
-                SELECT requester_id FROM Connections WHERE receiver_id = %s AND status = 'accepted'
-                UNION
-                -- Users I sent a request to that they accepted
-                SELECT receiver_id FROM Connections WHERE requester_id = %s AND status = 'accepted'
-            )
-        """
-        cursor.execute(query, (user_id, user_id))
-        connections = cursor.fetchall()
-        
-        if not connections:
-            st.write("You have no connections yet.")
-        else:
-            for conn_user in connections:
-                st.write(f"**{conn_user['full_name']}** ({conn_user['role'].capitalize()})")
-                if st.button("View Profile", key=f"view_conn_{conn_user['user_id']}"):
-                    st.session_state.page = 'profile'
-                    st.session_state.view_profile_id = conn_user['user_id']
-                    st.rerun()
-                st.markdown("---")
+    # --- Accepted Connections ---
+    # Read from the UserConnectionEdges adjacency table, which triggers
+    # on Connections keep in step with the accept/reject updates above.
+    st.subheader(f"My Connections ({total})")
+    restart_if_empty('connection_pages', connections)
+
+    if not connections:
+        st.write("You have no connections yet.")
+    else:
+        for conn_user in connections:
+            st.write(f"**{conn_user['full_name']}** ({conn_user['role'].capitalize()})")
+            if st.button("View Profile", key=f"view_conn_{conn_user['user_id']}"):
+                st.session_state.page = 'profile'
+                st.session_state.view_profile_id = conn_user['user_id']
+                st.rerun()
+            st.markdown("---")
+        show_page_controls('connection_pages', next_connection)
+
+def respond_to_request(requester_id, receiver_id, status):
+    """Accepts or rejects a pending connection request."""
+    with db_cursor() as (cursor, conn):
+        if cursor:
+            cursor.execute(SET_CONNECTION_STATUS_QUERY, (status, requester_id, receiver_id))
+            conn.commit()
+            invalidate_connection(requester_id, receiver_id)
 
 
 # -----------------------------------------------------------------
@@ -745,39 +1194,40 @@ def show_rubric_queries():
         st.error("You do not have permission to view this page.")
         return
 
+    # Archived applications live in files (archive.py); reading them is slower and unpaged
+    include_archived = st.checkbox(
+        "Include archived applications",
+        help=f"Adds applications archived to {ARCHIVE_DIR}/ and shows up to {ARCHIVE_REPORT_ROWS} rows per report."
+    )
+
     st.subheader("1. Nested Query (with GUI)")
     st.write("Find students who applied for opportunities by a specific faculty member.")
     
-    with db_cursor() as (cursor, conn):
+    with db_cursor(dictionary=False, read_only=True) as (cursor, conn):
         if not cursor:
             return
             
         # Get list of faculty/alumni to choose from
-        cursor.execute("SELECT user_id, full_name FROM Users WHERE role IN ('faculty', 'alumni')")
-        faculty_list = cursor.fetchall()
+        faculty_list = get_faculty_list()
         faculty_names = {f['full_name']: f['user_id'] for f in faculty_list}
         
         selected_name = st.selectbox("Select Faculty/Alumni:", faculty_names.keys())
         
         if selected_name:
             faculty_id = faculty_names[selected_name]
-            query = """
-                SELECT u.full_name, u.email
-                FROM Users u
-                WHERE u.user_id IN (
-                    SELECT a.student_user_id
-                    FROM Applications a
-                    WHERE a.opportunity_id IN (
-                        SELECT o.opportunity_id
-                        FROM Opportunities o
-                        WHERE o.created_by_user_id = %s
-                    )
-                )
-            """
-            cursor.execute(query, (faculty_id,))
-            results = cursor.fetchall()
+            # --- RUBRIC: NESTED QUERY ---
+            # Precomputed by triggers into PosterApplicants; see queries.APPLICANTS_OF_POSTER_PAGER
+            state_key = f"rubric_applicant_pages_{faculty_id}"
             st.write(f"Students who applied to {selected_name}'s opportunities:")
-            st.dataframe(results)
+            if include_archived:
+                results = applicants_of_poster_with_archive(cursor, faculty_id, ARCHIVE_DIR)
+                st.dataframe(results[['full_name', 'email']].head(ARCHIVE_REPORT_ROWS))
+            else:
+                results, next_after = applicants_of_poster_frame(
+                    cursor, faculty_id, after=page_start(state_key), limit=LIST_PAGE_SIZE
+                )
+                st.dataframe(results[['full_name', 'email']])
+                show_page_controls(state_key, next_after)
             
     st.divider()
     
@@ -785,19 +1235,21 @@ def show_rubric_queries():
     st.write("Count the number of applications each student has submitted.")
     
     # --- RUBRIC: AGGREGATE QUERY ---
-    query = """
-        SELECT u.full_name, COUNT(a.application_id) AS application_count
-        FROM Users u
-        JOIN Applications a ON u.user_id = a.student_user_id
-        GROUP BY u.user_id, u.full_name
-        ORDER BY application_count DESC
-    """
-    with db_cursor() as (cursor, conn):
+    # Precomputed by triggers into StudentApplicationCounts; see queries.APPLICATIONS_PER_STUDENT_PAGER
+    with db_cursor(dictionary=False, read_only=True) as (cursor, conn):
         if cursor:
-            cursor.execute(query)
-            results = cursor.fetchall()
             st.write("Application count per student:")
-            st.dataframe(results)
+            if include_archived:
+                results = applications_per_student_with_archive(
+                    cursor, get_archived_application_counts(), ARCHIVE_REPORT_ROWS
+                )
+                st.dataframe(results[['full_name', 'application_count']])
+            else:
+                results, next_after = applications_per_student_frame(
+                    cursor, after=page_start('rubric_count_pages'), limit=LIST_PAGE_SIZE
+                )
+                st.dataframe(results[['full_name', 'application_count']])
+                show_page_controls('rubric_count_pages', next_after)
 
     st.divider()
     
@@ -810,15 +1262,109 @@ def show_rubric_queries():
         WHERE o.status = 'open'
     """, language='sql')
 
+    st.divider()
+
+    # Hit rate and evictions of the shared read cache, for tuning CACHE_TTL / CACHE_MAX_ENTRIES
+    with st.expander("Cache statistics"):
+        st.json(get_cache().stats())
+
 
 # -----------------------------------------------------------------
-# MAIN ROUTER
+# UI: ADMIN DIAGNOSTICS PAGE
 # -----------------------------------------------------------------
 
-if not st.session_state.logged_in:
-    if st.session_state.page == 'signup':
-        show_signup_page()
+def show_diagnostics():
+    st.title("Admin: Diagnostics")
+    if st.session_state.role != 'admin':
+        st.error("You do not have permission to view this page.")
+        return
+
+    profiler = get_profiler()
+    snapshot = profiler.snapshot()
+    st.caption(
+        f"Per-statement timings from every session of this server process. Slow queries take "
+        f"{snapshot['slow_query_ms']} ms or more; an N+1 is one statement run "
+        f"{snapshot['n_plus_one_threshold']}+ times in a single rerun."
+    )
+
+    col1, col2 = st.columns(2)
+    col1.download_button(
+        "Export as JSON", json.dumps(snapshot, indent=2, default=str),
+        file_name="apn_query_profile.json", mime="application/json", use_container_width=True
+    )
+    if col2.button("Reset", use_container_width=True):
+        profiler.reset()
+        st.rerun()
+
+    with st.expander("Feed fan-out worker"):
+        st.json(get_feed_worker().stats())
+
+    # Heartbeat progress, lag and reads served per replica (see DB_REPLICAS)
+    with st.expander("Read replicas"):
+        st.json(get_replica_set().stats())
+
+    pages = snapshot['pages']
+    if not pages:
+        st.write("Nothing recorded yet.")
+        return
+
+    # --- Per-page summary ---
+    st.subheader("Pages")
+    st.dataframe(pd.DataFrame([
+        {'page': name, 'runs': stats['runs'], 'queries/run': round(stats['queries_per_run'], 1),
+         'p50 run ms': round(stats['p50_run_ms'], 1), 'p95 run ms': round(stats['p95_run_ms'], 1)}
+        for name, stats in pages.items()
+    ]))
+
+    selected = st.selectbox("Page:", list(pages))
+    stats = pages[selected]
+    bucket_labels = [f"<= {b:g} ms" if b != float('inf') else "slower" for b in HISTOGRAM_BUCKETS_MS]
+    st.write("Rerun time:")
+    st.bar_chart(pd.DataFrame({'runs': stats['run_histogram']}, index=bucket_labels))
+    st.write("Statements, by total time:")
+    st.dataframe(pd.DataFrame([
+        {'sql': sql, 'count': s['count'], 'total ms': round(s['total_ms'], 1), 'mean ms': round(s['mean_ms'], 2),
+         'max ms': round(s['max_ms'], 1), 'rows': s['rows'], 'called from': ", ".join(s['callers'])}
+        for sql, s in sorted(stats['statements'].items(), key=lambda item: -item[1]['total_ms'])
+    ]))
+
+    # --- Findings ---
+    st.subheader("N+1 patterns")
+    if snapshot['n_plus_one']:
+        st.dataframe(pd.DataFrame([
+            {'page': f['page'], 'sql': f['sql'], 'executions': f['executions'],
+             'total ms': round(f['total_ms'], 1), 'called from': ", ".join(f['callers'])}
+            for f in reversed(snapshot['n_plus_one'])
+        ]))
+    else:
+        st.write("None seen.")
+
+    st.subheader("Slow queries")
+    if snapshot['slow_queries']:
+        st.dataframe(pd.DataFrame([
+            {'page': q['page'], 'sql': q['sql'], 'ms': round(q['ms'], 1), 'rows': q['rows'], 'called from': q['caller']}
+            for q in reversed(snapshot['slow_queries'])
+        ]))
     else:
-        show_login_page()
-else:
-    show_main_app()
\ No newline at end of file
+        st.write("None seen.")
+
+
+# -----------------------------------------------------------------
+# MAIN ROUTER
+# -----------------------------------------------------------------
+
+get_feed_worker()  # starts the fan-out thread with the first rerun
+
+# Each rerun is one profiler run of the page being shown
+try:
+    with get_profiler().run(st.session_state.page if st.session_state.logged_in else 'login'):
+        if not st.session_state.logged_in:
+            if st.session_state.page == 'signup':
+                show_signup_page()
+            else:
+                show_login_page()
+        else:
+            show_main_app()
+except ReplicaReadFailed:
+    # The failed replica is out of rotation now; draw the page again from the others or the primary
+    st.rerun()
\ No newline at end of file
@@ -0,0 +1,193 @@
+"""Applies the numbered SQL files in migrations/ on top of the apn.sql schema.
+
+Usage: python migrate.py [--status] [--dry-run] [--host ... --database ...]
+
+Each file runs once and is recorded in SchemaMigrations. Statements that
+fail only because their object already exists (an index, column, table,
+trigger or procedure), or because the index or column they drop is
+already gone, are skipped, so a migration that was interrupted half-way,
+or an object that was created by hand, can be re-run safely. A foreign
+key that cannot be dropped is an error: migrations look up generated
+constraint names instead of guessing them.
+"""
+import argparse
+import hashlib
+import os
+import re
+
+import mysql.connector
+
+from db import add_connection_args, connect
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "migrations")
+MIGRATION_FILE_RE = re.compile(r"^(\d{4})_([\w-]+)\.sql$")
+
+# MySQL error codes meaning "this change is already in place"
+ALREADY_APPLIED_ERRORS = {
+    1050,  # ER_TABLE_EXISTS_ERROR
+    1060,  # ER_DUP_FIELDNAME
+    1061,  # ER_DUP_KEYNAME
+    1304,  # ER_SP_ALREADY_EXISTS
+    1359,  # ER_TRG_ALREADY_EXISTS
+    1826,  # ER_FK_DUP_NAME
+}
+
+# ER_CANT_DROP_FIELD_OR_KEY means "already applied" only for statements
+# that drop indexes or columns; for a foreign key it usually means the
+# name was wrong, and the key is still there.
+ER_CANT_DROP_FIELD_OR_KEY = 1091
+DROP_INDEX_OR_COLUMN_RE = re.compile(r"\bDROP\s+(?:INDEX|KEY|COLUMN)\b", re.IGNORECASE)
+DROP_CONSTRAINT_RE = re.compile(r"\bDROP\s+(?:FOREIGN\s+KEY|CONSTRAINT|PRIMARY\s+KEY)\b", re.IGNORECASE)
+
+CREATE_MIGRATIONS_TABLE = """
+    CREATE TABLE IF NOT EXISTS SchemaMigrations (
+        version INT PRIMARY KEY,
+        name VARCHAR(255) NOT NULL,
+        checksum CHAR(64) NOT NULL,
+        applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+"""
+
+# -----------------------------------------------------------------
+# PARSING
+# -----------------------------------------------------------------
+
+def split_statements(sql):
+    """Splits a SQL script into statements, honouring DELIMITER lines like the mysql client."""
+    statements = []
+    delimiter = ";"
+    buffer = []
+    for line in sql.splitlines():
+        stripped = line.strip()
+        if not buffer and (not stripped or stripped.startswith("--")):
+            continue
+        if stripped.upper().startswith("DELIMITER "):
+            delimiter = stripped.split(None, 1)[1]
+            continue
+        buffer.append(line)
+        if stripped.endswith(delimiter):
+            statement = "\n".join(buffer).strip()
+            statement = statement[:-len(delimiter)].strip()
+            if statement:
+                statements.append(statement)
+            buffer = []
+    tail = "\n".join(buffer).strip()
+    if tail:
+        statements.append(tail)
+    return statements
+
+
+def discover_migrations(directory=MIGRATIONS_DIR):
+    """Returns [(version, name, path)] for every migration file, in version order."""
+    migrations = []
+    for filename in os.listdir(directory):
+        match = MIGRATION_FILE_RE.match(filename)
+        if match:
+            migrations.append((int(match.group(1)), match.group(2), os.path.join(directory, filename)))
+    migrations.sort()
+    versions = [version for version, _, _ in migrations]
+    if len(versions) != len(set(versions)):
+        raise SystemExit(f"Duplicate migration version in {directory}")
+    return migrations
+
+
+def checksum(sql):
+    return hashlib.sha256(sql.encode("utf-8")).hexdigest()
+
+# -----------------------------------------------------------------
+# RUNNER
+# -----------------------------------------------------------------
+
+def applied_migrations(cursor):
+    """Returns {version: checksum} for the migrations already recorded."""
+    cursor.execute(CREATE_MIGRATIONS_TABLE)
+    cursor.execute("SELECT version, checksum FROM SchemaMigrations")
+    return {version: digest for version, digest in cursor.fetchall()}
+
+
+def already_applied(statement, error):
+    """Whether error only means that statement's change is already in place."""
+    if error.errno == ER_CANT_DROP_FIELD_OR_KEY:
+        return bool(DROP_INDEX_OR_COLUMN_RE.search(statement)) and not DROP_CONSTRAINT_RE.search(statement)
+    return error.errno in ALREADY_APPLIED_ERRORS
+
+
+def run_statement(cursor, statement):
+    """Executes one statement. Returns False if it was skipped as already applied."""
+    try:
+        cursor.execute(statement)
+        if cursor.with_rows:
+            cursor.fetchall()
+        return True
+    except mysql.connector.Error as e:
+        if already_applied(statement, e):
+            return False
+        raise
+
+
+def migrate(conn, dry_run=False, log=print):
+    """Applies every pending migration in order and returns their versions."""
+    cursor = conn.cursor()
+    applied = applied_migrations(cursor)
+    newly_applied = []
+
+    for version, name, path in discover_migrations():
+        with open(path, encoding="utf-8") as f:
+            sql = f.read()
+        digest = checksum(sql)
+
+        if version in applied:
+            if applied[version] != digest:
+                log(f"WARNING: {version:04d}_{name} changed after it was applied")
+            continue
+
+        statements = split_statements(sql)
+        log(f"Applying {version:04d}_{name} ({len(statements)} statements)")
+        if dry_run:
+            for statement in statements:
+                log(statement + ";\n")
+            continue
+
+        for statement in statements:
+            if not run_statement(cursor, statement):
+                log(f"  already applied, skipped: {statement.splitlines()[0]}")
+        cursor.execute(
+            "INSERT INTO SchemaMigrations (version, name, checksum) VALUES (%s, %s, %s)",
+            (version, name, digest)
+        )
+        conn.commit()
+        newly_applied.append(version)
+
+    cursor.close()
+    return newly_applied
+
+
+def show_status(conn):
+    cursor = conn.cursor()
+    applied = applied_migrations(cursor)
+    cursor.close()
+    for version, name, _ in discover_migrations():
+        state = "applied" if version in applied else "pending"
+        print(f"{version:04d}_{name:<40} {state}")
+
+
+def main():
+    parser = add_connection_args(argparse.ArgumentParser(description=__doc__.splitlines()[0]))
+    parser.add_argument("--status", action="store_true", help="List applied and pending migrations")
+    parser.add_argument("--dry-run", action="store_true", help="Print pending statements without running them")
+    args = parser.parse_args()
+
+    conn = connect(args)
+    try:
+        if args.status:
+            show_status(conn)
+        else:
+            applied = migrate(conn, dry_run=args.dry_run)
+            if not args.dry_run:
+                print(f"{len(applied)} migration(s) applied.")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,15 @@
+-- Migration 0001: Find Users search indexes
+-- Prefix matching on names and ranked full-text search over names, bios
+-- and skills (used by search.py).
+
+ALTER TABLE Users
+    ADD INDEX idx_users_full_name (full_name);
+
+ALTER TABLE Users
+    ADD FULLTEXT INDEX ft_users_full_name (full_name);
+
+ALTER TABLE Users
+    ADD FULLTEXT INDEX ft_users_bio (bio);
+
+ALTER TABLE Skills
+    ADD FULLTEXT INDEX ft_skills_skill_name (skill_name);
@@ -0,0 +1,39 @@
+-- Migration 0002: Indexes for the hot query predicates in main.py
+-- Every index below names the queries it serves. Foreign-key indexes
+-- that MySQL already creates (Skills/Projects/Experience.user_id,
+-- Opportunities.created_by_user_id, OngoingProjects.*_user_id,
+-- Applications.student_user_id) are not repeated.
+
+-- Connections: pending requests and accepted connections received
+-- (receiver_id = ? AND status = ?), covering the requester_id lookup.
+ALTER TABLE Connections
+    ADD INDEX idx_connections_receiver_status (receiver_id, status, requester_id);
+
+-- Connections: accepted connections sent (requester_id = ? AND status = ?)
+ALTER TABLE Connections
+    ADD INDEX idx_connections_requester_status (requester_id, status, receiver_id);
+
+-- Opportunities: open listing, newest first (status = 'open' ORDER BY opportunity_id DESC)
+ALTER TABLE Opportunities
+    ADD INDEX idx_opportunities_status (status, opportunity_id);
+
+-- Opportunities: "My Posted Opportunities" filtered by poster and status
+ALTER TABLE Opportunities
+    ADD INDEX idx_opportunities_creator_status (created_by_user_id, status);
+
+-- Users: faculty/alumni picker on the admin rubric page (role IN (...))
+ALTER TABLE Users
+    ADD INDEX idx_users_role (role);
+
+-- Applications: a student may apply to an opportunity only once. Remove
+-- existing duplicates first, keeping the earliest application.
+DELETE a FROM Applications a
+JOIN Applications earlier
+  ON earlier.opportunity_id = a.opportunity_id
+ AND earlier.student_user_id = a.student_user_id
+ AND earlier.application_id < a.application_id;
+
+-- Also serves applicant lists (opportunity_id = ? / IN (...)) and the
+-- "already applied?" lookup (opportunity_id = ? AND student_user_id = ?).
+ALTER TABLE Applications
+    ADD UNIQUE INDEX uq_applications_opportunity_student (opportunity_id, student_user_id);
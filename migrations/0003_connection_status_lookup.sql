@@ -0,0 +1,37 @@
+-- Migration 0003: Index-friendly fn_GetConnectionStatus
+-- The original OR across both directions defeats the primary key, and
+-- SELECT ... INTO failed outright when requests existed in both
+-- directions. Two primary-key lookups joined by UNION ALL replace it;
+-- when both directions exist the most advanced status wins.
+
+DROP FUNCTION IF EXISTS fn_GetConnectionStatus;
+
+DELIMITER $$
+CREATE FUNCTION fn_GetConnectionStatus(
+    f_user_id_1 INT,
+    f_user_id_2 INT
+)
+RETURNS VARCHAR(10)
+DETERMINISTIC
+READS SQL DATA
+BEGIN
+    DECLARE conn_status VARCHAR(10);
+
+    SELECT c.status INTO conn_status
+    FROM (
+        SELECT status FROM Connections
+        WHERE requester_id = f_user_id_1 AND receiver_id = f_user_id_2
+        UNION ALL
+        SELECT status FROM Connections
+        WHERE requester_id = f_user_id_2 AND receiver_id = f_user_id_1
+    ) c
+    ORDER BY FIELD(c.status, 'accepted', 'pending', 'rejected')
+    LIMIT 1;
+
+    IF conn_status IS NULL THEN
+        RETURN 'none';
+    ELSE
+        RETURN conn_status;
+    END IF;
+END$$
+DELIMITER ;
@@ -0,0 +1,117 @@
+-- Migration 0004: Materialized adjacency for "My Connections"
+-- UserConnectionEdges holds one row per direction of every accepted
+-- connection, so listing a user's connections is a single primary-key
+-- range read. UserConnectionCounts keeps the matching degree per user.
+-- Both are maintained by triggers on Connections, covering the INSERT
+-- (send request) and UPDATE (accept/reject) paths in main.py.
+--
+-- Foreign-key cascades do not fire triggers, so deleting a user leaves
+-- the counts of their former connections one too high; the app never
+-- deletes users.
+
+CREATE TABLE IF NOT EXISTS UserConnectionEdges (
+    user_id INT NOT NULL,
+    other_user_id INT NOT NULL,
+    connected_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (user_id, other_user_id),
+    FOREIGN KEY (user_id) REFERENCES Users(user_id) ON DELETE CASCADE,
+    FOREIGN KEY (other_user_id) REFERENCES Users(user_id) ON DELETE CASCADE
+);
+
+CREATE TABLE IF NOT EXISTS UserConnectionCounts (
+    user_id INT PRIMARY KEY,
+    connection_count INT NOT NULL DEFAULT 0,
+    FOREIGN KEY (user_id) REFERENCES Users(user_id) ON DELETE CASCADE
+);
+
+-- Adds both directions of an edge and bumps both counts, once.
+DROP PROCEDURE IF EXISTS sp_AddConnectionEdge;
+DELIMITER $$
+CREATE PROCEDURE sp_AddConnectionEdge(
+    IN p_user_a INT,
+    IN p_user_b INT
+)
+BEGIN
+    INSERT IGNORE INTO UserConnectionEdges(user_id, other_user_id)
+    VALUES (p_user_a, p_user_b), (p_user_b, p_user_a);
+
+    IF ROW_COUNT() > 0 THEN
+        INSERT INTO UserConnectionCounts(user_id, connection_count)
+        VALUES (p_user_a, 1), (p_user_b, 1)
+        ON DUPLICATE KEY UPDATE connection_count = connection_count + 1;
+    END IF;
+END$$
+DELIMITER ;
+
+-- Removes an edge unless the opposite request is still accepted.
+DROP PROCEDURE IF EXISTS sp_RemoveConnectionEdge;
+DELIMITER $$
+CREATE PROCEDURE sp_RemoveConnectionEdge(
+    IN p_requester_id INT,
+    IN p_receiver_id INT
+)
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1 FROM Connections
+        WHERE requester_id = p_receiver_id AND receiver_id = p_requester_id AND status = 'accepted'
+    ) THEN
+        DELETE FROM UserConnectionEdges
+        WHERE (user_id = p_requester_id AND other_user_id = p_receiver_id)
+           OR (user_id = p_receiver_id AND other_user_id = p_requester_id);
+
+        IF ROW_COUNT() > 0 THEN
+            UPDATE UserConnectionCounts
+            SET connection_count = connection_count - 1
+            WHERE user_id IN (p_requester_id, p_receiver_id);
+        END IF;
+    END IF;
+END$$
+DELIMITER ;
+
+DROP TRIGGER IF EXISTS tr_AfterConnectionInsert;
+DELIMITER $$
+CREATE TRIGGER tr_AfterConnectionInsert
+AFTER INSERT ON Connections
+FOR EACH ROW
+BEGIN
+    IF NEW.status = 'accepted' THEN
+        CALL sp_AddConnectionEdge(NEW.requester_id, NEW.receiver_id);
+    END IF;
+END$$
+DELIMITER ;
+
+DROP TRIGGER IF EXISTS tr_AfterConnectionUpdate;
+DELIMITER $$
+CREATE TRIGGER tr_AfterConnectionUpdate
+AFTER UPDATE ON Connections
+FOR EACH ROW
+BEGIN
+    IF NEW.status = 'accepted' AND OLD.status <> 'accepted' THEN
+        CALL sp_AddConnectionEdge(NEW.requester_id, NEW.receiver_id);
+    ELSEIF OLD.status = 'accepted' AND NEW.status <> 'accepted' THEN
+        CALL sp_RemoveConnectionEdge(OLD.requester_id, OLD.receiver_id);
+    END IF;
+END$$
+DELIMITER ;
+
+DROP TRIGGER IF EXISTS tr_AfterConnectionDelete;
+DELIMITER $$
+CREATE TRIGGER tr_AfterConnectionDelete
+AFTER DELETE ON Connections
+FOR EACH ROW
+BEGIN
+    IF OLD.status = 'accepted' THEN
+        CALL sp_RemoveConnectionEdge(OLD.requester_id, OLD.receiver_id);
+    END IF;
+END$$
+DELIMITER ;
+
+-- Backfill from the connections accepted so far
+INSERT IGNORE INTO UserConnectionEdges(user_id, other_user_id, connected_at)
+SELECT requester_id, receiver_id, requested_at FROM Connections WHERE status = 'accepted'
+UNION ALL
+SELECT receiver_id, requester_id, requested_at FROM Connections WHERE status = 'accepted';
+
+INSERT INTO UserConnectionCounts(user_id, connection_count)
+SELECT user_id, COUNT(*) FROM UserConnectionEdges GROUP BY user_id
+ON DUPLICATE KEY UPDATE connection_count = VALUES(connection_count);
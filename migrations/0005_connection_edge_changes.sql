@@ -0,0 +1,64 @@
+-- Migration 0005: Change log for the connection graph
+-- Every edge added to or removed from UserConnectionEdges is appended to
+-- ConnectionEdgeChanges, so the in-process graph (graph.py) can catch up
+-- by reading the changes after the last change_id it has seen instead of
+-- reloading every edge. graph.prune_changes() deletes changes older than
+-- a retention period (archive.py runs it nightly); a graph that had not
+-- caught up with them reloads.
+
+CREATE TABLE IF NOT EXISTS ConnectionEdgeChanges (
+    change_id BIGINT AUTO_INCREMENT PRIMARY KEY,
+    user_a INT NOT NULL,
+    user_b INT NOT NULL,
+    added BOOLEAN NOT NULL,
+    changed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    INDEX idx_connection_edge_changes_changed_at (changed_at)
+);
+
+DROP PROCEDURE IF EXISTS sp_AddConnectionEdge;
+DELIMITER $$
+CREATE PROCEDURE sp_AddConnectionEdge(
+    IN p_user_a INT,
+    IN p_user_b INT
+)
+BEGIN
+    INSERT IGNORE INTO UserConnectionEdges(user_id, other_user_id)
+    VALUES (p_user_a, p_user_b), (p_user_b, p_user_a);
+
+    IF ROW_COUNT() > 0 THEN
+        INSERT INTO UserConnectionCounts(user_id, connection_count)
+        VALUES (p_user_a, 1), (p_user_b, 1)
+        ON DUPLICATE KEY UPDATE connection_count = connection_count + 1;
+
+        INSERT INTO ConnectionEdgeChanges(user_a, user_b, added)
+        VALUES (p_user_a, p_user_b, TRUE);
+    END IF;
+END$$
+DELIMITER ;
+
+DROP PROCEDURE IF EXISTS sp_RemoveConnectionEdge;
+DELIMITER $$
+CREATE PROCEDURE sp_RemoveConnectionEdge(
+    IN p_requester_id INT,
+    IN p_receiver_id INT
+)
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1 FROM Connections
+        WHERE requester_id = p_receiver_id AND receiver_id = p_requester_id AND status = 'accepted'
+    ) THEN
+        DELETE FROM UserConnectionEdges
+        WHERE (user_id = p_requester_id AND other_user_id = p_receiver_id)
+           OR (user_id = p_receiver_id AND other_user_id = p_requester_id);
+
+        IF ROW_COUNT() > 0 THEN
+            UPDATE UserConnectionCounts
+            SET connection_count = connection_count - 1
+            WHERE user_id IN (p_requester_id, p_receiver_id);
+
+            INSERT INTO ConnectionEdgeChanges(user_a, user_b, added)
+            VALUES (p_requester_id, p_receiver_id, FALSE);
+        END IF;
+    END IF;
+END$$
+DELIMITER ;
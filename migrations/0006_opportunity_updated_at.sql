@@ -0,0 +1,9 @@
+-- Migration 0006: Change tracking for Opportunities
+-- updated_at moves whenever an opportunity is posted, closed or re-opened,
+-- so the recommender (recommend.py) can pick up just the rows that changed.
+
+ALTER TABLE Opportunities
+    ADD COLUMN updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP;
+
+ALTER TABLE Opportunities
+    ADD INDEX idx_opportunities_updated_at (updated_at);
@@ -0,0 +1,144 @@
+-- Migration 0007: Rollups for the application reports
+-- The admin rubric reports and the faculty dashboard read these instead
+-- of aggregating Applications on every page load:
+--   StudentApplicationCounts   applications per student
+--   OpportunityApplicantCounts applicants per opportunity
+--   PosterApplicants           the students who applied to anything a
+--                              user posted, with how many of their
+--                              opportunities each one applied to
+-- Triggers on Applications keep them in step row by row. Deleting an
+-- opportunity removes its applications through a foreign-key cascade,
+-- which does not fire triggers, so tr_BeforeOpportunityDelete takes
+-- them out of the rollups first. As in 0004, deleting users is not
+-- covered; sp_RebuildApplicationRollups recomputes everything if the
+-- rollups ever need repairing.
+
+CREATE TABLE IF NOT EXISTS StudentApplicationCounts (
+    student_user_id INT PRIMARY KEY,
+    application_count INT NOT NULL DEFAULT 0,
+    INDEX idx_student_application_counts_count (application_count, student_user_id),
+    FOREIGN KEY (student_user_id) REFERENCES Users(user_id) ON DELETE CASCADE
+);
+
+CREATE TABLE IF NOT EXISTS OpportunityApplicantCounts (
+    opportunity_id INT PRIMARY KEY,
+    applicant_count INT NOT NULL DEFAULT 0,
+    FOREIGN KEY (opportunity_id) REFERENCES Opportunities(opportunity_id) ON DELETE CASCADE
+);
+
+CREATE TABLE IF NOT EXISTS PosterApplicants (
+    poster_user_id INT NOT NULL,
+    student_user_id INT NOT NULL,
+    application_count INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (poster_user_id, student_user_id),
+    FOREIGN KEY (poster_user_id) REFERENCES Users(user_id) ON DELETE CASCADE,
+    FOREIGN KEY (student_user_id) REFERENCES Users(user_id) ON DELETE CASCADE
+);
+
+DROP TRIGGER IF EXISTS tr_AfterApplicationInsert;
+DELIMITER $$
+CREATE TRIGGER tr_AfterApplicationInsert
+AFTER INSERT ON Applications
+FOR EACH ROW
+BEGIN
+    INSERT INTO StudentApplicationCounts(student_user_id, application_count)
+    VALUES (NEW.student_user_id, 1)
+    ON DUPLICATE KEY UPDATE application_count = application_count + 1;
+
+    INSERT INTO OpportunityApplicantCounts(opportunity_id, applicant_count)
+    VALUES (NEW.opportunity_id, 1)
+    ON DUPLICATE KEY UPDATE applicant_count = applicant_count + 1;
+
+    INSERT INTO PosterApplicants(poster_user_id, student_user_id, application_count)
+    SELECT created_by_user_id, NEW.student_user_id, 1
+    FROM Opportunities WHERE opportunity_id = NEW.opportunity_id
+    ON DUPLICATE KEY UPDATE application_count = application_count + 1;
+END$$
+DELIMITER ;
+
+DROP TRIGGER IF EXISTS tr_AfterApplicationDelete;
+DELIMITER $$
+CREATE TRIGGER tr_AfterApplicationDelete
+AFTER DELETE ON Applications
+FOR EACH ROW
+BEGIN
+    DECLARE v_poster_user_id INT;
+
+    SELECT created_by_user_id INTO v_poster_user_id
+    FROM Opportunities
+    WHERE opportunity_id = OLD.opportunity_id;
+
+    UPDATE StudentApplicationCounts
+    SET application_count = application_count - 1
+    WHERE student_user_id = OLD.student_user_id;
+    DELETE FROM StudentApplicationCounts
+    WHERE student_user_id = OLD.student_user_id AND application_count <= 0;
+
+    UPDATE OpportunityApplicantCounts
+    SET applicant_count = applicant_count - 1
+    WHERE opportunity_id = OLD.opportunity_id;
+
+    UPDATE PosterApplicants
+    SET application_count = application_count - 1
+    WHERE poster_user_id = v_poster_user_id AND student_user_id = OLD.student_user_id;
+    DELETE FROM PosterApplicants
+    WHERE poster_user_id = v_poster_user_id AND student_user_id = OLD.student_user_id
+      AND application_count <= 0;
+END$$
+DELIMITER ;
+
+-- The opportunity's own OpportunityApplicantCounts row goes with the
+-- cascade; its applications are subtracted from the other two rollups.
+DROP TRIGGER IF EXISTS tr_BeforeOpportunityDelete;
+DELIMITER $$
+CREATE TRIGGER tr_BeforeOpportunityDelete
+BEFORE DELETE ON Opportunities
+FOR EACH ROW
+BEGIN
+    UPDATE StudentApplicationCounts s
+    JOIN (
+        SELECT student_user_id, COUNT(*) AS n
+        FROM Applications
+        WHERE opportunity_id = OLD.opportunity_id
+        GROUP BY student_user_id
+    ) a ON a.student_user_id = s.student_user_id
+    SET s.application_count = s.application_count - a.n;
+    DELETE FROM StudentApplicationCounts WHERE application_count <= 0;
+
+    UPDATE PosterApplicants p
+    JOIN (
+        SELECT student_user_id, COUNT(*) AS n
+        FROM Applications
+        WHERE opportunity_id = OLD.opportunity_id
+        GROUP BY student_user_id
+    ) a ON a.student_user_id = p.student_user_id
+    SET p.application_count = p.application_count - a.n
+    WHERE p.poster_user_id = OLD.created_by_user_id;
+    DELETE FROM PosterApplicants
+    WHERE poster_user_id = OLD.created_by_user_id AND application_count <= 0;
+END$$
+DELIMITER ;
+
+-- Recomputes all three rollups from Applications (also the backfill).
+DROP PROCEDURE IF EXISTS sp_RebuildApplicationRollups;
+DELIMITER $$
+CREATE PROCEDURE sp_RebuildApplicationRollups()
+BEGIN
+    DELETE FROM StudentApplicationCounts;
+    INSERT INTO StudentApplicationCounts(student_user_id, application_count)
+    SELECT student_user_id, COUNT(*) FROM Applications GROUP BY student_user_id;
+
+    DELETE FROM OpportunityApplicantCounts;
+    INSERT INTO OpportunityApplicantCounts(opportunity_id, applicant_count)
+    SELECT opportunity_id, COUNT(*) FROM Applications GROUP BY opportunity_id;
+
+    DELETE FROM PosterApplicants;
+    INSERT INTO PosterApplicants(poster_user_id, student_user_id, application_count)
+    SELECT o.created_by_user_id, a.student_user_id, COUNT(*)
+    FROM Applications a
+    JOIN Opportunities o ON o.opportunity_id = a.opportunity_id
+    GROUP BY o.created_by_user_id, a.student_user_id;
+END$$
+DELIMITER ;
+
+CALL sp_RebuildApplicationRollups();
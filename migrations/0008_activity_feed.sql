@@ -0,0 +1,78 @@
+-- Migration 0008: Activity feed
+-- Triggers append one FeedEvents row per event, inside the transaction
+-- of the write that caused it:
+--   opportunity_posted    actor = poster
+--   application_approved  actor = the student (also the target)
+--   connection_accepted   actor = the user who accepted, target = requester
+-- feed.py's worker then fans each event out to UserFeed, one row per
+-- reader: the target plus every connection of the actor. Actors with
+-- more connections than the worker's degree limit are marked 'pull'
+-- instead; their events reach only the target's timeline, and readers
+-- merge them in from FeedEvents (via FeedPullActors) when they read.
+-- A feed page is then one range scan of UserFeed's primary key.
+
+CREATE TABLE IF NOT EXISTS FeedEvents (
+    event_id BIGINT AUTO_INCREMENT PRIMARY KEY,
+    event_type ENUM('opportunity_posted', 'application_approved', 'connection_accepted') NOT NULL,
+    actor_user_id INT NOT NULL,
+    target_user_id INT NULL,
+    opportunity_id INT NULL,
+    delivery ENUM('pending', 'push', 'pull') NOT NULL DEFAULT 'pending',
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    INDEX idx_feed_events_delivery (delivery, event_id),
+    INDEX idx_feed_events_actor (actor_user_id, delivery, event_id),
+    FOREIGN KEY (actor_user_id) REFERENCES Users(user_id) ON DELETE CASCADE,
+    FOREIGN KEY (target_user_id) REFERENCES Users(user_id) ON DELETE CASCADE,
+    FOREIGN KEY (opportunity_id) REFERENCES Opportunities(opportunity_id) ON DELETE CASCADE
+);
+
+CREATE TABLE IF NOT EXISTS UserFeed (
+    user_id INT NOT NULL,
+    event_id BIGINT NOT NULL,
+    PRIMARY KEY (user_id, event_id),
+    FOREIGN KEY (user_id) REFERENCES Users(user_id) ON DELETE CASCADE,
+    FOREIGN KEY (event_id) REFERENCES FeedEvents(event_id) ON DELETE CASCADE
+);
+
+-- Actors with at least one 'pull' event
+CREATE TABLE IF NOT EXISTS FeedPullActors (
+    user_id INT PRIMARY KEY,
+    FOREIGN KEY (user_id) REFERENCES Users(user_id) ON DELETE CASCADE
+);
+
+DROP TRIGGER IF EXISTS tr_FeedOpportunityPosted;
+DELIMITER $$
+CREATE TRIGGER tr_FeedOpportunityPosted
+AFTER INSERT ON Opportunities
+FOR EACH ROW
+BEGIN
+    INSERT INTO FeedEvents(event_type, actor_user_id, opportunity_id)
+    VALUES ('opportunity_posted', NEW.created_by_user_id, NEW.opportunity_id);
+END$$
+DELIMITER ;
+
+DROP TRIGGER IF EXISTS tr_FeedApplicationApproved;
+DELIMITER $$
+CREATE TRIGGER tr_FeedApplicationApproved
+AFTER UPDATE ON Applications
+FOR EACH ROW
+BEGIN
+    IF NEW.status = 'approved' AND OLD.status <> 'approved' THEN
+        INSERT INTO FeedEvents(event_type, actor_user_id, target_user_id, opportunity_id)
+        VALUES ('application_approved', NEW.student_user_id, NEW.student_user_id, NEW.opportunity_id);
+    END IF;
+END$$
+DELIMITER ;
+
+DROP TRIGGER IF EXISTS tr_FeedConnectionAccepted;
+DELIMITER $$
+CREATE TRIGGER tr_FeedConnectionAccepted
+AFTER UPDATE ON Connections
+FOR EACH ROW
+BEGIN
+    IF NEW.status = 'accepted' AND OLD.status <> 'accepted' THEN
+        INSERT INTO FeedEvents(event_type, actor_user_id, target_user_id)
+        VALUES ('connection_accepted', NEW.receiver_id, NEW.requester_id);
+    END IF;
+END$$
+DELIMITER ;
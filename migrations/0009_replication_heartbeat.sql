@@ -0,0 +1,12 @@
+-- Migration 0009: Replication heartbeat
+-- Each app process (db.ReplicaSet) keeps one row here on the primary and
+-- bumps seq every check interval. Reading the row back on a replica
+-- tells which heartbeat, and so which point in the primary's commit
+-- history, that replica has applied. Replicas get the table through
+-- replication like any other.
+
+CREATE TABLE IF NOT EXISTS ReplicationHeartbeat (
+    source VARCHAR(128) PRIMARY KEY,
+    seq BIGINT NOT NULL,
+    beat_at TIMESTAMP(6) NOT NULL
+);
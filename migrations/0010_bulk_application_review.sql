@@ -0,0 +1,96 @@
+-- Migration 0010: Bulk application review
+-- sp_ReviewApplications approves or rejects a whole list of applications
+-- (a JSON array of application_ids) with set-based statements: one
+-- UPDATE of Applications and, for approvals, one INSERT ... SELECT each
+-- into OngoingProjects and FeedEvents. Only pending applications to the
+-- reviewer's own opportunities change; the rest of the list is ignored.
+-- The changed rows come back as a result set (application_id,
+-- student_user_id). The caller commits, so a review is all or nothing.
+--
+-- The per-row triggers that do the same work for single approvals
+-- (tr_AfterApplicationApproved, tr_FeedApplicationApproved) step aside
+-- while the session variable @apn_bulk_review is set, which only the
+-- procedure does. Needs MySQL 8.0 (JSON_TABLE).
+
+DROP TRIGGER IF EXISTS tr_AfterApplicationApproved;
+DELIMITER $$
+CREATE TRIGGER tr_AfterApplicationApproved
+AFTER UPDATE ON Applications
+FOR EACH ROW
+BEGIN
+    IF NEW.status = 'approved' AND OLD.status <> 'approved' AND @apn_bulk_review IS NULL THEN
+        INSERT INTO OngoingProjects(opportunity_id, student_user_id, faculty_user_id)
+        SELECT NEW.opportunity_id, NEW.student_user_id, created_by_user_id
+        FROM Opportunities WHERE opportunity_id = NEW.opportunity_id;
+    END IF;
+END$$
+DELIMITER ;
+
+DROP TRIGGER IF EXISTS tr_FeedApplicationApproved;
+DELIMITER $$
+CREATE TRIGGER tr_FeedApplicationApproved
+AFTER UPDATE ON Applications
+FOR EACH ROW
+BEGIN
+    IF NEW.status = 'approved' AND OLD.status <> 'approved' AND @apn_bulk_review IS NULL THEN
+        INSERT INTO FeedEvents(event_type, actor_user_id, target_user_id, opportunity_id)
+        VALUES ('application_approved', NEW.student_user_id, NEW.student_user_id, NEW.opportunity_id);
+    END IF;
+END$$
+DELIMITER ;
+
+DROP PROCEDURE IF EXISTS sp_ReviewApplications;
+DELIMITER $$
+CREATE PROCEDURE sp_ReviewApplications(
+    IN p_reviewer_id INT,
+    IN p_application_ids JSON,
+    IN p_status ENUM('approved', 'rejected')
+)
+BEGIN
+    DECLARE EXIT HANDLER FOR SQLEXCEPTION
+    BEGIN
+        SET @apn_bulk_review = NULL;
+        DROP TEMPORARY TABLE IF EXISTS tmp_reviewed_applications;
+        RESIGNAL;
+    END;
+
+    DROP TEMPORARY TABLE IF EXISTS tmp_reviewed_applications;
+    CREATE TEMPORARY TABLE tmp_reviewed_applications (
+        application_id INT PRIMARY KEY,
+        opportunity_id INT NOT NULL,
+        student_user_id INT NOT NULL,
+        poster_user_id INT NOT NULL
+    ) ENGINE = MEMORY;
+
+    -- Lock the rows being reviewed so a concurrent review cannot change them first
+    INSERT IGNORE INTO tmp_reviewed_applications(application_id, opportunity_id, student_user_id, poster_user_id)
+    SELECT a.application_id, a.opportunity_id, a.student_user_id, o.created_by_user_id
+    FROM JSON_TABLE(p_application_ids, '$[*]' COLUMNS (application_id INT PATH '$')) j
+    JOIN Applications a ON a.application_id = j.application_id
+    JOIN Opportunities o ON o.opportunity_id = a.opportunity_id
+    WHERE o.created_by_user_id = p_reviewer_id AND a.status = 'pending'
+    FOR UPDATE;
+
+    SET @apn_bulk_review = 1;
+
+    UPDATE Applications a
+    JOIN tmp_reviewed_applications t ON t.application_id = a.application_id
+    SET a.status = p_status;
+
+    IF p_status = 'approved' THEN
+        INSERT INTO OngoingProjects(opportunity_id, student_user_id, faculty_user_id)
+        SELECT opportunity_id, student_user_id, poster_user_id
+        FROM tmp_reviewed_applications;
+
+        INSERT INTO FeedEvents(event_type, actor_user_id, target_user_id, opportunity_id)
+        SELECT 'application_approved', student_user_id, student_user_id, opportunity_id
+        FROM tmp_reviewed_applications
+        ORDER BY application_id;
+    END IF;
+
+    SET @apn_bulk_review = NULL;
+
+    SELECT application_id, student_user_id FROM tmp_reviewed_applications ORDER BY application_id;
+    DROP TEMPORARY TABLE tmp_reviewed_applications;
+END$$
+DELIMITER ;
@@ -0,0 +1,155 @@
+-- Migration 0011: Time-partitioned Applications and UserAuditLog
+-- Both tables are range-partitioned by time (Applications by year of
+-- applied_at, UserAuditLog by month of log_time), so archive.py can
+-- export a whole old partition to a compressed file and drop it, which
+-- keeps the indexes the live queries use down to the retained data.
+-- archive.py also adds the partitions ahead of time; pfuture catches
+-- anything past the last one.
+--
+-- InnoDB cannot partition a table that has foreign keys, and every
+-- unique key must contain the partitioning column. For Applications
+-- that means:
+--   - the primary key becomes (application_id, applied_at);
+--   - the one-application-per-student rule of uq_applications_opportunity_student
+--     (0002) moves to ApplicationKeys, an unpartitioned table with one
+--     (opportunity_id, student_user_id) primary key per application.
+--     tr_BeforeApplicationInsert inserts the key, so a second
+--     application fails on the key with error 1062, and ApplicationKeys'
+--     own foreign keys do the checks the Applications ones did (1452).
+--     Archiving drops partitions, not keys, so a student still cannot
+--     apply again once the application has been archived;
+--   - the ON DELETE CASCADEs from Opportunities and Users become
+--     triggers (ApplicationKeys keeps its cascades). Deleting the applications explicitly fires
+--     tr_AfterApplicationDelete, which keeps the 0007 rollups in step,
+--     so tr_BeforeOpportunityDelete no longer subtracts them itself.
+-- The rollups count the applications still in the table; archive.py
+-- subtracts a partition's applications before dropping it, and records
+-- every archived partition in ArchivedPartitions.
+
+CREATE TABLE IF NOT EXISTS ArchivedPartitions (
+    table_name VARCHAR(64) NOT NULL,
+    partition_name VARCHAR(64) NOT NULL,
+    row_count BIGINT NOT NULL,
+    file_path VARCHAR(512) NOT NULL,
+    archived_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (table_name, partition_name)
+);
+
+-- -----------------------------------------------------------------
+-- Applications
+-- -----------------------------------------------------------------
+
+CREATE TABLE IF NOT EXISTS ApplicationKeys (
+    opportunity_id INT NOT NULL,
+    student_user_id INT NOT NULL,
+    PRIMARY KEY (opportunity_id, student_user_id),
+    FOREIGN KEY (opportunity_id) REFERENCES Opportunities(opportunity_id) ON DELETE CASCADE,
+    FOREIGN KEY (student_user_id) REFERENCES Users(user_id) ON DELETE CASCADE
+);
+
+INSERT IGNORE INTO ApplicationKeys (opportunity_id, student_user_id)
+SELECT opportunity_id, student_user_id FROM Applications;
+
+-- The foreign keys were created unnamed in apn.sql, so their generated
+-- names are looked up rather than assumed (Applications_ibfk_1, ...).
+DROP PROCEDURE IF EXISTS sp_DropApplicationForeignKeys;
+DELIMITER $$
+CREATE PROCEDURE sp_DropApplicationForeignKeys()
+BEGIN
+    DECLARE fk_name VARCHAR(64);
+    SET fk_name = (SELECT CONSTRAINT_NAME FROM information_schema.REFERENTIAL_CONSTRAINTS
+                   WHERE CONSTRAINT_SCHEMA = DATABASE() AND TABLE_NAME = 'Applications' LIMIT 1);
+    WHILE fk_name IS NOT NULL DO
+        SET @drop_fk = CONCAT('ALTER TABLE Applications DROP FOREIGN KEY `', fk_name, '`');
+        PREPARE drop_fk FROM @drop_fk;
+        EXECUTE drop_fk;
+        DEALLOCATE PREPARE drop_fk;
+        SET fk_name = (SELECT CONSTRAINT_NAME FROM information_schema.REFERENTIAL_CONSTRAINTS
+                       WHERE CONSTRAINT_SCHEMA = DATABASE() AND TABLE_NAME = 'Applications' LIMIT 1);
+    END WHILE;
+END$$
+DELIMITER ;
+
+CALL sp_DropApplicationForeignKeys();
+
+DROP PROCEDURE sp_DropApplicationForeignKeys;
+
+ALTER TABLE Applications
+    ADD INDEX idx_applications_opportunity_student (opportunity_id, student_user_id);
+
+ALTER TABLE Applications DROP INDEX uq_applications_opportunity_student;
+
+ALTER TABLE Applications
+    MODIFY applied_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    DROP PRIMARY KEY,
+    ADD PRIMARY KEY (application_id, applied_at);
+
+ALTER TABLE Applications
+PARTITION BY RANGE (UNIX_TIMESTAMP(applied_at)) (
+    PARTITION p_before_2025 VALUES LESS THAN (UNIX_TIMESTAMP('2025-01-01 00:00:00')),
+    PARTITION p2025 VALUES LESS THAN (UNIX_TIMESTAMP('2026-01-01 00:00:00')),
+    PARTITION p2026 VALUES LESS THAN (UNIX_TIMESTAMP('2027-01-01 00:00:00')),
+    PARTITION pfuture VALUES LESS THAN MAXVALUE
+);
+
+DROP TRIGGER IF EXISTS tr_BeforeApplicationInsert;
+DELIMITER $$
+CREATE TRIGGER tr_BeforeApplicationInsert
+BEFORE INSERT ON Applications
+FOR EACH ROW
+BEGIN
+    DECLARE EXIT HANDLER FOR 1062
+        SIGNAL SQLSTATE '23000'
+            SET MESSAGE_TEXT = 'This student has already applied to this opportunity', MYSQL_ERRNO = 1062;
+    DECLARE EXIT HANDLER FOR 1452
+        SIGNAL SQLSTATE '23000'
+            SET MESSAGE_TEXT = 'Application for an unknown opportunity or student', MYSQL_ERRNO = 1452;
+
+    INSERT INTO ApplicationKeys (opportunity_id, student_user_id)
+    VALUES (NEW.opportunity_id, NEW.student_user_id);
+END$$
+DELIMITER ;
+
+DROP TRIGGER IF EXISTS tr_BeforeOpportunityDelete;
+DELIMITER $$
+CREATE TRIGGER tr_BeforeOpportunityDelete
+BEFORE DELETE ON Opportunities
+FOR EACH ROW
+BEGIN
+    DELETE FROM Applications WHERE opportunity_id = OLD.opportunity_id;
+END$$
+DELIMITER ;
+
+-- A user's own applications, and applications to the opportunities the
+-- user posted (those go through the Opportunities cascade, which does
+-- not fire tr_BeforeOpportunityDelete).
+DROP TRIGGER IF EXISTS tr_BeforeUserDelete;
+DELIMITER $$
+CREATE TRIGGER tr_BeforeUserDelete
+BEFORE DELETE ON Users
+FOR EACH ROW
+BEGIN
+    DELETE FROM Applications WHERE student_user_id = OLD.user_id;
+    DELETE a FROM Applications a
+    JOIN Opportunities o ON o.opportunity_id = a.opportunity_id
+    WHERE o.created_by_user_id = OLD.user_id;
+END$$
+DELIMITER ;
+
+-- -----------------------------------------------------------------
+-- UserAuditLog
+-- -----------------------------------------------------------------
+
+ALTER TABLE UserAuditLog
+    MODIFY log_time TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    DROP PRIMARY KEY,
+    ADD PRIMARY KEY (log_id, log_time);
+
+ALTER TABLE UserAuditLog
+PARTITION BY RANGE (UNIX_TIMESTAMP(log_time)) (
+    PARTITION p_before_202610 VALUES LESS THAN (UNIX_TIMESTAMP('2026-10-01 00:00:00')),
+    PARTITION p202610 VALUES LESS THAN (UNIX_TIMESTAMP('2026-11-01 00:00:00')),
+    PARTITION p202611 VALUES LESS THAN (UNIX_TIMESTAMP('2026-12-01 00:00:00')),
+    PARTITION p202612 VALUES LESS THAN (UNIX_TIMESTAMP('2027-01-01 00:00:00')),
+    PARTITION pfuture VALUES LESS THAN MAXVALUE
+);
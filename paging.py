@@ -0,0 +1,101 @@
+# -----------------------------------------------------------------
+# KEYSET PAGINATION AND STREAMING
+# -----------------------------------------------------------------
+# Lists are read one bounded page at a time, keyed on an indexed unique
+# column ("rows after the last one I showed") rather than OFFSET, so
+# page N costs the same as page 1. Whole-table reads go through
+# iter_chunks(), which pulls rows from an unbuffered cursor a chunk at a
+# time instead of materialising the full result with fetchall().
+
+PAGE_SIZE = 50
+STREAM_CHUNK_SIZE = 10000
+
+
+def iter_chunks(cursor, sql, params=(), chunk_size=STREAM_CHUNK_SIZE):
+    """Executes sql and yields its rows as lists of at most chunk_size.
+
+    Needs an unbuffered cursor (db_cursor() and connect() give one): a
+    buffered cursor has already copied the whole result to the client.
+    Stopping early is fine, the connection discards the unread rows.
+    """
+    cursor.execute(sql, params)
+    while True:
+        rows = cursor.fetchmany(chunk_size)
+        if not rows:
+            return
+        yield rows
+
+
+def iter_rows(cursor, sql, params=(), chunk_size=STREAM_CHUNK_SIZE):
+    """Like iter_chunks(), one row at a time."""
+    for rows in iter_chunks(cursor, sql, params, chunk_size):
+        yield from rows
+
+
+class KeysetPager:
+    """Pages a SELECT by a unique, indexed sort key.
+
+    sql must contain {keyset} inside its WHERE clause; it becomes TRUE on
+    the first page and "key > last key seen" afterwards, and ORDER BY /
+    LIMIT are appended. keys is a sequence of (sql_expression, field)
+    pairs: what to filter and sort on, and its name in the result rows.
+    Several keys compare as a row constructor, so the last one must make
+    the order unique (usually a primary key). Rows can come from a
+    dictionary or a plain cursor.
+    """
+
+    def __init__(self, sql, keys, descending=False, page_size=PAGE_SIZE):
+        if "{keyset}" not in sql:
+            raise ValueError("KeysetPager query needs a {keyset} placeholder in its WHERE clause")
+        self.sql = sql
+        self.keys = list(keys)
+        self.descending = descending
+        self.page_size = page_size
+        # The keyset values go in among the caller's params at the placeholder
+        self._params_before = sql[:sql.index("{keyset}")].count("%s")
+
+        columns = [column for column, _ in self.keys]
+        direction = " DESC" if descending else ""
+        self._order_by = ", ".join(column + direction for column in columns)
+        if len(columns) == 1:
+            self._condition = f"{columns[0]} {'<' if descending else '>'} %s"
+        else:
+            placeholders = ", ".join(["%s"] * len(columns))
+            self._condition = f"({', '.join(columns)}) {'<' if descending else '>'} ({placeholders})"
+
+    def page_sql(self, first=False):
+        """The statement run for the first page, or for any later one."""
+        condition = "TRUE" if first else self._condition
+        return self.sql.replace("{keyset}", condition) + f" ORDER BY {self._order_by} LIMIT %s"
+
+    def page_query(self, params=(), after=None, page_size=None):
+        """The (sql, params) that page() runs; fetches one row more than the page."""
+        page_size = page_size or self.page_size
+        params = list(params)
+        if after is not None:
+            after = after if isinstance(after, (tuple, list)) else (after,)
+            params[self._params_before:self._params_before] = after
+        params.append(page_size + 1)
+        return self.page_sql(first=after is None), params
+
+    def split_page(self, rows, page_size=None, column_names=None):
+        """Turns the rows of page_query() into (rows, next_after)."""
+        page_size = page_size or self.page_size
+        if len(rows) <= page_size:
+            return list(rows), None
+        rows = list(rows[:page_size])
+        last = rows[-1]
+        if not isinstance(last, dict):
+            # Tuple rows from a plain cursor: look the key fields up by position
+            last = dict(zip(column_names, last))
+        next_after = tuple(last[field] for _, field in self.keys)
+        return rows, next_after[0] if len(next_after) == 1 else next_after
+
+    def page(self, cursor, params=(), after=None, page_size=None):
+        """Fetches the page after the key `after` (None for the first page).
+
+        Returns (rows, next_after): next_after is the key to pass for the
+        following page, or None when this is the last one.
+        """
+        cursor.execute(*self.page_query(params, after, page_size))
+        return self.split_page(cursor.fetchall(), page_size, cursor.column_names)
@@ -0,0 +1,165 @@
+import collections
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+from concurrent.futures.process import BrokenProcessPool
+
+import bcrypt
+
+# -----------------------------------------------------------------
+# PASSWORD HASHING WORKER POOL
+# -----------------------------------------------------------------
+# bcrypt is deliberately slow (~250 ms at cost 12). Running it in a
+# small process pool keeps a login storm from tying up the server's
+# script threads, and the queue-depth limit turns overload into a fast
+# "try again" instead of an ever-growing backlog. A job keeps its queue
+# slot until a worker has finished it, even when the caller gave up
+# waiting, so timed-out jobs still count against the limit.
+
+DEFAULT_ROUNDS = 12
+
+
+class HasherBusy(Exception):
+    """Raised when the password queue is full or a job could not finish in time."""
+
+
+def _hash_job(password, rounds, submitted_at):
+    started = time.time()
+    hashed = bcrypt.hashpw(password, bcrypt.gensalt(rounds))
+    return hashed, started - submitted_at, time.time() - started
+
+
+def _verify_job(password, hashed, submitted_at):
+    started = time.time()
+    ok = bcrypt.checkpw(password, hashed)
+    return ok, started - submitted_at, time.time() - started
+
+
+def hash_many(passwords, rounds=DEFAULT_ROUNDS):
+    """Hashes a list of passwords in one job (for bulk imports); returns str hashes."""
+    return [bcrypt.hashpw(p.encode('utf-8'), bcrypt.gensalt(rounds)).decode('utf-8') for p in passwords]
+
+
+def hash_rounds(hashed):
+    """Returns the cost factor stored in a bcrypt hash ("$2b$12$..." -> 12)."""
+    if isinstance(hashed, bytes):
+        hashed = hashed.decode('utf-8')
+    try:
+        return int(hashed.split('$')[2])
+    except (IndexError, ValueError):
+        return None
+
+
+class _Timings:
+    """Keeps count/mean/max and a window of recent samples for percentiles."""
+
+    def __init__(self, window=1000):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.recent = collections.deque(maxlen=window)
+
+    def add(self, seconds):
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        self.recent.append(seconds)
+
+    def summary(self):
+        recent = sorted(self.recent)
+        p95 = recent[min(len(recent) - 1, int(len(recent) * 0.95))] if recent else 0.0
+        return {
+            'count': self.count,
+            'mean_ms': self.total / self.count * 1000 if self.count else 0.0,
+            'p95_ms': p95 * 1000,
+            'max_ms': self.max * 1000,
+        }
+
+
+class PasswordHasher:
+    """Hashes and verifies passwords on a bounded pool of worker processes."""
+
+    def __init__(self, workers=2, max_queue=32, rounds=DEFAULT_ROUNDS, timeout=30):
+        self.rounds = rounds
+        self.timeout = timeout
+        self.max_queue = max_queue
+        self.workers = workers
+        self._executor = self._new_executor()
+        self._slots = threading.BoundedSemaphore(max_queue)
+        self._lock = threading.Lock()
+        self._hash_times = _Timings()
+        self._verify_times = _Timings()
+        self._queue_waits = _Timings()
+        self._rejected = 0
+        self._in_flight = 0
+
+    def _new_executor(self):
+        # spawn, not fork: the Streamlit server is multi-threaded
+        return ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context('spawn'))
+
+    def _release(self, future=None):
+        with self._lock:
+            self._in_flight -= 1
+        self._slots.release()
+
+    def _replace_broken(self, executor):
+        """Swaps in a new worker pool after a worker died (once, however many jobs saw it)."""
+        with self._lock:
+            if self._executor is executor:
+                self._executor = self._new_executor()
+
+    def _run(self, job, *args):
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self._rejected += 1
+            raise HasherBusy(f"{self.max_queue} password operations already queued")
+        with self._lock:
+            self._in_flight += 1
+            executor = self._executor
+        try:
+            future = executor.submit(job, *args, time.time())
+        except BrokenProcessPool as e:
+            self._release()
+            self._replace_broken(executor)
+            raise HasherBusy("password workers restarting") from e
+        future.add_done_callback(self._release)
+        try:
+            result, queue_wait, elapsed = future.result(timeout=self.timeout)
+        except TimeoutError as e:
+            future.cancel()
+            raise HasherBusy(f"password operation took over {self.timeout}s") from e
+        except BrokenProcessPool as e:
+            self._replace_broken(executor)
+            raise HasherBusy("password workers restarting") from e
+        with self._lock:
+            self._queue_waits.add(max(queue_wait, 0.0))
+            (self._hash_times if job is _hash_job else self._verify_times).add(elapsed)
+        return result
+
+    def hash(self, password):
+        """Returns the bcrypt hash (bytes) of password at the configured cost."""
+        return self._run(_hash_job, password.encode('utf-8'), self.rounds)
+
+    def verify(self, password, hashed_password):
+        """Checks a password against a stored hash."""
+        return self._run(_verify_job, password.encode('utf-8'), hashed_password.encode('utf-8'))
+
+    def needs_rehash(self, hashed_password):
+        """True when a stored hash was made with a different cost than the configured one."""
+        return hash_rounds(hashed_password) != self.rounds
+
+    def stats(self):
+        with self._lock:
+            return {
+                'rounds': self.rounds,
+                'in_flight': self._in_flight,
+                'max_queue': self.max_queue,
+                'rejected': self._rejected,
+                'hash': self._hash_times.summary(),
+                'verify': self._verify_times.summary(),
+                'queue_wait': self._queue_waits.summary(),
+            }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,311 @@
+import collections
+import re
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+# -----------------------------------------------------------------
+# QUERY PROFILER
+# -----------------------------------------------------------------
+# Every cursor handed out by db_cursor() is wrapped in a ProfiledCursor,
+# which times each statement (execute plus the fetches that follow it),
+# counts the rows it returned and notes which function of the app
+# script issued it. Statements are grouped by their normalized text
+# (literals and IN lists folded), per page, and each rerun of the script
+# is a "run" whose statements are checked for N+1 patterns: the same
+# statement executed N_PLUS_ONE_THRESHOLD or more times in one run.
+#
+# One QueryProfiler is shared by every session; the run being recorded
+# is tracked per thread, since Streamlit runs each session's script in
+# its own thread. Threads a rerun starts to prefetch its reads join the
+# rerun's run (see joined()).
+
+SLOW_QUERY_MS = 200
+N_PLUS_ONE_THRESHOLD = 5
+HISTOGRAM_BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, float('inf'))
+RECENT_RUNS = 500      # run durations kept per page for percentiles
+RECENT_FINDINGS = 200  # slow queries / N+1 findings kept
+
+_STRING_RE = re.compile(r"'(?:[^'\\]|\\.)*'|\"(?:[^\"\\]|\\.)*\"")
+_NUMBER_RE = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER_RE = re.compile(r"%\(\w+\)s|%s")
+_IN_LIST_RE = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_ROW_LIST_RE = re.compile(r"\(\s*\(\.\.\.\)(?:\s*,\s*\(\.\.\.\))+\s*\)")
+_SPACE_RE = re.compile(r"\s+")
+
+
+def normalize_sql(sql):
+    """Folds a statement to its shape: literals and placeholders become ?, lists become (...)."""
+    if isinstance(sql, bytes):
+        sql = sql.decode('utf-8', 'replace')
+    sql = _STRING_RE.sub("?", sql)
+    sql = _PLACEHOLDER_RE.sub("?", sql)
+    sql = _NUMBER_RE.sub("?", sql)
+    sql = _SPACE_RE.sub(" ", sql).strip()
+    sql = _IN_LIST_RE.sub("(...)", sql)
+    return _ROW_LIST_RE.sub("(...)", sql)
+
+
+def _bucket(ms):
+    for i, bound in enumerate(HISTOGRAM_BUCKETS_MS):
+        if ms <= bound:
+            return i
+    return len(HISTOGRAM_BUCKETS_MS) - 1
+
+
+def _percentile(values, q):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+
+class _StatementStats:
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.rows = 0
+        self.callers = collections.Counter()
+        self.histogram = [0] * len(HISTOGRAM_BUCKETS_MS)
+
+    def add(self, ms, rows, caller):
+        self.count += 1
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+        self.rows += rows
+        self.callers[caller] += 1
+        self.histogram[_bucket(ms)] += 1
+
+    def summary(self):
+        return {
+            'count': self.count,
+            'total_ms': self.total_ms,
+            'mean_ms': self.total_ms / self.count if self.count else 0.0,
+            'max_ms': self.max_ms,
+            'rows': self.rows,
+            'callers': dict(self.callers),
+            'histogram': self.histogram,
+        }
+
+
+class _PageStats:
+    def __init__(self):
+        self.runs = 0
+        self.queries = 0
+        self.run_histogram = [0] * len(HISTOGRAM_BUCKETS_MS)
+        self.recent_runs_ms = collections.deque(maxlen=RECENT_RUNS)
+        self.statements = collections.defaultdict(_StatementStats)
+
+    def summary(self):
+        return {
+            'runs': self.runs,
+            'queries_per_run': self.queries / self.runs if self.runs else 0.0,
+            'p50_run_ms': _percentile(self.recent_runs_ms, 0.5),
+            'p95_run_ms': _percentile(self.recent_runs_ms, 0.95),
+            'run_histogram': self.run_histogram,
+            'statements': {sql: stats.summary() for sql, stats in self.statements.items()},
+        }
+
+
+class _Run:
+    """The statements recorded during one rerun of one page."""
+
+    def __init__(self, page):
+        self.page = page
+        self.started = time.perf_counter()
+        self.queries = []  # (sql, ms, rows, caller)
+
+
+class QueryProfiler:
+    """Collects per-statement timings from ProfiledCursors, grouped by page and run."""
+
+    def __init__(self, app_file=None, slow_query_ms=SLOW_QUERY_MS, n_plus_one_threshold=N_PLUS_ONE_THRESHOLD):
+        self.app_file = app_file
+        self.slow_query_ms = slow_query_ms
+        self.n_plus_one_threshold = n_plus_one_threshold
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._pages = collections.defaultdict(_PageStats)
+            self._slow = collections.deque(maxlen=RECENT_FINDINGS)
+            self._n_plus_one = collections.deque(maxlen=RECENT_FINDINGS)
+            self._since = time.time()
+
+    # --- Recording ---
+
+    @contextmanager
+    def run(self, page):
+        """Records every statement issued by this thread until exit as one run of page."""
+        current = _Run(page)
+        self._local.run = current
+        try:
+            yield current
+        finally:
+            self._local.run = None
+            self._finish(current)
+
+    def current_run(self):
+        return getattr(self._local, 'run', None)
+
+    @contextmanager
+    def joined(self, run):
+        """Records this thread's statements into a run started on another thread."""
+        previous = getattr(self._local, 'run', None)
+        self._local.run = run
+        try:
+            yield run
+        finally:
+            self._local.run = previous
+
+    def wrap(self, cursor):
+        return ProfiledCursor(cursor, self)
+
+    def _caller(self):
+        """The app-script function that issued the statement (e.g. show_connections).
+
+        That is the top-level function enclosing the innermost app-script
+        frame, so a statement run by a helper's nested load() or lambda,
+        called back through cached_read() and replica_read(), is put down
+        to the helper (e.g. get_faculty_list) rather than to '<lambda>'.
+        """
+        frame = sys._getframe(2)
+        while frame is not None:
+            code = frame.f_code
+            if code.co_filename == self.app_file:
+                return getattr(code, 'co_qualname', code.co_name).split('.')[0]
+            frame = frame.f_back
+        return '?'
+
+    def record(self, sql, ms, rows, caller):
+        current = getattr(self._local, 'run', None)
+        if current is not None:
+            current.queries.append((sql, ms, rows, caller))
+            page = current.page
+        else:
+            page = '(outside a run)'
+            with self._lock:
+                self._pages[page].statements[sql].add(ms, rows, caller)
+        if ms >= self.slow_query_ms:
+            with self._lock:
+                self._slow.append({
+                    'at': time.time(), 'page': page, 'caller': caller, 'sql': sql, 'ms': ms, 'rows': rows,
+                })
+
+    def _finish(self, current):
+        run_ms = (time.perf_counter() - current.started) * 1000
+        repeats = collections.Counter(sql for sql, _, _, _ in current.queries)
+        with self._lock:
+            page = self._pages[current.page]
+            page.runs += 1
+            page.queries += len(current.queries)
+            page.run_histogram[_bucket(run_ms)] += 1
+            page.recent_runs_ms.append(run_ms)
+            for sql, ms, rows, caller in current.queries:
+                page.statements[sql].add(ms, rows, caller)
+            for sql, count in repeats.items():
+                if count >= self.n_plus_one_threshold:
+                    callers = collections.Counter(c for s, _, _, c in current.queries if s == sql)
+                    self._n_plus_one.append({
+                        'at': time.time(),
+                        'page': current.page,
+                        'sql': sql,
+                        'executions': count,
+                        'total_ms': sum(ms for s, ms, _, _ in current.queries if s == sql),
+                        'callers': dict(callers),
+                    })
+
+    # --- Reporting ---
+
+    def snapshot(self):
+        """Everything collected so far, as plain JSON-serialisable data."""
+        with self._lock:
+            return {
+                'since': self._since,
+                'histogram_buckets_ms': [b if b != float('inf') else None for b in HISTOGRAM_BUCKETS_MS],
+                'slow_query_ms': self.slow_query_ms,
+                'n_plus_one_threshold': self.n_plus_one_threshold,
+                'pages': {name: stats.summary() for name, stats in self._pages.items()},
+                'slow_queries': list(self._slow),
+                'n_plus_one': list(self._n_plus_one),
+            }
+
+
+class ProfiledCursor:
+    """Wraps a mysql.connector cursor and reports each statement to a QueryProfiler.
+
+    A statement's time runs from execute() to the end of the last fetch
+    of its rows; it is reported at the next execute() or close(). Time the
+    app spends between fetches (rendering) is not counted.
+    """
+
+    def __init__(self, cursor, profiler):
+        self._cursor = cursor
+        self._profiler = profiler
+        self._open = None  # [sql, started, last_done, rows, caller] of the statement being read
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __iter__(self):
+        return iter(self.fetchall())
+
+    def _begin(self, sql):
+        self._end()
+        started = time.perf_counter()
+        self._open = [normalize_sql(sql), started, started, 0, self._profiler._caller()]
+
+    def _end(self):
+        if self._open is not None:
+            sql, started, last_done, rows, caller = self._open
+            self._open = None
+            self._profiler.record(sql, (last_done - started) * 1000, rows, caller)
+
+    def _count(self, rows):
+        if self._open is not None:
+            self._open[2] = time.perf_counter()
+            self._open[3] += rows
+
+    def execute(self, sql, params=None, *args, **kwargs):
+        self._begin(sql)
+        try:
+            return self._cursor.execute(sql, params, *args, **kwargs)
+        finally:
+            self._count(0)
+
+    def executemany(self, sql, seq_params, *args, **kwargs):
+        self._begin(sql)
+        try:
+            return self._cursor.executemany(sql, seq_params, *args, **kwargs)
+        finally:
+            self._count(max(self._cursor.rowcount or 0, 0))
+
+    def callproc(self, name, args=()):
+        self._begin(f"CALL {name}()")
+        try:
+            return self._cursor.callproc(name, args)
+        finally:
+            self._count(0)
+
+    def fetchone(self):
+        row = self._cursor.fetchone()
+        self._count(row is not None)
+        return row
+
+    def fetchmany(self, size=None):
+        rows = self._cursor.fetchmany(size) if size is not None else self._cursor.fetchmany()
+        self._count(len(rows))
+        return rows
+
+    def fetchall(self):
+        rows = self._cursor.fetchall()
+        self._count(len(rows))
+        return rows
+
+    def close(self):
+        self._end()
+        return self._cursor.close()
@@ -0,0 +1,469 @@
+import json
+
+from frames import OPPORTUNITY_STATUS, fetch_frame, fetch_frame_page
+from paging import PAGE_SIZE, KeysetPager
+
+# -----------------------------------------------------------------
+# SHARED QUERIES
+# -----------------------------------------------------------------
+# Query helpers that take an open cursor (from db_cursor() in main.py or
+# a plain connection in the benchmarks), so they can be reused outside
+# the Streamlit script. Lists that grow with the data return one keyset
+# page at a time as (rows, next_after); see paging.py. The *_frame
+# helpers feed tables and need a plain (tuple) cursor; see frames.py.
+#
+# Each helper is a thin wrapper: the statement (a *_QUERY constant, a
+# *_query() builder or a pager) and the shaping of its rows are kept
+# apart from the cursor calls, so async_queries.py runs the very same
+# queries on an asyncio driver.
+
+# -----------------------------------------------------------------
+# USERS
+# -----------------------------------------------------------------
+
+USER_BY_ID_QUERY = "SELECT * FROM Users WHERE user_id = %s"
+USER_BY_USERNAME_QUERY = "SELECT * FROM Users WHERE username = %s"
+FACULTY_LIST_QUERY = "SELECT user_id, full_name FROM Users WHERE role IN ('faculty', 'alumni')"
+UPDATE_BIO_QUERY = "UPDATE Users SET bio = %s WHERE user_id = %s"
+
+
+def load_user(cursor, user_id):
+    """Fetches a user's full row, or None."""
+    cursor.execute(USER_BY_ID_QUERY, (user_id,))
+    return cursor.fetchone()
+
+
+def load_user_by_username(cursor, username):
+    cursor.execute(USER_BY_USERNAME_QUERY, (username,))
+    return cursor.fetchone()
+
+
+def users_by_ids_query(user_ids):
+    placeholders = ", ".join(["%s"] * len(user_ids))
+    return f"SELECT user_id, full_name, role, email FROM Users WHERE user_id IN ({placeholders})", list(user_ids)
+
+
+def order_users(rows, user_ids):
+    rows = {row['user_id']: row for row in rows}
+    return [rows[uid] for uid in user_ids if uid in rows]
+
+
+def fetch_users_by_ids(cursor, user_ids):
+    """Fetches display rows (user_id, full_name, role, email) for user_ids, in the given order."""
+    user_ids = list(user_ids)
+    if not user_ids:
+        return []
+    cursor.execute(*users_by_ids_query(user_ids))
+    return order_users(cursor.fetchall(), user_ids)
+
+# -----------------------------------------------------------------
+# PROFILE LOADER
+# -----------------------------------------------------------------
+
+# Every profile section is folded into one UNION ALL so the whole profile
+# (and the viewer's connection status) comes back in a single round trip.
+# The generic columns are mapped back to the original keys below. The
+# same statement with IN lists loads several profiles at once.
+_PROFILE_SQL = """
+    SELECT user_id AS owner_id, 0 AS section, user_id AS item_id, full_name AS t1, email AS t2, role AS t3,
+           bio AS t4, fn_GetConnectionStatus(%s, user_id) AS t5,
+           NULL AS d1, NULL AS d2, graduation_year AS n1
+    FROM Users WHERE user_id {users}
+    UNION ALL
+    SELECT user_id, 1, skill_id, skill_name, NULL, NULL, NULL, NULL, NULL, NULL, NULL
+    FROM Skills WHERE user_id {users}
+    UNION ALL
+    SELECT user_id, 2, project_id, project_title, project_description, NULL, NULL, NULL,
+           start_date, end_date, NULL
+    FROM Projects WHERE user_id {users}
+    UNION ALL
+    SELECT user_id, 3, experience_id, company_name, role_title, description, NULL, NULL,
+           start_date, end_date, NULL
+    FROM Experience WHERE user_id {users}
+    ORDER BY owner_id, section, item_id
+"""
+
+PROFILE_QUERY = _PROFILE_SQL.format(users="= %s")
+
+
+def _profile_row(row):
+    section = row['section']
+    if section == 0:
+        return 'user', {
+            'user_id': row['item_id'],
+            'full_name': row['t1'],
+            'email': row['t2'],
+            'role': row['t3'],
+            'graduation_year': row['n1'],
+            'bio': row['t4'],
+        }
+    if section == 1:
+        return 'skills', {'skill_id': row['item_id'], 'skill_name': row['t1']}
+    if section == 2:
+        return 'projects', {
+            'project_id': row['item_id'],
+            'project_title': row['t1'],
+            'project_description': row['t2'],
+            'start_date': row['d1'],
+            'end_date': row['d2'],
+        }
+    return 'experience', {
+        'experience_id': row['item_id'],
+        'company_name': row['t1'],
+        'role_title': row['t2'],
+        'description': row['t3'],
+        'start_date': row['d1'],
+        'end_date': row['d2'],
+    }
+
+
+def profile_params(user_id, viewer_id=None):
+    viewer = viewer_id if viewer_id is not None else user_id
+    return (viewer, user_id, user_id, user_id, user_id)
+
+
+def profile_from_rows(rows, user_id, viewer_id=None):
+    """Folds the PROFILE_QUERY rows back into the load_profile() dict."""
+    viewer = viewer_id if viewer_id is not None else user_id
+    details = {'user': None, 'skills': [], 'projects': [], 'experience': []}
+    status = None
+    for row in rows:
+        key, item = _profile_row(row)
+        if key == 'user':
+            details['user'] = item
+            status = row['t5']
+        else:
+            details[key].append(item)
+
+    details['connection_status'] = status if viewer != user_id and status else 'none'
+    return details
+
+
+def load_profile(cursor, user_id, viewer_id=None):
+    """Fetches a full profile in one query.
+
+    Returns the same dict as the old per-section queries ('user', 'skills',
+    'projects', 'experience'), plus 'connection_status' between viewer_id
+    and the profile owner ('none' when viewing your own profile).
+    """
+    cursor.execute(PROFILE_QUERY, profile_params(user_id, viewer_id))
+    return profile_from_rows(cursor.fetchall(), user_id, viewer_id)
+
+
+def profiles_query(user_ids, viewer_id):
+    placeholders = ", ".join(["%s"] * len(user_ids))
+    return _PROFILE_SQL.format(users=f"IN ({placeholders})"), [viewer_id, *list(user_ids) * 4]
+
+
+def load_profiles(cursor, user_ids, viewer_id):
+    """Fetches several profiles in one query, as {user_id: load_profile() dict, or None for unknown users}."""
+    user_ids = list(dict.fromkeys(user_ids))
+    if not user_ids:
+        return {}
+    cursor.execute(*profiles_query(user_ids, viewer_id))
+    rows = {user_id: [] for user_id in user_ids}
+    for row in cursor.fetchall():
+        rows[row['owner_id']].append(row)
+    profiles = {user_id: profile_from_rows(rows[user_id], user_id, viewer_id) for user_id in user_ids}
+    return {user_id: profile if profile['user'] is not None else None for user_id, profile in profiles.items()}
+
+
+# Profile section table -> its id column
+PROFILE_ITEM_IDS = {'Skills': 'skill_id', 'Projects': 'project_id', 'Experience': 'experience_id'}
+
+
+def delete_profile_item_query(table):
+    """DELETE of one of the owner's Skills/Projects/Experience rows; params (item_id, user_id)."""
+    return f"DELETE FROM {table} WHERE {PROFILE_ITEM_IDS[table]} = %s AND user_id = %s"
+
+# -----------------------------------------------------------------
+# OPPORTUNITY LISTING
+# -----------------------------------------------------------------
+
+def open_opportunities_query(student_user_id, opportunity_ids=None):
+    """The pager and params for list_open_opportunities(), or None when opportunity_ids is empty."""
+    query = """
+        SELECT o.opportunity_id, o.title, o.description, u.full_name AS posted_by,
+               (SELECT a.status FROM Applications a
+                WHERE a.opportunity_id = o.opportunity_id AND a.student_user_id = %s
+                LIMIT 1) AS application_status
+        FROM Opportunities o
+        JOIN Users u ON o.created_by_user_id = u.user_id
+        WHERE o.status = 'open'
+    """
+    params = [student_user_id]
+    if opportunity_ids is not None:
+        if not opportunity_ids:
+            return None
+        query += f" AND o.opportunity_id IN ({', '.join(['%s'] * len(opportunity_ids))})"
+        params.extend(opportunity_ids)
+    query += " AND {keyset}"
+    return KeysetPager(query, [('o.opportunity_id', 'opportunity_id')], descending=True), params
+
+
+def list_open_opportunities(cursor, student_user_id, after=None, limit=20, opportunity_ids=None):
+    """Fetches one page of open opportunities, newest first, as (rows, next_after).
+
+    Keyset pagination on opportunity_id: pass the previous page's
+    next_after as after. Each row carries the student's own application
+    status (or None), so the page needs no per-card lookups.
+    opportunity_ids restricts the listing to those opportunities.
+    """
+    planned = open_opportunities_query(student_user_id, opportunity_ids)
+    if planned is None:
+        return [], None
+    pager, params = planned
+    return pager.page(cursor, params, after=after, page_size=limit)
+
+
+APPLIED_OPPORTUNITIES_QUERY = "SELECT opportunity_id FROM Applications WHERE student_user_id = %s"
+SET_OPPORTUNITY_STATUS_QUERY = "UPDATE Opportunities SET status = %s WHERE opportunity_id = %s"
+DELETE_OPPORTUNITY_QUERY = "DELETE FROM Opportunities WHERE opportunity_id = %s"  # cascades to Applications
+REJECT_APPLICATION_QUERY = "UPDATE Applications SET status = 'rejected' WHERE application_id = %s"
+
+
+def applied_opportunity_ids(cursor, student_user_id):
+    """The ids of every opportunity the student has applied to."""
+    cursor.execute(APPLIED_OPPORTUNITIES_QUERY, (student_user_id,))
+    return [row['opportunity_id'] for row in cursor.fetchall()]
+
+# Applicant counts come from the OpportunityApplicantCounts rollup
+# (migration 0007) instead of a GROUP BY over Applications.
+POSTED_OPPORTUNITIES_QUERY = """
+    SELECT o.opportunity_id, o.title, o.status, COALESCE(c.applicant_count, 0) AS applicant_count
+    FROM Opportunities o
+    LEFT JOIN OpportunityApplicantCounts c ON c.opportunity_id = o.opportunity_id
+    WHERE o.created_by_user_id = %s
+"""
+
+POSTED_OPPORTUNITY_DTYPES = {'opportunity_id': 'int32', 'status': OPPORTUNITY_STATUS, 'applicant_count': 'int32'}
+
+
+def list_posted_opportunities(cursor, user_id):
+    """Fetches a poster's opportunities with their applicant counts."""
+    cursor.execute(POSTED_OPPORTUNITIES_QUERY, (user_id,))
+    return cursor.fetchall()
+
+
+def posted_opportunities_frame(cursor, user_id):
+    """list_posted_opportunities() as a typed DataFrame (plain cursor)."""
+    return fetch_frame(cursor, POSTED_OPPORTUNITIES_QUERY, (user_id,), POSTED_OPPORTUNITY_DTYPES)
+
+
+def applicants_query(opportunity_ids):
+    placeholders = ", ".join(["%s"] * len(opportunity_ids))
+    return f"""
+        SELECT a.opportunity_id, a.application_id, a.status, u.full_name, u.user_id AS student_user_id
+        FROM Applications a
+        JOIN Users u ON a.student_user_id = u.user_id
+        WHERE a.opportunity_id IN ({placeholders})
+        ORDER BY a.opportunity_id, a.application_id
+        """, list(opportunity_ids)
+
+
+def group_applicants(rows, opportunity_ids):
+    applicants = {op_id: [] for op_id in opportunity_ids}
+    for row in rows:
+        applicants[row['opportunity_id']].append(row)
+    return applicants
+
+
+def load_applicants(cursor, opportunity_ids):
+    """Fetches applicants for many opportunities in one query, grouped by opportunity_id."""
+    opportunity_ids = list(dict.fromkeys(opportunity_ids))
+    if not opportunity_ids:
+        return {}
+    cursor.execute(*applicants_query(opportunity_ids))
+    return group_applicants(cursor.fetchall(), opportunity_ids)
+
+
+def review_applications(cursor, reviewer_user_id, application_ids, status):
+    """Approves or rejects many applications at once through sp_ReviewApplications (migration 0010).
+
+    status is 'approved' or 'rejected'. Only pending applications to
+    reviewer_user_id's opportunities change; returns their
+    (application_id, student_user_id) tuples. The caller commits.
+    """
+    application_ids = list(dict.fromkeys(application_ids))
+    if not application_ids:
+        return []
+    cursor.callproc('sp_ReviewApplications', (reviewer_user_id, json.dumps(application_ids), status))
+    changed = []
+    for result in cursor.stored_results():
+        for row in result.fetchall():
+            # stored_results() cursors follow the calling cursor's type
+            if isinstance(row, dict):
+                changed.append((row['application_id'], row['student_user_id']))
+            else:
+                changed.append(tuple(row))
+    return changed
+
+# -----------------------------------------------------------------
+# ONGOING PROJECTS (dashboard)
+# -----------------------------------------------------------------
+
+STUDENT_PROJECTS_QUERY = """
+    SELECT p.ongoing_project_id, o.title, u.full_name AS faculty_name
+    FROM OngoingProjects p
+    JOIN Opportunities o ON p.opportunity_id = o.opportunity_id
+    JOIN Users u ON p.faculty_user_id = u.user_id
+    WHERE p.student_user_id = %s
+"""
+
+MENTOR_PROJECTS_QUERY = """
+    SELECT p.ongoing_project_id, o.title, u.full_name AS student_name
+    FROM OngoingProjects p
+    JOIN Opportunities o ON p.opportunity_id = o.opportunity_id
+    JOIN Users u ON p.student_user_id = u.user_id
+    WHERE p.faculty_user_id = %s
+"""
+
+
+def list_student_projects(cursor, student_user_id):
+    """Projects a student was approved for, with the mentor's name as faculty_name."""
+    cursor.execute(STUDENT_PROJECTS_QUERY, (student_user_id,))
+    return cursor.fetchall()
+
+
+def list_mentor_projects(cursor, faculty_user_id):
+    """Projects on a faculty/alumni member's opportunities, with the student's name as student_name."""
+    cursor.execute(MENTOR_PROJECTS_QUERY, (faculty_user_id,))
+    return cursor.fetchall()
+
+# -----------------------------------------------------------------
+# CONNECTION STATUS
+# -----------------------------------------------------------------
+
+# When requests exist in both directions the most advanced one wins,
+# matching fn_GetConnectionStatus.
+STATUS_PRECEDENCE = {'accepted': 3, 'pending': 2, 'rejected': 1, 'none': 0}
+
+
+def connection_statuses_query(pairs):
+    keys = [key for a, b in pairs for key in ((a, b), (b, a))]
+    placeholders = ", ".join(["(%s, %s)"] * len(keys))
+    return (
+        f"SELECT requester_id, receiver_id, status FROM Connections "
+        f"WHERE (requester_id, receiver_id) IN ({placeholders})",
+        [user_id for key in keys for user_id in key]
+    )
+
+
+def statuses_from_rows(rows, pairs):
+    statuses = {pair: 'none' for pair in pairs}
+    found = {(row['requester_id'], row['receiver_id']): row['status'] for row in rows}
+    for a, b in pairs:
+        for key in ((a, b), (b, a)):
+            status = found.get(key)
+            if status and STATUS_PRECEDENCE[status] > STATUS_PRECEDENCE[statuses[(a, b)]]:
+                statuses[(a, b)] = status
+    return statuses
+
+
+def load_connection_statuses(cursor, pairs):
+    """Fetches the connection status of many (user_a, user_b) pairs in one query.
+
+    Returns {(user_a, user_b): status}, with 'none' for pairs that have
+    never connected. Both directions of every pair are looked up through
+    the Connections primary key.
+    """
+    pairs = list(dict.fromkeys(pairs))
+    if not pairs:
+        return {}
+    cursor.execute(*connection_statuses_query(pairs))
+    return statuses_from_rows(cursor.fetchall(), pairs)
+
+# -----------------------------------------------------------------
+# CONNECTIONS
+# -----------------------------------------------------------------
+
+CONNECTIONS_PAGER = KeysetPager(
+    """
+    SELECT u.user_id, u.full_name, u.role
+    FROM UserConnectionEdges e
+    JOIN Users u ON u.user_id = e.other_user_id
+    WHERE e.user_id = %s AND {keyset}
+    """,
+    [('e.other_user_id', 'user_id')]
+)
+
+PENDING_REQUESTS_PAGER = KeysetPager(
+    """
+    SELECT u.user_id, u.full_name
+    FROM Connections c
+    JOIN Users u ON c.requester_id = u.user_id
+    WHERE c.receiver_id = %s AND c.status = 'pending' AND {keyset}
+    """,
+    [('c.requester_id', 'user_id')]
+)
+
+
+def list_connections(cursor, user_id, after=None, limit=PAGE_SIZE):
+    """Fetches a page of a user's accepted connections as (rows, next_after).
+
+    Each page is one primary-key range read on UserConnectionEdges.
+    """
+    return CONNECTIONS_PAGER.page(cursor, (user_id,), after=after, page_size=limit)
+
+
+def list_pending_requests(cursor, user_id, after=None, limit=PAGE_SIZE):
+    """Fetches a page of the connection requests waiting for user_id as (rows, next_after)."""
+    return PENDING_REQUESTS_PAGER.page(cursor, (user_id,), after=after, page_size=limit)
+
+
+SET_CONNECTION_STATUS_QUERY = "UPDATE Connections SET status = %s WHERE requester_id = %s AND receiver_id = %s"
+CONNECTION_COUNT_QUERY = "SELECT connection_count FROM UserConnectionCounts WHERE user_id = %s"
+
+
+def connection_count(cursor, user_id):
+    """Returns how many accepted connections a user has."""
+    cursor.execute(CONNECTION_COUNT_QUERY, (user_id,))
+    row = cursor.fetchone()
+    return row['connection_count'] if row else 0
+
+# -----------------------------------------------------------------
+# ADMIN REPORTS
+# -----------------------------------------------------------------
+# Both reports read the rollups from migration 0007, so a page costs one
+# index range read however many applications there are.
+
+# Students who applied to anything a given user posted (the rubric's
+# nested query, precomputed in PosterApplicants)
+APPLICANTS_OF_POSTER_PAGER = KeysetPager(
+    """
+    SELECT u.user_id, u.full_name, u.email
+    FROM PosterApplicants p
+    JOIN Users u ON u.user_id = p.student_user_id
+    WHERE p.poster_user_id = %s AND {keyset}
+    """,
+    [('p.student_user_id', 'user_id')]
+)
+
+# Applications per student, most applications first (the rubric's
+# aggregate query, precomputed in StudentApplicationCounts)
+APPLICATIONS_PER_STUDENT_PAGER = KeysetPager(
+    """
+    SELECT s.student_user_id AS user_id, u.full_name, s.application_count
+    FROM StudentApplicationCounts s
+    JOIN Users u ON u.user_id = s.student_user_id
+    WHERE {keyset}
+    """,
+    [('s.application_count', 'application_count'), ('s.student_user_id', 'user_id')],
+    descending=True
+)
+
+
+def applicants_of_poster_frame(cursor, poster_user_id, after=None, limit=PAGE_SIZE):
+    """A page of students who applied to poster_user_id's opportunities as (DataFrame, next_after)."""
+    return fetch_frame_page(
+        cursor, APPLICANTS_OF_POSTER_PAGER, (poster_user_id,), after=after, page_size=limit,
+        dtypes={'user_id': 'int32'}
+    )
+
+
+def applications_per_student_frame(cursor, after=None, limit=PAGE_SIZE):
+    """A page of (student, application count), highest count first, as (DataFrame, next_after)."""
+    return fetch_frame_page(
+        cursor, APPLICATIONS_PER_STUDENT_PAGER, after=after, page_size=limit,
+        dtypes={'user_id': 'int32', 'application_count': 'int32'}
+    )
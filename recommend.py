@@ -0,0 +1,193 @@
+import threading
+
+import numpy as np
+from scipy import sparse
+
+from paging import iter_chunks
+from search import tokenize
+
+# -----------------------------------------------------------------
+# OPPORTUNITY RECOMMENDER
+# -----------------------------------------------------------------
+# Opportunities are kept as a sparse term-count matrix (one row per
+# opportunity, one column per term of the title and description). A
+# student's Skills and Projects are turned into a query vector, and every
+# open opportunity is scored at once with a sparse matrix-vector product
+# over L2-normalised TF-IDF rows, i.e. cosine similarity.
+#
+# refresh() pulls only opportunities whose updated_at moved (posted,
+# closed or re-opened). Closed and deleted opportunities drop out of the
+# results anyway because recommendations are re-checked against the
+# database before they are shown.
+
+SKILL_WEIGHT = 2  # a listed skill counts as much as two mentions in a project
+
+STOPWORDS = frozenset("""
+    a an and are as at be by for from has have in is it its of on or our that the this to
+    we will with you your who can looking work working students student project projects
+""".split())
+
+PROFILE_TEXT_QUERY = """
+    SELECT skill_name AS text, %s AS weight FROM Skills WHERE user_id = %s
+    UNION ALL
+    SELECT CONCAT_WS(' ', project_title, project_description), 1 FROM Projects WHERE user_id = %s
+"""
+
+OPPORTUNITY_TEXT_QUERY = "SELECT opportunity_id, title, description, status, updated_at FROM Opportunities"
+# >= because several changes can share the watermark's second
+CHANGED_OPPORTUNITY_TEXT_QUERY = OPPORTUNITY_TEXT_QUERY + " WHERE updated_at >= %s"
+
+
+def terms(text):
+    return [t for t in tokenize(text) if t not in STOPWORDS and len(t) > 1]
+
+
+def student_terms(cursor, user_id):
+    """Returns {term: weight} built from a student's skills and projects."""
+    cursor.execute(PROFILE_TEXT_QUERY, (SKILL_WEIGHT, user_id, user_id))
+    weights = {}
+    for row in cursor.fetchall():
+        for term in terms(row['text']):
+            weights[term] = weights.get(term, 0) + row['weight']
+    return weights
+
+
+class OpportunityRecommender:
+    """A TF-IDF index over opportunity titles and descriptions.
+
+    Newly posted opportunities are weighted with the current IDF and kept
+    in a small delta matrix; the IDF is only recomputed over everything
+    once the delta outgrows REWEIGHT_FRACTION of the index. While the
+    index has fewer than REWEIGHT_MIN_ROWS reweighted rows it is cheap to
+    redo, so every refresh reweights and small catalogues get a real IDF.
+    Closing or re-opening an opportunity just flips its row in the
+    active mask.
+    """
+
+    REWEIGHT_FRACTION = 0.05
+    REWEIGHT_MIN_ROWS = 500
+
+    def __init__(self):
+        self._vocab = {}                          # term -> column
+        self._ids = np.empty(0, dtype=np.int64)   # row -> opportunity_id (base rows, then delta rows)
+        self._row_of = {}                         # opportunity_id -> row
+        self._active = np.zeros(0, dtype=bool)    # row is an open opportunity
+        self._counts = sparse.csr_matrix((0, 0), dtype=np.float32)  # raw term counts, all rows
+        self._idf = np.zeros(0, dtype=np.float32)
+        self._base = self._counts                 # normalised TF-IDF rows as of the last reweight
+        self._delta = self._counts                # normalised TF-IDF rows added since
+        self._watermark = None
+        self._lock = threading.Lock()
+
+    def refresh(self, cursor):
+        """Indexes opportunities posted, closed or re-opened since the last refresh."""
+        if self._watermark is None:
+            query, params = OPPORTUNITY_TEXT_QUERY, ()
+        else:
+            query, params = CHANGED_OPPORTUNITY_TEXT_QUERY, (self._watermark,)
+
+        # Streamed: only the extracted terms of each chunk are kept, not the
+        # full title/description rows of the whole table.
+        changed, watermark = [], None
+        for rows in iter_chunks(cursor, query, params):
+            for row in rows:
+                doc_terms = terms(f"{row['title']} {row['description']}")
+                changed.append((row['opportunity_id'], doc_terms, row['status'] == 'open'))
+                if watermark is None or row['updated_at'] > watermark:
+                    watermark = row['updated_at']
+        if watermark is None:
+            return
+
+        with self._lock:
+            new_rows = []
+            for op_id, doc_terms, is_open in changed:
+                existing = self._row_of.get(op_id)
+                if existing is None:
+                    new_rows.append((op_id, doc_terms, is_open))
+                else:
+                    self._active[existing] = is_open
+            if new_rows:
+                self._append(new_rows)
+            self._watermark = watermark
+
+    def _append(self, new_rows):
+        data, row_idx, col_idx = [], [], []
+        for i, (_, doc_terms, _) in enumerate(new_rows):
+            counts = {}
+            for term in doc_terms:
+                col = self._vocab.setdefault(term, len(self._vocab))
+                counts[col] = counts.get(col, 0) + 1
+            row_idx.extend([i] * len(counts))
+            col_idx.extend(counts)
+            data.extend(counts.values())
+
+        n_terms = len(self._vocab)
+        block = sparse.csr_matrix((data, (row_idx, col_idx)), shape=(len(new_rows), n_terms), dtype=np.float32)
+        counts = self._counts.copy()
+        counts.resize((counts.shape[0], n_terms))
+        self._counts = sparse.vstack([counts, block], format='csr')
+
+        start = len(self._ids)
+        new_ids = np.array([op_id for op_id, _, _ in new_rows], dtype=np.int64)
+        self._ids = np.concatenate([self._ids, new_ids])
+        self._active = np.concatenate([self._active, np.array([is_open for _, _, is_open in new_rows], dtype=bool)])
+        self._row_of.update((int(op_id), start + i) for i, op_id in enumerate(new_ids))
+
+        n_base = self._base.shape[0]
+        n_delta = self._counts.shape[0] - n_base
+        if n_base < self.REWEIGHT_MIN_ROWS or n_delta >= max(self.REWEIGHT_MIN_ROWS, self.REWEIGHT_FRACTION * n_base):
+            self._reweight()
+        else:
+            # Terms first seen in the delta get the IDF of a term in one document
+            idf = np.full(n_terms, np.log((1 + self._counts.shape[0]) / 2) + 1, dtype=np.float32)
+            idf[:len(self._idf)] = self._idf
+            delta = self._counts[self._base.shape[0]:]
+            self._delta = self._normalise(delta @ sparse.diags(idf))
+
+    @staticmethod
+    def _normalise(weighted):
+        norms = np.sqrt(np.asarray(weighted.multiply(weighted).sum(axis=1)).ravel())
+        norms[norms == 0] = 1
+        return sparse.csr_matrix(sparse.diags(1 / norms) @ weighted, dtype=np.float32)
+
+    def _reweight(self):
+        """Recomputes IDF over every indexed opportunity and rebuilds the base matrix."""
+        n_docs, n_terms = self._counts.shape
+        df = np.bincount(self._counts.indices, minlength=n_terms)
+        self._idf = (np.log((1 + n_docs) / (1 + df)) + 1).astype(np.float32)
+        self._base = self._normalise(self._counts @ sparse.diags(self._idf))
+        self._delta = sparse.csr_matrix((0, n_terms), dtype=np.float32)
+
+    def recommend(self, term_weights, limit=5, exclude_ids=()):
+        """Returns [(opportunity_id, score)] of the best-matching open opportunities."""
+        with self._lock:
+            n_terms = len(self._vocab)
+            cols = [(self._vocab[t], w) for t, w in term_weights.items() if t in self._vocab]
+            if not cols or not self._active.any():
+                return []
+            idf = np.ones(n_terms, dtype=np.float32)
+            idf[:len(self._idf)] = self._idf
+            query = np.zeros(n_terms, dtype=np.float32)
+            for col, weight in cols:
+                query[col] = weight * idf[col]
+            query /= np.linalg.norm(query)
+
+            scores = np.concatenate([
+                self._base @ query[:self._base.shape[1]],
+                self._delta @ query[:self._delta.shape[1]],
+            ])
+            scores[~self._active] = 0
+            for op_id in exclude_ids:
+                row = self._row_of.get(op_id)
+                if row is not None:
+                    scores[row] = 0
+
+            k = min(limit, int(np.count_nonzero(scores > 0)))
+            if k == 0:
+                return []
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top], kind='stable')]
+            return [(int(self._ids[row]), float(scores[row])) for row in top]
+
+    def __len__(self):
+        return int(self._active.sum())
@@ -0,0 +1,198 @@
+"""Checks replica routing, lag tracking and failover against real MySQL servers.
+
+Usage: python replica_check.py --replica 127.0.0.1:3307 [--replica ...] [--port 3306 --database ...] [--watch]
+
+Point it at a primary and one or more replicas of it (e.g. two local
+mysqld instances, the second replicating the first, both with migration
+0009 applied). It drives a ReplicaSet the way main.py does, under its
+own heartbeat source, and checks that:
+
+  - every replica catches up with the heartbeat and gets reads;
+  - a fresh write token routes reads to the primary until a replica has
+    applied it, and that replica then shows the write;
+  - a replica whose connection dies mid-query is taken out of rotation
+    by mark_failed() and comes back on its next good check.
+
+--watch then keeps printing heartbeat, lag and routing every interval:
+stop or pause a replica (or its replication) to watch it drop out, and
+start it again to watch it come back.
+"""
+import argparse
+import sys
+import time
+
+import mysql.connector
+
+from db import HEARTBEAT_QUERY, HEARTBEAT_WRITE, ConnectionPool, ReplicaSet, add_connection_args
+
+CHECK_SOURCE = "replica_check"
+# The probe write is a heartbeat row of its own, so the check needs no table beyond 0009's
+PROBE_SOURCE = "replica_check:probe"
+
+
+def parse_address(value):
+    host, _, port = value.rpartition(":")
+    if not host or not port.isdigit():
+        raise argparse.ArgumentTypeError(f"expected HOST:PORT, got {value!r}")
+    return host, int(port)
+
+
+def make_pool(args, host, port):
+    return ConnectionPool(
+        size=2, timeout=args.timeout, host=host, port=port,
+        user=args.user, password=args.password, database=args.database,
+    )
+
+
+def wait_for(replicas, condition, timeout, interval):
+    """Runs heartbeats until condition() holds; False if it never does within timeout."""
+    deadline = time.monotonic() + timeout
+    while True:
+        replicas.check()
+        if condition():
+            return True
+        if time.monotonic() >= deadline:
+            return False
+        time.sleep(interval)
+
+
+def print_stats(replicas):
+    stats = replicas.stats()
+    print(f"  heartbeat {stats['heartbeat']}, primary reads {stats['primary_reads']}")
+    for state in stats['replicas']:
+        lag = "-" if state['lag'] is None else f"{state['lag']:.2f}s"
+        status = "healthy" if state['healthy'] else f"OUT ({state['error'] or 'lagging'})"
+        print(f"  {state['host']}:{state['port']}  applied {state['applied']}  lag {lag}  "
+              f"reads {state['reads']}  {status}")
+
+
+def read_probe(pool):
+    conn = pool.get()
+    try:
+        cursor = conn.cursor()
+        cursor.execute(HEARTBEAT_QUERY, (PROBE_SOURCE,))
+        row = cursor.fetchone()
+        cursor.close()
+    finally:
+        pool.put(conn)
+    return row[0] if row else None
+
+
+def check_routing(replicas, args):
+    """Every replica catches up and takes a share of token-free reads."""
+    caught_up = wait_for(
+        replicas, lambda: all(s['healthy'] for s in replicas.stats()['replicas']), args.wait, args.interval
+    )
+    if not caught_up:
+        return "not every replica caught up with the heartbeat"
+    chosen = {id(replicas.read_pool()) for _ in range(len(replicas.replicas) * 2)}
+    if chosen != {id(replica) for replica in replicas.replicas}:
+        return "reads without a token did not go round every replica"
+    return None
+
+
+def check_read_your_writes(replicas, args):
+    """A fresh write goes to the primary until a replica has applied it."""
+    conn = replicas.primary.get()
+    try:
+        cursor = conn.cursor()
+        value = time.time_ns() // 1000
+        cursor.execute(HEARTBEAT_WRITE, (PROBE_SOURCE, value))
+        conn.commit()
+        cursor.close()
+    finally:
+        replicas.primary.put(conn)
+    token = replicas.write_token()
+    if replicas.read_pool(token) is not replicas.primary:
+        return "a token newer than every replica's heartbeat was routed to a replica"
+    if not wait_for(replicas, lambda: replicas.read_pool(token) is not replicas.primary, args.wait, args.interval):
+        return f"no replica applied token {token} within {args.wait}s"
+    pool = replicas.read_pool(token)
+    seen = read_probe(pool)
+    if seen != value:
+        host = pool.connect_args.get('host'), pool.connect_args.get('port')
+        return f"replica {host} reached token {token} but shows probe {seen}, not {value}"
+    return None
+
+
+def check_failover(replicas, args):
+    """A replica whose connection is killed mid-query drops out, then comes back."""
+    victim = replicas.replicas[0]
+    conn = victim.get()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT CONNECTION_ID()")
+        connection_id = cursor.fetchone()[0]
+        killer = victim.get()
+        try:
+            other = killer.cursor()
+            other.execute("KILL %s", (connection_id,))
+            other.close()
+        finally:
+            victim.put(killer)
+        try:
+            cursor.execute(HEARTBEAT_QUERY, (PROBE_SOURCE,))
+            cursor.fetchall()
+            return "the killed replica connection still answered"
+        except mysql.connector.Error as e:
+            # What main.db_cursor does when a read fails part-way
+            replicas.mark_failed(victim, e)
+    finally:
+        victim.put(conn)  # a dead connection is discarded, not pooled
+
+    if any(replicas.read_pool() is victim for _ in range(len(replicas.replicas) * 2)):
+        return "reads still went to the failed replica"
+    if not wait_for(replicas, lambda: replicas.stats()['replicas'][0]['healthy'], args.wait, args.interval):
+        return "the failed replica did not come back on its next checks"
+    return None
+
+
+def main():
+    parser = add_connection_args(argparse.ArgumentParser(description=__doc__.splitlines()[0]))
+    parser.add_argument("--replica", type=parse_address, action="append", required=True,
+                        help="Replica HOST:PORT (repeat for several)")
+    parser.add_argument("--max-lag", type=float, default=5.0, help="Seconds behind before a replica is left out")
+    parser.add_argument("--interval", type=float, default=0.5, help="Seconds between heartbeats")
+    parser.add_argument("--wait", type=float, default=30.0, help="Seconds to wait for replicas to catch up")
+    parser.add_argument("--timeout", type=float, default=5.0, help="Pool checkout timeout")
+    parser.add_argument("--watch", action="store_true", help="Keep printing routing state after the checks")
+    args = parser.parse_args()
+
+    primary = make_pool(args, args.host, args.port)
+    replicas = ReplicaSet(
+        primary, [make_pool(args, host, port) for host, port in args.replica],
+        max_lag=args.max_lag, check_interval=args.interval, source=CHECK_SOURCE,
+    )
+
+    failures = 0
+    for name, check in (("routing", check_routing), ("read-your-writes", check_read_your_writes),
+                        ("failover", check_failover)):
+        problem = check(replicas, args)
+        if problem:
+            failures += 1
+            print(f"FAIL  {name}: {problem}")
+        else:
+            print(f"ok    {name}")
+        print_stats(replicas)
+
+    if args.watch:
+        try:
+            while True:
+                time.sleep(args.interval)
+                try:
+                    replicas.check()
+                except mysql.connector.Error as e:
+                    print(f"  heartbeat failed: {e}")
+                print_stats(replicas)
+        except KeyboardInterrupt:
+            pass
+
+    primary.close()
+    for replica in replicas.replicas:
+        replica.close()
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
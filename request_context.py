@@ -0,0 +1,77 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# -----------------------------------------------------------------
+# REQUEST-SCOPED DATA CONTEXT
+# -----------------------------------------------------------------
+# Streamlit reruns the whole script on every widget interaction. A
+# RequestContext lives for exactly one rerun:
+#
+# - get(key, loader) memoizes reads, so a page that asks for the same
+#   user, profile or connection status several times (or a helper that
+#   is called from more than one section) queries it once per rerun.
+# - prefetch(*loaders) lets a page declare its independent reads up
+#   front. They run concurrently, each borrowing its own pooled
+#   connection, and land in the memo, so the page body that follows
+#   finds them already loaded and the rerun waits for about one round
+#   trip instead of one per read.
+#
+# Nothing is shared between reruns or sessions (that is what TTLCache
+# is for). A write must clear() the context before anything later in
+# the same rerun reads what it changed.
+
+class RequestContext:
+    """Per-rerun memo of loaded values, with concurrent prefetching."""
+
+    def __init__(self, max_workers=4, thread_setup=None):
+        # thread_setup() is called on the rerun's own thread before a
+        # prefetch and returns a context-manager factory that each
+        # worker thread enters around its loader (to carry thread-local
+        # state such as the profiler run across).
+        self.max_workers = max_workers
+        self.thread_setup = thread_setup
+        self._values = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.loads = 0
+
+    def get(self, key, loader):
+        """Returns the value memoized under key, calling loader() the first time."""
+        with self._lock:
+            if key in self._values:
+                self.hits += 1
+                return self._values[key]
+        value = loader()
+        with self._lock:
+            self._values[key] = value
+            self.loads += 1
+        return value
+
+    def prefetch(self, *loaders):
+        """Calls independent loaders concurrently; returns their results in order.
+
+        Each loader is expected to go through get(), so that its result is
+        memoized for the rest of the rerun.
+        """
+        if len(loaders) <= 1 or self.max_workers <= 1:
+            return [loader() for loader in loaders]
+
+        setup = self.thread_setup() if self.thread_setup else None
+
+        def call(loader):
+            if setup is None:
+                return loader()
+            with setup():
+                return loader()
+
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(loaders))) as executor:
+            futures = [executor.submit(call, loader) for loader in loaders]
+        return [future.result() for future in futures]
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+    def stats(self):
+        with self._lock:
+            return {'entries': len(self._values), 'hits': self.hits, 'loads': self.loads}
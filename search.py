@@ -0,0 +1,181 @@
+import bisect
+import re
+import threading
+
+from queries import fetch_users_by_ids
+
+# -----------------------------------------------------------------
+# USER SEARCH
+# -----------------------------------------------------------------
+# Ranked user search over the FULLTEXT indexes on Users.full_name,
+# Users.bio and Skills.skill_name (migrations/0001_search_indexes.sql).
+# Matches in the name weigh more than skills, and skills more than the
+# bio. Terms shorter than InnoDB's minimum token size never reach the
+# FULLTEXT index, so those are answered by prefix matching on names
+# instead: alone, through the name index, and next to longer terms
+# ("Li Wang"), as a filter on the FULLTEXT matches that some word of
+# the name starts with each one.
+
+FT_MIN_TOKEN_SIZE = 3   # innodb_ft_min_token_size
+SEARCH_PAGE_SIZE = 20
+SEARCH_MAX_RESULTS = 200  # hard cap on how deep a search can be paged
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+_SEARCH_SQL = """
+    SELECT u.user_id, u.full_name, u.role, u.email, SUM(m.score) AS score
+    FROM (
+        SELECT user_id, 3 * MATCH(full_name) AGAINST (%(q)s IN BOOLEAN MODE) AS score
+        FROM Users WHERE MATCH(full_name) AGAINST (%(q)s IN BOOLEAN MODE)
+        UNION ALL
+        SELECT user_id, MATCH(bio) AGAINST (%(q)s IN BOOLEAN MODE)
+        FROM Users WHERE MATCH(bio) AGAINST (%(q)s IN BOOLEAN MODE)
+        UNION ALL
+        SELECT user_id, 2 * MATCH(skill_name) AGAINST (%(q)s IN BOOLEAN MODE)
+        FROM Skills WHERE MATCH(skill_name) AGAINST (%(q)s IN BOOLEAN MODE)
+    ) m
+    JOIN Users u ON u.user_id = m.user_id
+    WHERE u.user_id != %(exclude)s{name_filter}
+    GROUP BY u.user_id, u.full_name, u.role, u.email
+    ORDER BY score DESC, u.user_id
+    LIMIT %(limit)s OFFSET %(offset)s
+"""
+
+SEARCH_QUERY = _SEARCH_SQL.format(name_filter="")
+
+# Prefix LIKE can use idx_users_full_name; only the first term is indexable
+PREFIX_SEARCH_QUERY = """
+    SELECT user_id, full_name, role, email FROM Users
+    WHERE full_name LIKE %s AND user_id != %s
+    ORDER BY full_name, user_id
+    LIMIT %s OFFSET %s
+"""
+
+NAME_INDEX_QUERY = "SELECT user_id, full_name FROM Users WHERE user_id > %s ORDER BY user_id LIMIT %s"
+
+
+def search_query(short_tokens):
+    """SEARCH_QUERY keeping only names with a word starting with each short token; returns (sql, extra params)."""
+    conditions, params = [], {}
+    for i, token in enumerate(short_tokens):
+        # Tokens are word characters only, none of them special in a regex
+        params[f'name{i}'] = f"(^|[^[:alnum:]_]){token}"
+        conditions.append(f"\n      AND u.full_name REGEXP %(name{i})s")
+    return _SEARCH_SQL.format(name_filter="".join(conditions)), params
+
+
+def tokenize(text):
+    """Lower-cases text and splits it into word tokens."""
+    return _TOKEN_RE.findall(text.lower()) if text else []
+
+
+def boolean_query(tokens):
+    """Builds a BOOLEAN MODE expression with prefix matching on every term.
+
+    Only word characters survive tokenize(), so user input can't inject
+    FULLTEXT operators.
+    """
+    return " ".join(f"{token}*" for token in tokens)
+
+
+def _page_bounds(page, page_size):
+    offset = page * page_size
+    limit = min(page_size, SEARCH_MAX_RESULTS - offset)
+    return offset, limit
+
+
+def search_users(cursor, term, exclude_user_id, page=0, page_size=SEARCH_PAGE_SIZE, name_index=None):
+    """Searches users by name, bio and skills.
+
+    Returns (rows, has_next_page). At most SEARCH_MAX_RESULTS rows are
+    reachable across all pages. Short terms are prefix-matched against
+    names: on their own through name_index when one is given, and
+    alongside longer terms as a filter on the FULLTEXT matches.
+    """
+    offset, limit = _page_bounds(page, page_size)
+    tokens = tokenize(term)
+    if limit <= 0 or not tokens:
+        return [], False
+
+    ft_tokens = [t for t in tokens if len(t) >= FT_MIN_TOKEN_SIZE]
+    if ft_tokens:
+        sql, name_params = search_query(sorted({t for t in tokens if len(t) < FT_MIN_TOKEN_SIZE}))
+        cursor.execute(sql, {
+            'q': boolean_query(ft_tokens),
+            'exclude': exclude_user_id,
+            'limit': limit + 1,
+            'offset': offset,
+            **name_params,
+        })
+        rows = cursor.fetchall()
+    elif name_index is not None:
+        name_index.refresh(cursor)
+        ids = name_index.prefix_search(tokens, limit=offset + limit + 2)
+        ids = [uid for uid in ids if uid != exclude_user_id][offset:offset + limit + 1]
+        rows = fetch_users_by_ids(cursor, ids)
+    else:
+        cursor.execute(PREFIX_SEARCH_QUERY, (f"{tokens[0]}%", exclude_user_id, limit + 1, offset))
+        rows = cursor.fetchall()
+
+    has_next = len(rows) > limit and offset + limit < SEARCH_MAX_RESULTS
+    return rows[:limit], has_next
+
+
+# -----------------------------------------------------------------
+# IN-PROCESS NAME INDEX (typeahead)
+# -----------------------------------------------------------------
+
+class NameIndex:
+    """An in-memory inverted index from name tokens to user_ids.
+
+    Tokens are kept sorted so a prefix lookup is a bisect plus a short
+    scan. The app never renames or deletes users, so refresh() only
+    needs to pull users created since the last refresh.
+    """
+
+    def __init__(self):
+        self._tokens = []     # sorted distinct tokens
+        self._postings = {}   # token -> set of user_ids
+        self._last_user_id = 0
+        self._lock = threading.Lock()
+
+    def refresh(self, cursor, batch_size=10000):
+        """Indexes users added since the last refresh."""
+        while True:
+            cursor.execute(NAME_INDEX_QUERY, (self._last_user_id, batch_size))
+            rows = cursor.fetchall()
+            if not rows:
+                return
+            with self._lock:
+                new_tokens = set()
+                for row in rows:
+                    for token in tokenize(row['full_name']):
+                        if token not in self._postings:
+                            self._postings[token] = set()
+                            new_tokens.add(token)
+                        self._postings[token].add(row['user_id'])
+                if new_tokens:
+                    # One sort per batch instead of an insort per new token
+                    self._tokens = sorted(set(self._tokens) | new_tokens)
+                self._last_user_id = rows[-1]['user_id']
+            if len(rows) < batch_size:
+                return
+
+    def _prefix_ids(self, prefix):
+        ids = set()
+        i = bisect.bisect_left(self._tokens, prefix)
+        while i < len(self._tokens) and self._tokens[i].startswith(prefix):
+            ids |= self._postings[self._tokens[i]]
+            i += 1
+        return ids
+
+    def prefix_search(self, tokens, limit=SEARCH_PAGE_SIZE):
+        """Returns user_ids whose name has a word starting with every token."""
+        with self._lock:
+            result = None
+            for token in sorted(set(tokens), key=len, reverse=True):
+                ids = self._prefix_ids(token)
+                result = ids if result is None else result & ids
+                if not result:
+                    return []
+        return sorted(result)[:limit] if result else []
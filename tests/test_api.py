@@ -0,0 +1,43 @@
+from api import accepts_gzip, etag_matches, etag_of, not_modified_since
+
+ETAG = etag_of(b'{"a":1}')
+
+
+def test_etag_is_weak():
+    assert ETAG.startswith('W/"')
+
+
+def test_no_header_never_matches():
+    assert not etag_matches(None, ETAG)
+
+
+def test_star_matches():
+    assert etag_matches(' * ', ETAG)
+
+
+def test_matches_weak_and_strong_forms():
+    assert etag_matches(ETAG, ETAG)
+    assert etag_matches(ETAG[2:], ETAG)
+
+
+def test_matches_any_in_list():
+    assert etag_matches(f'W/"other", {ETAG}', ETAG)
+    assert not etag_matches('W/"other", "another"', ETAG)
+
+
+def test_not_modified_since():
+    assert not_modified_since("Thu, 01 Jan 2026 00:00:00 GMT", 1767225600)
+    assert not not_modified_since("Thu, 01 Jan 2026 00:00:00 GMT", 1767225601)
+    assert not not_modified_since("not a date", 0)
+    assert not not_modified_since(None, 0)
+
+
+def test_accepts_gzip():
+    assert accepts_gzip("gzip, deflate, br")
+    assert accepts_gzip("br;q=1.0, gzip;q=0.5")
+    assert accepts_gzip("*")
+    assert not accepts_gzip("gzip;q=0")
+    assert not accepts_gzip("GZIP; q=0.0, *;q=1")
+    assert not accepts_gzip("identity")
+    assert not accepts_gzip("")
+    assert not accepts_gzip(None)
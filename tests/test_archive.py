@@ -0,0 +1,24 @@
+from datetime import date
+
+from archive import add_periods, partition_name, period_start
+
+
+def test_period_start():
+    assert period_start(date(2026, 10, 17), 'year') == date(2026, 1, 1)
+    assert period_start(date(2026, 10, 17), 'month') == date(2026, 10, 1)
+
+
+def test_add_years():
+    assert add_periods(date(2026, 1, 1), 'year', 1) == date(2027, 1, 1)
+    assert add_periods(date(2026, 1, 1), 'year', -3) == date(2023, 1, 1)
+
+
+def test_add_months_across_years():
+    assert add_periods(date(2026, 11, 1), 'month', 2) == date(2027, 1, 1)
+    assert add_periods(date(2026, 1, 1), 'month', -1) == date(2025, 12, 1)
+    assert add_periods(date(2026, 10, 1), 'month', -12) == date(2025, 10, 1)
+
+
+def test_partition_name():
+    assert partition_name(date(2026, 1, 1), 'year') == "p2026"
+    assert partition_name(date(2026, 3, 1), 'month') == "p202603"
@@ -0,0 +1,67 @@
+from cache import TTLCache
+
+
+def test_get_and_set():
+    cache = TTLCache()
+    assert cache.get(('user', 1)) is None
+    cache.set(('user', 1), 'ann')
+    assert cache.get(('user', 1)) == 'ann'
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses']) == (1, 1)
+
+
+def test_expired_entries_are_misses():
+    cache = TTLCache(default_ttl=0)
+    cache.set(('user', 1), 'ann')
+    assert cache.get(('user', 1), 'gone') == 'gone'
+    assert cache.stats()['expirations'] == 1
+
+
+def test_evicts_least_recently_used():
+    cache = TTLCache(max_entries=2)
+    cache.set(('a',), 1)
+    cache.set(('b',), 2)
+    cache.get(('a',))          # b is now the least recently used
+    cache.set(('c',), 3)
+    assert cache.get(('b',)) is None
+    assert cache.get(('a',)) == 1
+    assert cache.get(('c',)) == 3
+    assert cache.stats()['evictions'] == 1
+
+
+def test_set_refreshes_recency():
+    cache = TTLCache(max_entries=2)
+    cache.set(('a',), 1)
+    cache.set(('b',), 2)
+    cache.set(('a',), 10)
+    cache.set(('c',), 3)
+    assert cache.get(('a',)) == 10
+    assert cache.get(('b',)) is None
+
+
+def test_invalidate_prefix():
+    cache = TTLCache()
+    cache.set(('profile', 1, 7), 'p17')
+    cache.set(('profile', 1, 8), 'p18')
+    cache.set(('profile', 2, 7), 'p27')
+    cache.set(('user_id', 1), 'u1')
+    cache.invalidate_prefix('profile', 1)
+    assert cache.get(('profile', 1, 7)) is None
+    assert cache.get(('profile', 1, 8)) is None
+    assert cache.get(('profile', 2, 7)) == 'p27'
+    assert cache.get(('user_id', 1)) == 'u1'
+    assert cache.stats()['invalidations'] == 2
+
+
+def test_get_or_load_does_not_cache_none():
+    cache = TTLCache()
+    calls = []
+
+    def load():
+        calls.append(1)
+        return None if len(calls) == 1 else 'found'
+
+    assert cache.get_or_load(('user', 1), load) is None
+    assert cache.get_or_load(('user', 1), load) == 'found'
+    assert cache.get_or_load(('user', 1), load) == 'found'
+    assert len(calls) == 2
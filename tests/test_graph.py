@@ -0,0 +1,110 @@
+import numpy as np
+
+from graph import ConnectionGraph
+
+#   1 - 2 - 3
+#   |   |
+#   4 - 5   6 - 7
+EDGES = [(1, 2), (2, 3), (1, 4), (2, 5), (4, 5), (6, 7)]
+
+
+def make_graph(edges=EDGES):
+    graph = ConnectionGraph()
+    src = [a for a, b in edges] + [b for a, b in edges]
+    dst = [b for a, b in edges] + [a for a, b in edges]
+    graph._build(np.array(src, dtype=np.int64), np.array(dst, dtype=np.int64))
+    return graph
+
+
+class FakeCursor:
+    """Answers the two statements refresh() runs from a list of change rows."""
+
+    def __init__(self, changes, edges=EDGES):
+        self.changes = changes
+        self.edges = edges
+        self.result = []
+
+    def execute(self, sql, params=()):
+        if "MAX(change_id)" in sql:
+            self.result = [{'last_change_id': max((c['change_id'] for c in self.changes), default=0)}]
+        elif "FROM ConnectionEdgeChanges" in sql:
+            self.result = [c for c in self.changes if c['change_id'] >= params[0]]
+        else:
+            self.result = [{'user_id': a, 'other_user_id': b} for a, b in self.edges]
+            self.result += [{'user_id': b, 'other_user_id': a} for a, b in self.edges]
+
+    def fetchone(self):
+        return self.result[0]
+
+    def fetchall(self):
+        return self.result
+
+    def fetchmany(self, size):
+        rows, self.result = self.result[:size], self.result[size:]
+        return rows
+
+
+def change(change_id, a, b, added=True):
+    return {'change_id': change_id, 'user_a': a, 'user_b': b, 'added': added}
+
+
+def test_neighbors():
+    graph = make_graph()
+    assert graph.neighbors(2).tolist() == [1, 3, 5]
+    assert graph.neighbors(99).tolist() == []
+
+
+def test_mutual_count():
+    graph = make_graph()
+    assert graph.mutual_count(1, 5) == 2     # 2 and 4
+    assert graph.mutual_count(1, 6) == 0
+
+
+def test_suggestions_rank_by_mutual_connections():
+    graph = make_graph()
+    assert graph.suggestions(1) == [(5, 2), (3, 1)]
+    assert graph.suggestions(6) == []
+    assert graph.suggestions(99) == []
+
+
+def test_overlays_apply_before_compaction():
+    graph = make_graph()
+    graph._add_edge(3, 6)
+    graph._remove_edge(1, 4)
+    assert graph.neighbors(3).tolist() == [2, 6]
+    assert graph.neighbors(1).tolist() == [2]
+    assert graph.suggestions(2) == [(4, 1), (6, 1)]
+
+
+def test_compact_matches_overlays():
+    graph = make_graph()
+    graph._add_edge(3, 6)
+    graph._remove_edge(1, 4)
+    graph._remove_edge(2, 5)
+    graph._add_edge(2, 5)
+    before = {u: graph.neighbors(u).tolist() for u in range(1, 8)}
+    graph.compact()
+    assert {u: graph.neighbors(u).tolist() for u in range(1, 8)} == before
+    assert graph.degree_stats()['edges'] == 6
+
+
+def test_refresh_replays_changes():
+    cursor = FakeCursor([change(1, 1, 2)])
+    graph = ConnectionGraph()
+    graph.refresh(cursor)                       # first call loads
+    cursor.changes += [change(2, 3, 6), change(3, 1, 4, added=False)]
+    graph.refresh(cursor)
+    assert graph.neighbors(1).tolist() == [2]
+    assert graph.neighbors(6).tolist() == [3, 7]
+
+
+def test_refresh_reloads_after_its_changes_were_pruned():
+    cursor = FakeCursor([change(5, 1, 2)])
+    graph = ConnectionGraph()
+    graph.load(cursor)
+    # Changes 5-7 pruned; the edge table already has 3 - 6
+    cursor.changes = [change(8, 6, 7)]
+    cursor.edges = EDGES + [(3, 6)]
+    graph.refresh(cursor)
+    assert graph.neighbors(3).tolist() == [2, 6]
+    assert graph._last_change_id == 8
@@ -0,0 +1,74 @@
+import json
+
+from import_users import batches, drop_taken, read_records
+
+GOOD = {'full_name': 'Ann', 'role': 'student', 'password': 'secret'}
+
+
+def record(username, **fields):
+    return dict(GOOD, username=username, email=f"{username}@example.org", **fields)
+
+
+def read_batches(path, batch_size=10):
+    skipped = []
+    loaded = [[r['username'] for r in batch] for batch in batches(read_records(str(path)), batch_size, skipped)]
+    return loaded, skipped
+
+
+def test_bad_jsonl_lines_are_skipped_with_line_numbers(tmp_path):
+    path = tmp_path / "cohort.jsonl"
+    path.write_text("\n".join([
+        json.dumps(record("ann")),
+        "{not json",
+        "",
+        "[1, 2]",
+        json.dumps(record("bob", projects={'project_title': "not a list"})),
+        json.dumps(record("cy", role="wizard")),
+        json.dumps(record("dee")),
+    ]) + "\n")
+    loaded, skipped = read_batches(path)
+    assert loaded == [["ann", "dee"]]
+    assert [message.split(":")[0] for message in skipped] == ["line 2", "line 4", "line 5", "line 6"]
+
+
+def test_bad_csv_cells_are_skipped(tmp_path):
+    path = tmp_path / "cohort.csv"
+    path.write_text(
+        "username,full_name,email,role,password,skills,projects\n"
+        'ann,Ann,ann@example.org,student,pw,python;sql,"[{""project_title"": ""Robots""}]"\n'
+        "bob,Bob,bob@example.org,student,pw,,{oops\n"
+    )
+    skipped = []
+    records = [r for batch in batches(read_records(str(path)), 10, skipped) for r in batch]
+    assert [r['username'] for r in records] == ["ann"]
+    assert records[0]['skills'] == ["python", "sql"]
+    assert records[0]['projects'] == [{'project_title': "Robots"}]
+    assert skipped[0].startswith("line 3:")
+
+
+class ExistingUsers:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def execute(self, sql, params):
+        pass
+
+    def fetchall(self):
+        return self.rows
+
+
+def test_drop_taken_checks_database_and_earlier_records():
+    batch = [dict(record(name), email=email, line_no=i) for i, (name, email) in enumerate([
+        ("ann", "new@example.org"),     # username taken in Users
+        ("bob", "ANN@example.org"),     # email taken in Users, other case
+        ("cy", "cy@example.org"),
+        ("CY", "other@example.org"),    # username repeats line 3
+        ("dee", "dee@example.org"),
+    ], start=1)]
+    kept, skipped = drop_taken(ExistingUsers([("Ann", "ann@example.org")]), batch)
+    assert [r['username'] for r in kept] == ["cy", "dee"]
+    assert skipped == [
+        "line 1: username 'ann' already used by an existing user",
+        "line 2: email 'ANN@example.org' already used by an existing user",
+        "line 4: username 'CY' already used by line 3",
+    ]
@@ -0,0 +1,43 @@
+import mysql.connector
+
+from migrate import already_applied, split_statements
+
+
+def error(errno):
+    return mysql.connector.Error(msg="failed", errno=errno)
+
+
+def test_existing_objects_count_as_applied():
+    assert already_applied("CREATE TABLE Foo (id INT)", error(1050))
+    assert already_applied("ALTER TABLE Users ADD INDEX idx_users_role (role)", error(1061))
+    assert not already_applied("INSERT INTO Foo VALUES (1)", error(1062))
+
+
+def test_missing_drop_target_counts_as_applied_only_for_indexes_and_columns():
+    assert already_applied("ALTER TABLE Applications DROP INDEX uq_applications_opportunity_student", error(1091))
+    assert already_applied("ALTER TABLE Users DROP COLUMN legacy_flag", error(1091))
+    assert not already_applied("ALTER TABLE Applications DROP FOREIGN KEY Applications_ibfk_1", error(1091))
+    assert not already_applied(
+        "ALTER TABLE Applications DROP INDEX idx_a, DROP FOREIGN KEY Applications_ibfk_1", error(1091)
+    )
+
+
+def test_split_statements_honours_delimiter_blocks():
+    sql = """
+-- comment
+CREATE TABLE Foo (id INT);
+
+DELIMITER $$
+CREATE PROCEDURE sp_Foo()
+BEGIN
+    SELECT 1;
+END$$
+DELIMITER ;
+
+CALL sp_Foo();
+"""
+    assert split_statements(sql) == [
+        "CREATE TABLE Foo (id INT)",
+        "CREATE PROCEDURE sp_Foo()\nBEGIN\n    SELECT 1;\nEND",
+        "CALL sp_Foo()",
+    ]
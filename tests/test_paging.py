@@ -0,0 +1,52 @@
+import pytest
+
+from paging import KeysetPager
+
+SQL = "SELECT id, name FROM Things WHERE owner = %s AND {keyset}"
+
+
+def test_needs_keyset_placeholder():
+    with pytest.raises(ValueError):
+        KeysetPager("SELECT id FROM Things", [('id', 'id')])
+
+
+def test_first_page_query():
+    pager = KeysetPager(SQL, [('id', 'id')], page_size=10)
+    sql, params = pager.page_query([7])
+    assert sql == "SELECT id, name FROM Things WHERE owner = %s AND TRUE ORDER BY id LIMIT %s"
+    assert params == [7, 11]
+
+
+def test_later_page_puts_key_among_params():
+    pager = KeysetPager(SQL + " AND kind = %s", [('id', 'id')], page_size=10)
+    sql, params = pager.page_query([7, 'a'], after=42)
+    assert "owner = %s AND id > %s AND kind = %s ORDER BY id LIMIT %s" in sql
+    assert params == [7, 42, 'a', 11]
+
+
+def test_descending_composite_key():
+    pager = KeysetPager(SQL, [('t.score', 'score'), ('t.id', 'id')], descending=True)
+    sql, params = pager.page_query([7], after=(5, 99), page_size=3)
+    assert "(t.score, t.id) < (%s, %s)" in sql
+    assert sql.endswith("ORDER BY t.score DESC, t.id DESC LIMIT %s")
+    assert params == [7, 5, 99, 4]
+
+
+def test_split_page_last_page():
+    pager = KeysetPager(SQL, [('id', 'id')], page_size=2)
+    rows = [{'id': 1}, {'id': 2}]
+    assert pager.split_page(rows) == (rows, None)
+
+
+def test_split_page_dict_rows():
+    pager = KeysetPager(SQL, [('id', 'id')], page_size=2)
+    rows, next_after = pager.split_page([{'id': 1}, {'id': 2}, {'id': 3}])
+    assert rows == [{'id': 1}, {'id': 2}]
+    assert next_after == 2
+
+
+def test_split_page_tuple_rows_composite_key():
+    pager = KeysetPager(SQL, [('score', 'score'), ('id', 'id')], page_size=1)
+    rows, next_after = pager.split_page([(10, 'x', 4), (9, 'y', 5)], column_names=('score', 'name', 'id'))
+    assert rows == [(10, 'x', 4)]
+    assert next_after == (10, 4)
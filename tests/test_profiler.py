@@ -0,0 +1,78 @@
+import textwrap
+
+from cache import TTLCache
+from profiler import QueryProfiler, normalize_sql
+from request_context import RequestContext
+
+APP_FILE = "/srv/app/main.py"
+
+# A stand-in for main.py's read helpers, compiled under the app's file name
+APP_SCRIPT = textwrap.dedent("""
+    def cached_read(key, load, ttl=None):
+        return rerun_data.get(key, lambda: cache.get_or_load(key, load, ttl=ttl))
+
+    def replica_read(read, default=None):
+        cursor = profiler.wrap(FakeCursor())
+        try:
+            return read(cursor)
+        finally:
+            cursor.close()
+
+    def get_faculty_list():
+        def load(cursor):
+            cursor.execute("SELECT user_id, full_name FROM Users WHERE role IN ('faculty', 'alumni')")
+            return cursor.fetchall()
+        return cached_read(('faculty_list',), lambda: replica_read(load))
+
+    def fetch_user_by_id(user_id):
+        def load():
+            return replica_read(lambda cursor: cursor.execute("SELECT * FROM Users WHERE user_id = %s", (user_id,)))
+        return cached_read(('user_id', user_id), load)
+
+    def show_dashboard():
+        fetch_user_by_id(1)
+        rerun_data.prefetch(get_faculty_list, lambda: fetch_user_by_id(2))
+        cursor = profiler.wrap(FakeCursor())
+        cursor.execute("SELECT COUNT(*) FROM Opportunities")
+        cursor.close()
+""")
+
+
+class FakeCursor:
+    rowcount = 0
+
+    def execute(self, sql, params=None):
+        pass
+
+    def fetchall(self):
+        return [(1, 'Ann')]
+
+    def close(self):
+        pass
+
+
+def test_statements_are_put_down_to_the_helper_that_issued_them():
+    profiler = QueryProfiler(app_file=APP_FILE)
+    app = {'profiler': profiler, 'FakeCursor': FakeCursor, 'cache': TTLCache()}
+    with profiler.run('dashboard') as run:
+        app['rerun_data'] = RequestContext(thread_setup=lambda: lambda: profiler.joined(run))
+        exec(compile(APP_SCRIPT, APP_FILE, 'exec'), app)
+        app['show_dashboard']()
+
+    statements = profiler.snapshot()['pages']['dashboard']['statements']
+    callers = {sql: stats['callers'] for sql, stats in statements.items()}
+    assert callers == {
+        normalize_sql("SELECT * FROM Users WHERE user_id = %s"): {'fetch_user_by_id': 2},
+        normalize_sql("SELECT user_id, full_name FROM Users WHERE role IN ('faculty', 'alumni')"):
+            {'get_faculty_list': 1},
+        normalize_sql("SELECT COUNT(*) FROM Opportunities"): {'show_dashboard': 1},
+    }
+
+
+def test_statements_from_outside_the_app_have_no_caller():
+    profiler = QueryProfiler(app_file=APP_FILE)
+    cursor = profiler.wrap(FakeCursor())
+    cursor.execute("SELECT 1")
+    cursor.close()
+    statements = profiler.snapshot()['pages']['(outside a run)']['statements']
+    assert statements[normalize_sql("SELECT 1")]['callers'] == {'?': 1}
@@ -0,0 +1,171 @@
+import mysql.connector
+import pytest
+
+from db import HEARTBEAT_QUERY, HEARTBEAT_WRITE, ReplicaSet
+
+
+class FakeCursor:
+    def __init__(self, pool):
+        self.pool = pool
+        self.row = None
+
+    def execute(self, sql, params=()):
+        if sql == HEARTBEAT_WRITE:
+            self.pool.uncommitted[params[0]] = params[1]
+        elif sql == HEARTBEAT_QUERY:
+            seq = self.pool.rows.get(params[0])
+            self.row = (seq,) if seq is not None else None
+        else:
+            raise AssertionError(f"unexpected statement {sql!r}")
+
+    def fetchone(self):
+        return self.row
+
+    def close(self):
+        pass
+
+
+class FakeConn:
+    def __init__(self, pool):
+        self.pool = pool
+
+    def cursor(self):
+        return FakeCursor(self.pool)
+
+    def commit(self):
+        self.pool.rows.update(self.pool.uncommitted)
+        self.pool.uncommitted.clear()
+
+
+class FakePool:
+    """Stands in for a ConnectionPool on one server; rows is its ReplicationHeartbeat table."""
+
+    def __init__(self, port):
+        self.connect_args = {'host': 'localhost', 'port': port}
+        self.rows = {}
+        self.uncommitted = {}
+        self.down = False
+
+    def get(self):
+        if self.down:
+            raise mysql.connector.Error("server down")
+        return FakeConn(self)
+
+    def put(self, conn):
+        pass
+
+    def replicate_from(self, primary):
+        self.rows.update(primary.rows)
+
+
+@pytest.fixture
+def servers():
+    return FakePool(3306), FakePool(3307), FakePool(3308)
+
+
+def make_set(primary, *replicas, max_lag=5.0):
+    return ReplicaSet(primary, replicas, max_lag=max_lag, source="test")
+
+
+def test_reads_go_to_primary_until_a_replica_is_checked(servers):
+    primary, replica, _ = servers
+    replicas = make_set(primary, replica)
+    assert replicas.read_pool() is primary
+    assert replicas.stats()['primary_reads'] == 1
+
+
+def test_caught_up_replica_gets_token_free_reads(servers):
+    primary, replica, _ = servers
+    replicas = make_set(primary, replica)
+    replicas.check()              # heartbeat 1 written, replica has not applied it yet
+    replica.replicate_from(primary)
+    replicas.check()              # heartbeat 2 written, replica has applied 1
+    state = replicas.stats()['replicas'][0]
+    assert state['healthy'] and state['applied'] == 1
+    assert replicas.read_pool() is replica
+    assert state['reads'] == 0 and replicas.stats()['replicas'][0]['reads'] == 1
+
+
+def test_write_token_is_two_heartbeats_ahead(servers):
+    primary, replica, _ = servers
+    replicas = make_set(primary, replica)
+    assert replicas.write_token() == 2
+    replicas.check()
+    assert replicas.write_token() == 3
+    assert replicas.latest_token() == 3
+
+
+def test_token_routes_to_primary_until_replica_applies_it(servers):
+    primary, replica, _ = servers
+    replicas = make_set(primary, replica)
+    replica.replicate_from(primary)
+    replicas.check()
+    token = replicas.write_token()
+    assert replicas.read_pool(token) is primary
+    while replicas.stats()['heartbeat'] < token:
+        replicas.check()
+    replica.replicate_from(primary)
+    replicas.check()
+    assert replicas.read_pool(token) is replica
+
+
+def test_round_robin_over_ready_replicas(servers):
+    primary, first, second = servers
+    replicas = make_set(primary, first, second)
+    for _ in range(2):
+        replicas.check()
+        first.replicate_from(primary)
+        second.replicate_from(primary)
+    replicas.check()
+    assert {id(replicas.read_pool()) for _ in range(4)} == {id(first), id(second)}
+
+
+def test_mark_failed_takes_replica_out_until_next_good_check(servers):
+    primary, first, second = servers
+    replicas = make_set(primary, first, second)
+    for _ in range(2):
+        replicas.check()
+        first.replicate_from(primary)
+        second.replicate_from(primary)
+    replicas.mark_failed(first, mysql.connector.Error("lost connection"))
+    assert all(replicas.read_pool() is second for _ in range(4))
+    assert replicas.stats()['replicas'][0]['error'] == "lost connection"
+    replicas.check()
+    assert replicas.stats()['replicas'][0]['healthy']
+
+
+def test_unreachable_replica_is_unhealthy(servers):
+    primary, replica, _ = servers
+    replicas = make_set(primary, replica)
+    replica.down = True
+    replicas.check()
+    state = replicas.stats()['replicas'][0]
+    assert not state['healthy']
+    assert "server down" in state['error']
+    assert replicas.read_pool() is primary
+
+
+def test_replica_behind_unknown_heartbeat_is_lagging(servers):
+    primary, replica, _ = servers
+    replicas = make_set(primary, replica)
+    replicas.check()
+    replicas.check()
+    # Applied nothing: heartbeat 1 was written moments ago, so within max_lag
+    state = replicas.stats()['replicas'][0]
+    assert state['applied'] == 0 and state['healthy']
+
+    strict = make_set(primary, replica, max_lag=0.0)
+    strict.check()
+    assert not strict.stats()['replicas'][0]['healthy']
+
+
+def test_restarted_process_resumes_seq_from_primary(servers):
+    primary, replica, _ = servers
+    primary.rows['test'] = 41     # left behind by the previous process with this source
+    replica.rows['test'] = 40     # a stale replica
+    replicas = make_set(primary, replica)
+    replicas.check()
+    assert replicas.stats()['heartbeat'] == 42
+    token = replicas.write_token()
+    assert token == 44
+    assert replicas.read_pool(token) is primary
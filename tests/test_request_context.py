@@ -0,0 +1,62 @@
+import threading
+from contextlib import contextmanager
+
+from request_context import RequestContext
+
+
+def test_get_memoizes():
+    context = RequestContext()
+    calls = []
+    assert context.get('k', lambda: calls.append(1) or 'v') == 'v'
+    assert context.get('k', lambda: calls.append(1) or 'other') == 'v'
+    assert len(calls) == 1
+    assert context.stats() == {'entries': 1, 'hits': 1, 'loads': 1}
+
+
+def test_memoizes_none():
+    context = RequestContext()
+    calls = []
+    context.get('k', lambda: calls.append(1))
+    context.get('k', lambda: calls.append(1))
+    assert len(calls) == 1
+
+
+def test_clear_forgets_values():
+    context = RequestContext()
+    context.get('k', lambda: 1)
+    context.clear()
+    assert context.get('k', lambda: 2) == 2
+
+
+def test_prefetch_runs_loaders_concurrently_and_memoizes():
+    context = RequestContext(max_workers=3)
+    barrier = threading.Barrier(3, timeout=5)
+
+    def loader(key):
+        def load():
+            barrier.wait()   # only passes if all three run at the same time
+            return key * 10
+        return lambda: context.get(key, load)
+
+    assert context.prefetch(loader(1), loader(2), loader(3)) == [10, 20, 30]
+    assert context.get(2, lambda: None) == 20
+    assert context.stats()['loads'] == 3
+
+
+def test_prefetch_single_loader_runs_inline():
+    context = RequestContext()
+    caller = threading.current_thread()
+    assert context.prefetch(lambda: threading.current_thread() is caller) == [True]
+
+
+def test_prefetch_enters_thread_setup_in_workers():
+    entered = []
+
+    @contextmanager
+    def per_thread():
+        entered.append(threading.current_thread().name)
+        yield
+
+    context = RequestContext(max_workers=2, thread_setup=lambda: per_thread)
+    assert context.prefetch(lambda: 1, lambda: 2) == [1, 2]
+    assert len(entered) == 2
@@ -0,0 +1,33 @@
+from search import FT_MIN_TOKEN_SIZE, SEARCH_QUERY, boolean_query, search_query, tokenize
+
+
+def test_tokenize():
+    assert tokenize("Ann-Marie O'Neil, ML/AI") == ['ann', 'marie', 'o', 'neil', 'ml', 'ai']
+    assert tokenize("") == []
+    assert tokenize(None) == []
+
+
+def test_tokenize_keeps_unicode_words():
+    assert tokenize("José Müller") == ['josé', 'müller']
+
+
+def test_boolean_query_prefix_matches_every_term():
+    assert boolean_query(['data', 'science']) == "data* science*"
+
+
+def test_boolean_query_cannot_carry_operators():
+    # Operators are stripped by tokenize() before they get here
+    assert boolean_query(tokenize('+python -"java" (c++)')) == "python* java* c*"
+
+
+def test_search_query_without_short_terms_is_search_query():
+    sql, params = search_query([])
+    assert sql == SEARCH_QUERY
+    assert params == {}
+
+
+def test_search_query_filters_names_by_short_terms():
+    short = [t for t in tokenize("Li Wang") if len(t) < FT_MIN_TOKEN_SIZE]
+    sql, params = search_query(short)
+    assert "u.full_name REGEXP %(name0)s" in sql
+    assert params == {'name0': "(^|[^[:alnum:]_])li"}